@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+from .OceanData import OceanEnvironment
+from .RouteCurrents import RouteCurrentProfile
+from typing import Dict, Optional, Tuple
+import numpy
+
+
+class CurrentEnsembleStatistics(object):
+   """Distributions of the speed through the water and of the energy required to transit a single
+   route over every realization of a `CurrentEnsemble`.
+
+   Entry `i` of each distribution corresponds to the same realization `i` of the ocean current
+   field for every route simulated together, so per-realization totals may be formed by summing
+   the distributions of multiple routes.
+   """
+
+
+   # Public attributes ----------------------------------------------------------------------------
+
+   name: str
+   """Name of the simulated route (i.e., of its mission stage)."""
+
+   ground_speed: float
+   """Average speed over the ground at which the route was simulated (in `m/s`)."""
+
+   transit_duration: float
+   """Duration of the route transit at the simulated speed over the ground (in `s`)."""
+
+   required_speeds: numpy.ndarray
+   """Minimum constant speed through the water with which the route can be transited within the
+   transit duration for each realization (in `m/s`)."""
+
+   energies: numpy.ndarray
+   """Total propulsive and hotel energy required to transit the route for each realization
+   (in `J`)."""
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self, name: str, ground_speed: float, transit_duration: float,
+                      required_speeds: numpy.ndarray, energies: numpy.ndarray) -> None:
+      super().__init__()
+      self.name, self.ground_speed, self.transit_duration = name, ground_speed, transit_duration
+      self.required_speeds, self.energies = required_speeds, energies
+
+
+   # Built-in method implementations --------------------------------------------------------------
+
+   def __repr__(self) -> str:
+      return 'CurrentEnsembleStatistics({}: {} realizations, median speed {:.3f} m/s, median energy {:.1f} J)' \
+             .format(self.name, len(self.required_speeds), self.required_speed(50.0), self.energy(50.0))
+
+   def __str__(self) -> str:
+      return self.__repr__()
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   def required_speed(self, percentile: float) -> float:
+      """Returns the speed through the water (in `m/s`) which suffices for the specified
+      percentile (in `%`) of all current realizations."""
+      return float(numpy.percentile(self.required_speeds, percentile)) if self.required_speeds.size else 0.0
+
+   def energy(self, percentile: float) -> float:
+      """Returns the transit energy (in `J`) which suffices for the specified percentile (in `%`)
+      of all current realizations."""
+      return float(numpy.percentile(self.energies, percentile)) if self.energies.size else 0.0
+
+
+class CurrentEnsemble(object):
+   """Monte Carlo ensemble of stochastic ocean current realizations drawn from the per-cell mean
+   and standard deviation fields of an ocean currents dataset.
+
+   In each realization, the eastward and northward current components of every grid cell are
+   drawn independently from normal distributions with the mean ('uMeanData', 'vMeanData') and
+   standard deviation ('uStdData', 'vStdData') of that cell at the sampling depth. All route
+   segments starting within the same grid cell, across all simulated routes, see the same draw,
+   and each realization is evaluated with the same current model as a `RouteCurrentProfile`.
+   Realizations are processed in batches, with every batch evaluated over all segments at once,
+   such that memory usage is bounded by `batch_elements` regardless of the number of
+   realizations.
+
+   Since neighboring grid cells are drawn without any spatial correlation, adverse currents in
+   one cell are offset by favorable currents in others over a long route, so the spread of the
+   route-level distributions, and in particular their high percentiles, is understated relative
+   to real current fields whose anomalies persist over many cells. The deterministic worst case
+   from `RouteCurrentProfile.from_route()` with a positive `sigma` remains the conservative bound.
+   """
+
+   batch_elements: int = 1 << 18
+   """Maximum number of (realization, segment) pairs to evaluate at once."""
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self, ocean_currents_model: str, depth: float = 10.0) -> None:
+      super().__init__()
+      self._dataset = OceanEnvironment.load(ocean_currents_model)
+      if 'timeIndex' in self._dataset:
+         raise RuntimeError('Monte Carlo current ensembles require a static ocean currents dataset')
+      self._depth = depth
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   def simulate(self, routes: Dict[str, Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]],
+                      ground_speeds: Dict[str, float],
+                      water_densities: Dict[str, float],
+                      num_realizations: int,
+                      drag_area: float,
+                      propulsive_efficiency: float = 1.0,
+                      hotel_power: float = 0.0,
+                      seed: Optional[int] = None) -> Dict[str, CurrentEnsembleStatistics]:
+      """Simulates the transit of every route under `num_realizations` current realizations.
+
+      Each route is specified by the starting latitudes and longitudes (in `degrees`) of its
+      segments, along with the eastward, northward, and upward components of each segment (in
+      `m`), and is required to be transited within the time taken to cover its length at its
+      average speed over the ground in `ground_speeds`. For each realization, the vehicle holds
+      the minimum constant speed through the water which achieves this, crabbing into the current
+      on every segment as described in `RouteCurrentProfile`, and the propulsive power is modeled
+      as 0.5 * density * `drag_area` * speed^3 / `propulsive_efficiency`, plus a constant
+      `hotel_power` (in `W`). The drag area is the drag coefficient multiplied by the reference
+      area of the vehicle (in `m^2`)."""
+      if num_realizations < 1:
+         raise RuntimeError('At least 1 current realization must be simulated')
+      if propulsive_efficiency <= 0.0:
+         raise RuntimeError('Propulsive efficiency must be greater than 0')
+
+      # Compute the transit duration and grid cell of every segment of every route
+      segments, route_latitudes, route_longitudes, num_segments = {}, [numpy.empty(0)], [numpy.empty(0)], 0
+      for name, (latitudes, longitudes, east, north, up) in routes.items():
+         if ground_speeds[name] <= 0.0:
+            raise RuntimeError('Ground speed for route "{}" must be greater than 0 m/s'.format(name))
+         east, north, up = (numpy.asarray(component, dtype=float) for component in (east, north, up))
+         transit_duration = float(numpy.sqrt((east * east) + (north * north) + (up * up)).sum()) / ground_speeds[name]
+         segments[name] = (east, north, up, transit_duration, num_segments, num_segments + len(east))
+         route_latitudes.append(numpy.asarray(latitudes, dtype=float))
+         route_longitudes.append(numpy.asarray(longitudes, dtype=float))
+         num_segments += len(east)
+
+      # Look up the current statistics of each distinct grid cell traversed by any route
+      all_cells, u_mean, u_std, v_mean, v_std = RouteCurrentProfile.sample_currents(self._dataset, numpy.concatenate(route_latitudes),
+                                                                                    numpy.concatenate(route_longitudes), self._depth)
+      _, cell_indices, cell_map = numpy.unique(all_cells, axis=0, return_index=True, return_inverse=True)
+      cell_map = cell_map.reshape(-1)
+      u_mean, u_std, v_mean, v_std = (values[cell_indices] for values in (u_mean, u_std, v_mean, v_std))
+
+      # Evaluate all segments of all routes for each batch of realizations
+      generator = numpy.random.default_rng(seed)
+      required_speeds = {name: numpy.zeros(num_realizations) for name in segments}
+      energies = {name: numpy.zeros(num_realizations) for name in segments}
+      batch_size = max(1, min(num_realizations, CurrentEnsemble.batch_elements // max(len(cell_map), 1)))
+      for start in range(0, num_realizations, batch_size):
+         end = min(start + batch_size, num_realizations)
+         u_draws = u_mean + (u_std * generator.standard_normal((end - start, len(cell_indices))))
+         v_draws = v_mean + (v_std * generator.standard_normal((end - start, len(cell_indices))))
+         for name, (east, north, up, transit_duration, first, last) in segments.items():
+            if transit_duration == 0.0:
+               continue
+            segment_cells = cell_map[first:last]
+            profile = RouteCurrentProfile.from_currents(east, north, up, u_draws[:, segment_cells], v_draws[:, segment_cells])
+            required_speeds[name][start:end] = profile.minimum_speed_through_water(transit_duration)
+            energies[name][start:end] = profile.transit_energies(required_speeds[name][start:end], drag_area,
+                                                                 water_densities[name], propulsive_efficiency, hotel_power)
+
+      # Collect the distributions for every route
+      return { name: CurrentEnsembleStatistics(name, ground_speeds[name], transit_duration, required_speeds[name], energies[name])
+               for name, (_, _, _, transit_duration, _, _) in segments.items() }
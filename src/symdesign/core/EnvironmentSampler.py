@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+from .OceanData import OceanEnvironment
+from .OceanGrid import OceanGrid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import numpy
+
+
+def vectorized_model(model: Callable) -> Callable:
+   """Marks an environmental model callable as accepting `numpy` coordinate arrays.
+
+   A vectorized model is called once per batch of samples with broadcastable latitude, longitude,
+   and (for 3-D fields) depth arrays, and must return either an array of the broadcast shape or a
+   single value which applies to all samples. It may still be called with scalar coordinates.
+   Callables which are not marked as vectorized are called once per sample. The model itself is
+   returned unchanged, so this function may be used as a decorator:
+
+   @vectorized_model
+   def water_density_model(latitude_deg, longitude_deg, depth_m):
+      return 1030.0 + (20.0 * (depth_m / 4000.0))
+   """
+   model.vectorized = True
+   return model
+
+
+class _SampledField(object):
+   """Single environmental field registered with an `EnvironmentSampler`."""
+
+   def __init__(self, name: str, model: Union[Callable, None], default_value: float,
+                      depth: Optional[float], grid: Optional[OceanGrid] = None,
+                      values: Optional[numpy.ndarray] = None, depth_first: bool = False) -> None:
+      super().__init__()
+      self.name, self.model, self.default_value, self.depth = name, model, default_value, depth
+      self.grid, self.values, self.depth_first = grid, values, depth_first
+
+
+class EnvironmentSampler(object):
+   """Samples any number of environmental fields at the same set of coordinates in a single pass.
+
+   Each field is registered under a unique name along with its model, which may be the path to a
+   gridded dataset, a callable(latitude, longitude, depth), or `None` to always return a default
+   value. A field is sampled either at a fixed depth or at the depths passed to `sample()`.
+   Gridded fields whose axes are identical share a single grid, so that the closest latitude and
+   longitude indices are computed only once per sample, and the closest depth index only once per
+   distinct sampling depth, regardless of the number of fields registered on that grid.
+
+   Fields may also be sampled as full water-column profiles using `sample_profiles()`.
+   """
+
+   callable_profile_levels: int = 16
+   """Number of evenly spaced depth levels between the surface and the seafloor at which to
+   evaluate callable models when sampling water-column profiles."""
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self) -> None:
+      super().__init__()
+      self._fields: List[_SampledField] = []
+      self._grids: List[OceanGrid] = []
+
+
+   # Built-in method implementations --------------------------------------------------------------
+
+   def __repr__(self) -> str:
+      return 'EnvironmentSampler({} fields on {} grids)'.format(len(self._fields), len(self._grids))
+
+   def __str__(self) -> str:
+      return self.__repr__()
+
+   def __contains__(self, name: str) -> bool:
+      return any(field.name == name for field in self._fields)
+
+
+   # Helper methods -------------------------------------------------------------------------------
+
+   def _shared_grid(self, grid: OceanGrid) -> OceanGrid:
+      """Returns a previously registered grid with axes identical to the specified grid, or
+      registers and returns the specified grid if no such grid exists."""
+      for existing_grid in self._grids:
+         if existing_grid is grid or (numpy.array_equal(existing_grid.latitudes, grid.latitudes) and
+                                      numpy.array_equal(existing_grid.longitudes, grid.longitudes) and
+                                      numpy.array_equal(existing_grid.depths, grid.depths)):
+            return existing_grid
+      self._grids.append(grid)
+      return grid
+
+   def _register(self, field: _SampledField) -> None:
+      if field.name in self:
+         raise RuntimeError('An environmental field named "{}" has already been registered'.format(field.name))
+      self._fields.append(field)
+
+   def _sample(self, fields: List[_SampledField], latitudes, longitudes, depths) -> Dict[str, Any]:
+      horizontal_indices, depth_indices, samples = {}, {}, {}
+      for field in fields:
+         depth = depths if field.depth is None else field.depth
+         if field.grid is not None:
+            grid_key = id(field.grid)
+            if grid_key not in horizontal_indices:
+               horizontal_indices[grid_key] = field.grid.nearest(latitudes, longitudes)
+            depth_key = (grid_key, field.depth)
+            if depth_key not in depth_indices:
+               depth_indices[depth_key] = field.grid.depth_index(depth)
+            lat_index, lon_index = horizontal_indices[grid_key]
+            depth_index = depth_indices[depth_key]
+            samples[field.name] = field.values[depth_index, lat_index, lon_index] if field.depth_first else \
+                                  field.values[lat_index, lon_index, depth_index]
+         elif field.model is not None:
+            samples[field.name] = EnvironmentSampler.evaluate_model(field.model, latitudes, longitudes, depth)
+         else:
+            samples[field.name] = numpy.full(numpy.broadcast(latitudes, longitudes, depth).shape,
+                                             field.default_value)[()]
+      return samples
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   @property
+   def field_names(self) -> List[str]:
+      """Names of all registered fields in the order in which they were registered."""
+      return [field.name for field in self._fields]
+
+   @staticmethod
+   def evaluate_model(model: Callable, *coordinates):
+      """Evaluates an environmental model callable at either a single coordinate or at each
+      coordinate of a set of broadcastable coordinate arrays. Models marked with
+      `vectorized_model` are evaluated using a single call over all coordinate arrays."""
+      if all(numpy.ndim(coordinate) == 0 for coordinate in coordinates):
+         return model(*coordinates)
+      if getattr(model, 'vectorized', False):
+         return numpy.broadcast_to(numpy.asarray(model(*coordinates), dtype=float), numpy.broadcast(*coordinates).shape)
+      broadcast_coordinates = numpy.broadcast_arrays(*coordinates)
+      return numpy.fromiter((model(*point) for point in zip(*(coordinate.flat for coordinate in broadcast_coordinates))),
+                            dtype=float, count=broadcast_coordinates[0].size).reshape(broadcast_coordinates[0].shape)
+
+   def add_field(self, name: str,
+                       model: Union[str, Callable, None],
+                       default_value: float,
+                       depth: Optional[float] = None,
+                       array_name: str = 'data') -> None:
+      """Registers a field whose dataset stores its values as data[latIdx][lonIdx][depthIdx],
+      such as salinity, temperature, or density. If `depth` (in `m`) is `None`, the field is
+      sampled at the depths passed to `sample()`; otherwise, it is always sampled at `depth`."""
+      if isinstance(model, str):
+         model_data = OceanEnvironment.load(model)
+         self._register(_SampledField(name, None, default_value, depth,
+                                      self._shared_grid(model_data.grid()), model_data[array_name]))
+      else:
+         self._register(_SampledField(name, model, default_value, depth))
+
+   def add_current_field(self, name: str,
+                               model: Union[str, Callable, None],
+                               sigma: float = 2.0,
+                               depth: Optional[float] = None,
+                               time_window: Optional[Tuple[float, float]] = None,
+                               cache_directory: Union[str, Path, None] = None) -> None:
+      """Registers a worst-case ocean current speed field, taken as the magnitude of the mean
+      current plus `sigma` standard deviations per axis of an ocean currents dataset. For a
+      time-varying dataset, the field is the maximum worst-case speed over `time_window` (in `s`
+      since the Unix epoch), or over all times if no window is specified. If a `cache_directory`
+      is specified, the derived field is persisted there for reuse by later runs."""
+      if isinstance(model, str):
+         model_data = OceanEnvironment.load(model)
+         self._register(_SampledField(name, None, 0.0, depth, self._shared_grid(model_data.grid()),
+                                      model_data.worst_case_current_speeds(sigma, time_window, cache_directory),
+                                      depth_first=True))
+      else:
+         self._register(_SampledField(name, model, 0.0, depth))
+
+   def sample(self, latitudes, longitudes, depths=0.0) -> Dict[str, Any]:
+      """Returns a dictionary containing the value of every registered field at each of the
+      specified coordinates, which may be either scalars or broadcastable arrays."""
+      return self._sample(self._fields, latitudes, longitudes, depths)
+
+   def sample_profiles(self, latitudes, longitudes, seafloor_depths) -> Dict[str, numpy.ndarray]:
+      """Returns a dictionary containing the full water-column profile of every registered field
+      at each of the specified coordinates, as an (N x L) array of values at L depth levels.
+
+      For gridded fields, the levels are every depth index of the underlying grid down to and
+      including the grid depth closest to the local seafloor depth (in `m`), and all deeper
+      levels are set to NaN, such that `numpy.fmin` and `numpy.fmax` yield the extremes over each
+      water column. Callable fields are evaluated at `callable_profile_levels` evenly spaced
+      depths from the surface to the seafloor, and fields registered with a fixed depth are only
+      sampled at that depth. All profiles are extracted in a single indexing operation per field
+      without iterating over depth levels."""
+      latitudes, longitudes, seafloor_depths = \
+         (array.reshape(-1) for array in numpy.broadcast_arrays(numpy.asarray(latitudes, dtype=float),
+                                                                numpy.asarray(longitudes, dtype=float),
+                                                                numpy.asarray(seafloor_depths, dtype=float)))
+      fixed_depth_samples = self._sample([field for field in self._fields if field.depth is not None],
+                                         latitudes, longitudes, 0.0)
+      horizontal_indices, column_masks, profiles = {}, {}, {}
+      for field in self._fields:
+         if field.depth is not None:
+            profiles[field.name] = numpy.asarray(fixed_depth_samples[field.name], dtype=float).reshape(-1, 1)
+         elif field.grid is not None:
+            grid_key = id(field.grid)
+            if grid_key not in horizontal_indices:
+               lat_index, lon_index = field.grid.nearest(latitudes, longitudes)
+               horizontal_indices[grid_key] = lat_index[:, numpy.newaxis], lon_index[:, numpy.newaxis]
+               seafloor_levels = field.grid.depths[field.grid.depth_index(seafloor_depths)]
+               column_masks[grid_key] = field.grid.depths[numpy.newaxis, :] <= seafloor_levels[:, numpy.newaxis]
+            lat_index, lon_index = horizontal_indices[grid_key]
+            depth_index = numpy.arange(field.grid.depths.size)[numpy.newaxis, :]
+            values = field.values[depth_index, lat_index, lon_index] if field.depth_first else \
+                     field.values[lat_index, lon_index, depth_index]
+            profiles[field.name] = numpy.where(column_masks[grid_key], values, numpy.nan)
+         elif field.model is not None:
+            levels = numpy.linspace(0.0, 1.0, max(EnvironmentSampler.callable_profile_levels, 2))
+            depths = numpy.maximum(seafloor_depths, 0.0)[:, numpy.newaxis] * levels[numpy.newaxis, :]
+            profiles[field.name] = numpy.asarray(EnvironmentSampler.evaluate_model(
+               field.model, latitudes[:, numpy.newaxis], longitudes[:, numpy.newaxis], depths), dtype=float)
+         else:
+            profiles[field.name] = numpy.full((latitudes.size, 1), field.default_value)
+      return profiles
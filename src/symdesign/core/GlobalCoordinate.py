@@ -15,8 +15,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from __future__ import annotations
-from typing import Tuple
-import math
+from enum import IntEnum, auto, unique
+from typing import Iterable, Tuple, Union
+import math, numpy
 
 
 # Helper constants for XYZ-to-LLH conversion
@@ -30,6 +31,27 @@ A4 = (5.0/2.0) * A2
 A5 = A1 + A3
 A6 = 1.0 - EARTH_ECCENTRICITY_2
 
+# Helper constants for ellipsoidal geodesics
+EARTH_FLATTENING = 1.0 - math.sqrt(1.0 - EARTH_ECCENTRICITY_2)
+EARTH_SEMI_MINOR_AXIS = EARTH_EQUATORIAL_RADIUS * (1.0 - EARTH_FLATTENING)
+EARTH_SECOND_ECCENTRICITY_2 = EARTH_ECCENTRICITY_2 / (1.0 - EARTH_ECCENTRICITY_2)
+GEODESIC_TOLERANCE = 1e-12
+GEODESIC_MAX_ITERATIONS = 200
+
+
+@unique
+class GeodesicMode(IntEnum):
+   """Method used to measure the distance between two coordinates.
+
+   Chord: Straight-line ECEF distance through the Earth, which underestimates the surface
+          distance by roughly L^3 / (24 R^2) for a leg of length L (about 1 m at 100 km and
+          130 m at 500 km), but is dozens of times faster to evaluate
+   Vincenty: Length of the geodesic along the surface of the reference ellipsoid, accurate to
+             well under a millimeter, combined with the difference in height of the coordinates
+   """
+   CHORD = auto()
+   VINCENTY = auto()
+
 
 class GlobalCoordinate(object):
    """
@@ -206,8 +228,11 @@ class GlobalCoordinate(object):
 
    # Public methods -------------------------------------------------------------------------------
 
-   def compute_distance(self, target: GlobalCoordinate) -> float:
-      """Method to find the distance between two coordinates using Bowring formulas."""
+   def compute_distance(self, target: GlobalCoordinate, mode: GeodesicMode = GeodesicMode.CHORD) -> float:
+      """Method to find the distance between two coordinates using Bowring formulas, or along
+      the ellipsoidal geodesic between them for any `mode` other than `GeodesicMode.CHORD`."""
+      if mode != GeodesicMode.CHORD:
+         return float(GlobalCoordinateArray.from_coordinates([self]).compute_distance(target, mode)[0])
 
       # Compute common calculations for reuse
       ref_lat_rotation = self.latitude - (0.5 * math.pi)
@@ -245,3 +270,354 @@ class GlobalCoordinate(object):
    def compute_final_bearing(self, target: GlobalCoordinate):
       """Method to determine the final bearing toward a target coordinate."""
       return (target.compute_initial_bearing(self) + 180.0) % 180.0
+
+
+class GlobalCoordinateArray(object):
+   """Struct-of-arrays companion to `GlobalCoordinate` holding any number of coordinates as
+   contiguous `float64` arrays.
+
+   All conversions and measurements use exactly the same Bowring and ECEF-to-ENU formulas as
+   `GlobalCoordinate`, evaluated as array operations over every coordinate at once. Methods
+   accepting a target accept either a `GlobalCoordinateArray` of the same length, for pairwise
+   evaluation, or a single `GlobalCoordinate`, which is broadcast against every coordinate.
+   """
+
+
+   # Public attributes ----------------------------------------------------------------------------
+
+   x: numpy.ndarray
+   """ECEF x-coordinate of each point (in `m`)."""
+
+   y: numpy.ndarray
+   """ECEF y-coordinate of each point (in `m`)."""
+
+   z: numpy.ndarray
+   """ECEF z-coordinate of each point (in `m`)."""
+
+   latitude: numpy.ndarray
+   """Geodetic latitude of each point (in `rad`)."""
+
+   longitude: numpy.ndarray
+   """Longitude of each point (in `rad`)."""
+
+   height: numpy.ndarray
+   """Height of each point above the reference ellipsoid (in `m`)."""
+
+   earth_rad: numpy.ndarray
+   """Geocentric radius of the reference ellipsoid at the latitude of each point (in `m`)."""
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self, num_points: int = 0) -> None:
+      super().__init__()
+      self.x, self.y, self.z, self.earth_rad = (numpy.zeros(num_points) for _ in range(4))
+      self.latitude, self.longitude, self.height = (numpy.zeros(num_points) for _ in range(3))
+
+
+   # Built-in method implementations --------------------------------------------------------------
+
+   def __repr__(self) -> str:
+      return 'GlobalCoordinateArray({} points)'.format(len(self))
+
+   def __str__(self) -> str:
+      return self.__repr__()
+
+   def __len__(self) -> int:
+      return len(self.x)
+
+   def __getitem__(self, index) -> Union[GlobalCoordinate, GlobalCoordinateArray]:
+      if isinstance(index, (int, numpy.integer)):
+         coordinate = GlobalCoordinate()
+         coordinate.x, coordinate.y, coordinate.z = float(self.x[index]), float(self.y[index]), float(self.z[index])
+         coordinate.latitude, coordinate.longitude = float(self.latitude[index]), float(self.longitude[index])
+         coordinate.height, coordinate.earth_rad = float(self.height[index]), float(self.earth_rad[index])
+         return coordinate
+      coordinates = GlobalCoordinateArray()
+      coordinates.x, coordinates.y, coordinates.z = self.x[index], self.y[index], self.z[index]
+      coordinates.latitude, coordinates.longitude = self.latitude[index], self.longitude[index]
+      coordinates.height, coordinates.earth_rad = self.height[index], self.earth_rad[index]
+      return coordinates
+
+
+   # Helper methods -------------------------------------------------------------------------------
+
+   @staticmethod
+   def _earth_radius(sin_lat: numpy.ndarray, cos_lat: numpy.ndarray) -> numpy.ndarray:
+      a = EARTH_EQUATORIAL_RADIUS * EARTH_EQUATORIAL_RADIUS * cos_lat * cos_lat
+      b = EARTH_POLAR_RADIUS * EARTH_POLAR_RADIUS * sin_lat * sin_lat
+      return numpy.sqrt(((EARTH_EQUATORIAL_RADIUS * EARTH_EQUATORIAL_RADIUS * a) + (EARTH_POLAR_RADIUS * EARTH_POLAR_RADIUS * b)) / (a + b))
+
+   def _xyz2llh(self) -> GlobalCoordinateArray:
+
+      # Calculate intermediate variables
+      positive_z = numpy.abs(self.z)
+      W2 = ((self.x * self.x) + (self.y * self.y))
+      Z2 = self.z * self.z
+      W = numpy.sqrt(W2)
+      R2 = W2 + Z2
+      R = numpy.sqrt(R2)
+      S = positive_z / R
+      C = W / R
+      U = A2 / R
+      V = A3 - (A4 / R)
+      S2 = S * S
+      C2 = C * C
+
+      # Compute longitude
+      self.longitude = numpy.arctan2(self.y, self.x)
+
+      # Compute latitude differently depending on its nearness to the Earth's poles
+      is_low_latitude = C2 > 0.3
+      S = numpy.where(is_low_latitude, S * (1.0 + (C2 * (A1 + U + (S2 * V)) / R)), S)
+      C = numpy.where(is_low_latitude, C, C * (1.0 - (S2 * (A5 - U - (C2 * V)) / R)))
+      self.latitude = numpy.where(is_low_latitude, numpy.arcsin(numpy.minimum(S, 1.0)), numpy.arccos(numpy.minimum(C, 1.0)))
+      S2 = numpy.where(is_low_latitude, S * S, 1.0 - (C * C))
+      S = numpy.where(is_low_latitude, S, numpy.sqrt(S2))
+      C = numpy.where(is_low_latitude, numpy.sqrt(1.0 - S2), C)
+
+      # Compute height
+      G = 1.0 - (EARTH_ECCENTRICITY_2 * S2)
+      R1 = EARTH_EQUATORIAL_RADIUS / numpy.sqrt(G)
+      r_f = A6 * R1
+      U = W - (R1 * C)
+      V = positive_z - (r_f * S)
+      F = (C * U) + (S * V)
+      M = (C * V) - (S * U)
+      P = M / ((r_f / G) + F)
+      self.latitude += P
+      self.height = F + (0.5 * M * P)
+      numpy.negative(self.latitude, out=self.latitude, where=(self.z < 0.0))
+      self.earth_rad = self._earth_radius(numpy.sin(self.latitude), numpy.cos(self.latitude))
+      return self
+
+   def _llh2xyz(self) -> GlobalCoordinateArray:
+
+      sin_lat, cos_lat = numpy.sin(self.latitude), numpy.cos(self.latitude)
+      sin_lon, cos_lon = numpy.sin(self.longitude), numpy.cos(self.longitude)
+      N = EARTH_EQUATORIAL_RADIUS / numpy.sqrt(1.0 - (EARTH_ECCENTRICITY_2 * sin_lat * sin_lat))
+      common_param = (N + self.height) * cos_lat
+
+      self.x = common_param * cos_lon
+      self.y = common_param * sin_lon
+      self.z = ((N * (1.0 - EARTH_ECCENTRICITY_2)) + self.height) * sin_lat
+      self.earth_rad = self._earth_radius(sin_lat, cos_lat)
+      return self
+
+
+   # Setter methods -------------------------------------------------------------------------------
+
+   def set_xyz(self, x: numpy.ndarray, y: numpy.ndarray, z: numpy.ndarray) -> GlobalCoordinateArray:
+      self.x = numpy.array(x, dtype=float, ndmin=1)
+      self.y = numpy.array(y, dtype=float, ndmin=1)
+      self.z = numpy.array(z, dtype=float, ndmin=1)
+      return self._xyz2llh()
+
+   def set_llh(self, latitude_deg: numpy.ndarray, longitude_deg: numpy.ndarray, height_m: numpy.ndarray) -> GlobalCoordinateArray:
+      self.latitude = numpy.array(latitude_deg, dtype=float, ndmin=1) * math.pi / 180.0
+      self.longitude = numpy.array(longitude_deg, dtype=float, ndmin=1) * math.pi / 180.0
+      self.height = numpy.broadcast_to(numpy.asarray(height_m, dtype=float), self.latitude.shape).copy()
+      return self._llh2xyz()
+
+   def copy_from(self, other: GlobalCoordinateArray) -> GlobalCoordinateArray:
+      self.x = other.x.copy()
+      self.y = other.y.copy()
+      self.z = other.z.copy()
+      self.latitude = other.latitude.copy()
+      self.longitude = other.longitude.copy()
+      self.height = other.height.copy()
+      self.earth_rad = other.earth_rad.copy()
+      return self
+
+   @staticmethod
+   def from_llh(latitude_deg: numpy.ndarray, longitude_deg: numpy.ndarray, height_m: numpy.ndarray) -> GlobalCoordinateArray:
+      """Creates a coordinate array from latitudes and longitudes (in `degrees`) and heights
+      (in `m`)."""
+      return GlobalCoordinateArray().set_llh(latitude_deg, longitude_deg, height_m)
+
+   @staticmethod
+   def from_coordinates(coordinates: Iterable[GlobalCoordinate]) -> GlobalCoordinateArray:
+      """Creates a coordinate array from a sequence of individual `GlobalCoordinate` objects."""
+      coordinates = list(coordinates)
+      array = GlobalCoordinateArray()
+      for name in ('x', 'y', 'z', 'latitude', 'longitude', 'height', 'earth_rad'):
+         setattr(array, name, numpy.fromiter((getattr(coordinate, name) for coordinate in coordinates), dtype=float, count=len(coordinates)))
+      return array
+
+   @staticmethod
+   def from_xyz(x: numpy.ndarray, y: numpy.ndarray, z: numpy.ndarray) -> GlobalCoordinateArray:
+      """Creates a coordinate array from ECEF coordinates (in `m`)."""
+      return GlobalCoordinateArray().set_xyz(x, y, z)
+
+
+   # Getter methods -------------------------------------------------------------------------------
+
+   def get_llh(self) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+      return self.latitude * 180.0 / math.pi, self.longitude * 180.0 / math.pi, self.height
+
+   def get_xyz(self) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+      return self.x, self.y, self.z
+
+   def get_ecef(self) -> numpy.ndarray:
+      """Returns an (N x 3) array of the ECEF coordinates of all points (in `m`)."""
+      return numpy.column_stack((self.x, self.y, self.z))
+
+   def get_latitude(self) -> numpy.ndarray:
+      return self.latitude * 180.0 / math.pi
+
+   def get_longitude(self) -> numpy.ndarray:
+      return self.longitude * 180.0 / math.pi
+
+   def get_height(self) -> numpy.ndarray:
+      return self.height
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   def compute_enu(self, target: Union[GlobalCoordinate, GlobalCoordinateArray]) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+      """Method to find the east, north, and up components (in `m`) of the vector from each
+      coordinate to its target, expressed in the same rotated frame about each coordinate as
+      used by `GlobalCoordinate.compute_distance`."""
+
+      # Compute common calculations for reuse
+      ref_lat_rotation = self.latitude - (0.5 * math.pi)
+      ref_lon_rotation = self.longitude - math.pi
+      sin_ref_lat_rotation, cos_ref_lat_rotation = numpy.sin(ref_lat_rotation), numpy.cos(ref_lat_rotation)
+      sin_ref_lon_rotation, cos_ref_lon_rotation = numpy.sin(ref_lon_rotation), numpy.cos(ref_lon_rotation)
+
+      # ECEF distance vector
+      x_diff = target.x - self.x
+      y_diff = target.y - self.y
+      z_diff = target.z - self.z
+
+      # Translate distance vector into ENU coordinates
+      x = sin_ref_lon_rotation*x_diff - cos_ref_lon_rotation*y_diff
+      y = cos_ref_lat_rotation*cos_ref_lon_rotation*x_diff + cos_ref_lat_rotation*sin_ref_lon_rotation*y_diff - sin_ref_lat_rotation*z_diff
+      z = sin_ref_lat_rotation*cos_ref_lon_rotation*x_diff + sin_ref_lat_rotation*sin_ref_lon_rotation*y_diff + cos_ref_lat_rotation*z_diff
+      return x, y, z
+
+   def compute_distance(self, target: Union[GlobalCoordinate, GlobalCoordinateArray],
+                              mode: GeodesicMode = GeodesicMode.CHORD) -> numpy.ndarray:
+      """Method to find the distances between each coordinate and its target using Bowring
+      formulas, or using `compute_geodesic_distance()` for any `mode` other than
+      `GeodesicMode.CHORD`.
+
+      Since the ENU rotation used by `compute_enu()` is orthonormal, the length of each rotated
+      vector is computed directly from its ECEF components without evaluating the rotation."""
+      if mode != GeodesicMode.CHORD:
+         return self.compute_geodesic_distance(target)
+      x_diff = target.x - self.x
+      y_diff = target.y - self.y
+      z_diff = target.z - self.z
+      return numpy.sqrt((x_diff * x_diff) + (y_diff * y_diff) + (z_diff * z_diff))
+
+   def compute_geodesic_distance(self, target: Union[GlobalCoordinate, GlobalCoordinateArray]) -> numpy.ndarray:
+      """Method to find the distances (in `m`) between each coordinate and its target along the
+      geodesic on the surface of the reference ellipsoid using Vincenty's inverse formulas,
+      combined with the difference in height of the two coordinates.
+
+      The iteration over the longitude on the auxiliary sphere is evaluated for every pair at
+      once, with each subsequent iteration restricted to the pairs which have not yet converged.
+      Nearly antipodal pairs, for which Vincenty's iteration does not converge, fall back to the
+      great-circle distance on a sphere of the mean radius of the ellipsoid."""
+
+      # Compute the reduced latitudes and the longitude difference of each pair
+      latitudes, target_latitudes, longitude_diffs, heights, target_heights = \
+         numpy.broadcast_arrays(self.latitude, target.latitude, target.longitude - self.longitude, self.height, target.height)
+      longitude_diffs = numpy.remainder(longitude_diffs + math.pi, 2.0 * math.pi) - math.pi
+      sin_lat, cos_lat = numpy.sin(latitudes), numpy.cos(latitudes)
+      sin_target_lat, cos_target_lat = numpy.sin(target_latitudes), numpy.cos(target_latitudes)
+      scale = 1.0 / numpy.hypot(cos_lat, (1.0 - EARTH_FLATTENING) * sin_lat)
+      sin_u1, cos_u1 = (1.0 - EARTH_FLATTENING) * sin_lat * scale, cos_lat * scale
+      scale = 1.0 / numpy.hypot(cos_target_lat, (1.0 - EARTH_FLATTENING) * sin_target_lat)
+      sin_u2, cos_u2 = (1.0 - EARTH_FLATTENING) * sin_target_lat * scale, cos_target_lat * scale
+
+      # Iterate on the longitude difference on the auxiliary sphere until convergence
+      sigma, sin_sigma, cos_sigma, cos2_alpha, cos_2sigma_m = (numpy.zeros(len(latitudes)) for _ in range(5))
+      is_converged = numpy.zeros(len(latitudes), dtype=bool)
+      active, lambdas = numpy.arange(len(latitudes)), longitude_diffs.copy()
+      for _ in range(GEODESIC_MAX_ITERATIONS):
+         if len(active) == 0:
+            break
+         sin_lambda, cos_lambda = numpy.sin(lambdas), numpy.cos(lambdas)
+         su1, cu1, su2, cu2 = sin_u1[active], cos_u1[active], sin_u2[active], cos_u2[active]
+         sin_s = numpy.hypot(cu2 * sin_lambda, (cu1 * su2) - (su1 * cu2 * cos_lambda))
+         cos_s = (su1 * su2) + (cu1 * cu2 * cos_lambda)
+         s = numpy.arctan2(sin_s, cos_s)
+         sin_alpha = numpy.divide(cu1 * cu2 * sin_lambda, sin_s, out=numpy.zeros(len(active)), where=sin_s > 0.0)
+         c2a = 1.0 - (sin_alpha * sin_alpha)
+         c2sm = numpy.divide(2.0 * su1 * su2, c2a, out=numpy.zeros(len(active)), where=c2a > 0.0)
+         c2sm = numpy.where(c2a > 0.0, cos_s - c2sm, 0.0)
+         c = (EARTH_FLATTENING / 16.0) * c2a * (4.0 + (EARTH_FLATTENING * (4.0 - (3.0 * c2a))))
+         new_lambdas = longitude_diffs[active] + ((1.0 - c) * EARTH_FLATTENING * sin_alpha *
+                       (s + (c * sin_s * (c2sm + (c * cos_s * ((2.0 * c2sm * c2sm) - 1.0))))))
+         sigma[active], sin_sigma[active], cos_sigma[active], cos2_alpha[active], cos_2sigma_m[active] = s, sin_s, cos_s, c2a, c2sm
+         is_done = numpy.abs(new_lambdas - lambdas) <= GEODESIC_TOLERANCE
+         is_converged[active[is_done]] = True
+         is_diverging = numpy.abs(new_lambdas) > math.pi
+         active, lambdas = active[~(is_done | is_diverging)], new_lambdas[~(is_done | is_diverging)]
+
+      # Compute the length of each geodesic from its converged auxiliary sphere arc
+      u2 = cos2_alpha * EARTH_SECOND_ECCENTRICITY_2
+      a = 1.0 + ((u2 / 16384.0) * (4096.0 + (u2 * (-768.0 + (u2 * (320.0 - (175.0 * u2)))))))
+      b = (u2 / 1024.0) * (256.0 + (u2 * (-128.0 + (u2 * (74.0 - (47.0 * u2))))))
+      delta_sigma = b * sin_sigma * (cos_2sigma_m + ((b / 4.0) * ((cos_sigma * ((2.0 * cos_2sigma_m * cos_2sigma_m) - 1.0)) -
+                    ((b / 6.0) * cos_2sigma_m * ((4.0 * sin_sigma * sin_sigma) - 3.0) * ((4.0 * cos_2sigma_m * cos_2sigma_m) - 3.0)))))
+      distances = EARTH_SEMI_MINOR_AXIS * a * (sigma - delta_sigma)
+
+      # Fall back to great-circle distances for all pairs which did not converge
+      if not is_converged.all():
+         failed = ~is_converged
+         cos_angles = (sin_lat[failed] * sin_target_lat[failed]) + \
+                      (cos_lat[failed] * cos_target_lat[failed] * numpy.cos(longitude_diffs[failed]))
+         mean_radius = (2.0 * EARTH_EQUATORIAL_RADIUS + EARTH_SEMI_MINOR_AXIS) / 3.0
+         distances[failed] = mean_radius * numpy.arccos(numpy.clip(cos_angles, -1.0, 1.0))
+      height_diffs = target_heights - heights
+      return numpy.sqrt((distances * distances) + (height_diffs * height_diffs))
+
+   def compute_initial_bearing(self, target: Union[GlobalCoordinate, GlobalCoordinateArray]) -> numpy.ndarray:
+      """Method to determine the initial bearing from each coordinate toward its target."""
+
+      sin_target_lat, cos_target_lat = numpy.sin(target.latitude), numpy.cos(target.latitude)
+      sin_lat, cos_lat = numpy.sin(self.latitude), numpy.cos(self.latitude)
+      lon_diff = target.longitude - self.longitude
+      sin_lon_diff, cos_lon_diff = numpy.sin(lon_diff), numpy.cos(lon_diff)
+
+      y = sin_lon_diff * cos_target_lat
+      x = (cos_lat * sin_target_lat) - (sin_lat * cos_target_lat * cos_lon_diff)
+      return ((numpy.arctan2(y, x) * 180.0 / math.pi) + 360.0) % 360.0
+
+   def compute_final_bearing(self, target: Union[GlobalCoordinate, GlobalCoordinateArray]) -> numpy.ndarray:
+      """Method to determine the final bearing from each coordinate toward its target."""
+      if isinstance(target, GlobalCoordinate):
+         target = GlobalCoordinateArray.from_coordinates([target])
+      return (target.compute_initial_bearing(self) + 180.0) % 180.0
+
+   def compute_segment_enu(self) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+      """Returns the east, north, and up components (in `m`) of each segment between consecutive
+      coordinates in the direction of travel, expressed about the segment end point exactly as
+      when accumulating `GlobalCoordinate.compute_distance` from each point to its predecessor."""
+      east, north, up = self[1:].compute_enu(self[:-1])
+      return -east, -north, -up
+
+   def compute_segment_bearings(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+      """Returns the initial bearing of each segment between consecutive coordinates, as in
+      `compute_initial_bearing()`, along with the bearing of travel at the end of each segment
+      (both in `degrees` within [0, 360)). Unlike `compute_final_bearing()`, the final bearings
+      retain the direction of travel, and the trigonometric terms of every coordinate are shared
+      between the two segments it bounds."""
+      sin_lat, cos_lat = numpy.sin(self.latitude), numpy.cos(self.latitude)
+      lon_diff = self.longitude[1:] - self.longitude[:-1]
+      sin_lon_diff, cos_lon_diff = numpy.sin(lon_diff), numpy.cos(lon_diff)
+      sin_start_lat, cos_start_lat, sin_end_lat, cos_end_lat = sin_lat[:-1], cos_lat[:-1], sin_lat[1:], cos_lat[1:]
+      initial_y = sin_lon_diff * cos_end_lat
+      initial_x = (cos_start_lat * sin_end_lat) - (sin_start_lat * cos_end_lat * cos_lon_diff)
+      final_y = sin_lon_diff * cos_start_lat
+      final_x = (sin_end_lat * cos_start_lat * cos_lon_diff) - (cos_end_lat * sin_start_lat)
+      return numpy.remainder(numpy.degrees(numpy.arctan2(initial_y, initial_x)), 360.0), \
+             numpy.remainder(numpy.degrees(numpy.arctan2(final_y, final_x)), 360.0)
+
+   def compute_segment_distances(self, mode: GeodesicMode = GeodesicMode.CHORD) -> numpy.ndarray:
+      """Returns the distance (in `m`) of each segment between consecutive coordinates, measured
+      using the specified `mode`."""
+      return self[1:].compute_distance(self[:-1], mode)
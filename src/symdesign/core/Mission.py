@@ -15,13 +15,172 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from __future__ import annotations
-from .GlobalCoordinate import GlobalCoordinate
+from .CurrentEnsemble import CurrentEnsemble, CurrentEnsembleStatistics
+from .GlobalCoordinate import GeodesicMode, GlobalCoordinate, GlobalCoordinateArray
+from .EnvironmentSampler import EnvironmentSampler
+from .OceanData import OceanEnvironment
+from .Propagation import ConstraintPropagator
+from .RouteCurrents import RouteCurrentProfile
+from .RouteTurns import RouteTurnProfile
+from .SummaryCache import StageSummaryCache
+from .SpatialIndex import SpatialIndex
+from .Track import Track
+from .Waypoints import WaypointReader
 from ..models.Oceanic import OceanicModels
-from typing import Callable, List, Tuple, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
 from enum import Flag, auto
 from functools import reduce
-from sympy import Expr, Symbol
-import math, numpy, pickle
+from operator import attrgetter
+from sympy import Expr, Symbol, srepr, sympify
+import math, numpy, struct
+
+
+# Number of track samples to evaluate per vectorized batch
+_TRACK_SAMPLE_BATCH_SIZE = 1 << 20
+
+# Number of track samples per batch when sampling full water-column profiles
+_PROFILE_SAMPLE_BATCH_SIZE = 1 << 14
+
+# Version of the track summary layout stored in any on-disk summary cache
+_TRACK_SUMMARY_VERSION = 1
+
+# Identifying prefixes and layout version of serialized missions and mission stages
+_MISSION_SERIALIZATION_MAGIC = b'SDMI'
+_STAGE_SERIALIZATION_MAGIC = b'SDMS'
+_SERIALIZATION_VERSION = 1
+_SERIALIZATION_HEADER = struct.Struct('<4sH')
+
+# Type tags of the optional scalar values within serialized records
+_NONE_VALUE, _FLOAT_VALUE, _SYMBOL_VALUE, _EXPRESSION_VALUE = range(4)
+
+# Serialized scalar attributes of missions and mission stages, in record order
+_MISSION_VALUE_FIELDS = ('minimum_duration', 'maximum_duration', 'minimum_distance', 'maximum_average_horizontal_speed')
+_STAGE_VALUE_FIELDS = ('maximum_pitch_angle', 'maximum_roll_angle', 'maximum_net_buoyancy',
+                       'minimum_duration', 'target_duration', 'maximum_duration',
+                       'minimum_distance', 'target_distance', 'maximum_distance',
+                       'minimum_average_horizontal_speed', 'target_average_horizontal_speed',
+                       'maximum_average_horizontal_speed', 'maximum_depth', 'average_latitude',
+                       'minimum_salinity', 'maximum_salinity', 'minimum_temperature', 'maximum_temperature',
+                       'minimum_density', 'maximum_density', 'expected_transit_slope', 'maximum_ocean_current_speed',
+                       'route_simplification_error', 'maximum_heading_change', 'minimum_turn_radius', 'maximum_yaw_rate')
+_MISSION_VALUE_GETTER = attrgetter(*_MISSION_VALUE_FIELDS)
+_STAGE_VALUE_GETTER = attrgetter(*_STAGE_VALUE_FIELDS)
+_MISSION_RECORD = struct.Struct('<{0}B{0}dI'.format(len(_MISSION_VALUE_FIELDS)))
+_HAS_WAYPOINTS, _HAS_CURRENT_PROFILE, _HAS_TURN_PROFILE = 0x01, 0x02, 0x04
+
+
+def _pack_value_tag(value, strings: List[str]) -> int:
+   """Returns the type tag of a single optional scalar or symbolic value, appending the name of a
+   symbol or the representation of any other expression to `strings`."""
+   if value is None:
+      return _NONE_VALUE
+   elif isinstance(value, Symbol):
+      strings.append(value.name)
+      return _SYMBOL_VALUE
+   elif isinstance(value, Expr) and not value.is_Number:
+      strings.append(srepr(value))
+      return _EXPRESSION_VALUE
+   return _FLOAT_VALUE
+
+
+def _pack_values(values: Tuple, strings: List[str]) -> Tuple[List[int], List[float]]:
+   """Returns the type tags and the numeric values of a sequence of optional scalar or symbolic
+   values, appending the names of any symbols or the representations of any other expressions
+   to `strings`."""
+   tags = [_FLOAT_VALUE if value.__class__ is float else _pack_value_tag(value, strings) for value in values]
+   return tags, [value if tag == _FLOAT_VALUE else 0.0 for value, tag in zip(values, tags)]
+
+
+def _unpack_value(tag: int, number: float, strings: Iterator[str]):
+   """Reconstructs a single optional scalar or symbolic value packed by `_pack_values`."""
+   if tag == _FLOAT_VALUE:
+      return number
+   elif tag == _NONE_VALUE:
+      return None
+   elif tag == _SYMBOL_VALUE:
+      return Symbol(next(strings))
+   return sympify(next(strings))
+
+
+def _pack_strings(strings: List[str]) -> bytes:
+   encoded_strings = [string.encode('utf-8') for string in strings]
+   return struct.pack('<I{}I'.format(len(encoded_strings)), len(encoded_strings),
+                      *(len(string) for string in encoded_strings)) + b''.join(encoded_strings)
+
+
+def _unpack_strings(data: bytes, offset: int) -> Tuple[List[str], int]:
+   num_strings, = struct.unpack_from('<I', data, offset)
+   lengths = struct.unpack_from('<{}I'.format(num_strings), data, offset + 4)
+   offset += 4 * (num_strings + 1)
+   strings = []
+   for length in lengths:
+      strings.append(str(data[offset:offset+length], 'utf-8'))
+      offset += length
+   return strings, offset
+
+
+def _check_serialization_header(data: bytes, magic: bytes, description: str) -> int:
+   """Verifies the header of serialized data, returning the offset of the data following it."""
+   if len(data) < _SERIALIZATION_HEADER.size:
+      raise RuntimeError('Data does not contain a serialized {}'.format(description))
+   data_magic, version = _SERIALIZATION_HEADER.unpack_from(data, 0)
+   if data_magic != magic:
+      raise RuntimeError('Data does not contain a serialized {}'.format(description))
+   if version != _SERIALIZATION_VERSION:
+      raise RuntimeError('Serialized {} has unsupported layout version {}'.format(description, version))
+   return _SERIALIZATION_HEADER.size
+
+
+def _track_samples(latitudes_deg: numpy.ndarray,
+                   longitudes_deg: numpy.ndarray,
+                   segment_distances: numpy.ndarray,
+                   sample_spacing: Optional[float]) -> Iterator[Tuple[numpy.ndarray, numpy.ndarray]]:
+   """Yields batches of (latitudes, longitudes) at which to sample the environment along a track.
+
+   Without a `sample_spacing`, the samples are simply the waypoints themselves. Otherwise, each
+   segment is subdivided into equal steps no longer than `sample_spacing` (in `m`) which are
+   interpolated along the great circle joining the segment end points. Waypoints are always
+   included in the samples using their exact original coordinates."""
+
+   # Yield the waypoints themselves if no resampling is requested
+   if sample_spacing is None or len(latitudes_deg) < 2:
+      for start in range(0, len(latitudes_deg), _TRACK_SAMPLE_BATCH_SIZE):
+         yield latitudes_deg[start:start+_TRACK_SAMPLE_BATCH_SIZE], longitudes_deg[start:start+_TRACK_SAMPLE_BATCH_SIZE]
+      return
+   if sample_spacing <= 0.0:
+      raise RuntimeError('Along-track sample spacing must be greater than 0 m')
+
+   # Determine the number of samples per segment and the angle subtended by each segment
+   step_counts = numpy.maximum(numpy.ceil(segment_distances / sample_spacing), 1.0).astype(numpy.int64)
+   segment_starts = numpy.concatenate(([0], numpy.cumsum(step_counts)))
+   latitudes, longitudes = latitudes_deg * math.pi / 180.0, longitudes_deg * math.pi / 180.0
+   unit_vectors = numpy.column_stack((numpy.cos(latitudes) * numpy.cos(longitudes),
+                                      numpy.cos(latitudes) * numpy.sin(longitudes),
+                                      numpy.sin(latitudes)))
+   start_vectors, end_vectors = unit_vectors[:-1], unit_vectors[1:]
+   segment_angles = numpy.arctan2(numpy.linalg.norm(numpy.cross(start_vectors, end_vectors), axis=1),
+                                  numpy.einsum('ij,ij->i', start_vectors, end_vectors))
+   sin_segment_angles = numpy.sin(segment_angles)
+
+   # Interpolate each batch of samples along their respective great circles
+   num_samples = int(segment_starts[-1]) + 1
+   for start in range(0, num_samples, _TRACK_SAMPLE_BATCH_SIZE):
+      sample_indices = numpy.arange(start, min(start + _TRACK_SAMPLE_BATCH_SIZE, num_samples))
+      segments = numpy.minimum(numpy.searchsorted(segment_starts, sample_indices, side='right') - 1, len(step_counts) - 1)
+      fractions = (sample_indices - segment_starts[segments]) / step_counts[segments]
+      angles, sin_angles = segment_angles[segments], sin_segment_angles[segments]
+      is_short = sin_angles < 1e-12
+      safe_sin_angles = numpy.where(is_short, 1.0, sin_angles)
+      start_weights = numpy.where(is_short, 1.0 - fractions, numpy.sin((1.0 - fractions) * angles) / safe_sin_angles)
+      end_weights = numpy.where(is_short, fractions, numpy.sin(fractions * angles) / safe_sin_angles)
+      vectors = (start_weights[:, numpy.newaxis] * start_vectors[segments]) + (end_weights[:, numpy.newaxis] * end_vectors[segments])
+      sample_latitudes = numpy.arctan2(vectors[:, 2], numpy.hypot(vectors[:, 0], vectors[:, 1])) * 180.0 / math.pi
+      sample_longitudes = numpy.arctan2(vectors[:, 1], vectors[:, 0]) * 180.0 / math.pi
+      at_start, at_end = fractions == 0.0, fractions == 1.0
+      sample_latitudes[at_start], sample_longitudes[at_start] = latitudes_deg[segments[at_start]], longitudes_deg[segments[at_start]]
+      sample_latitudes[at_end], sample_longitudes[at_end] = latitudes_deg[segments[at_end] + 1], longitudes_deg[segments[at_end] + 1]
+      yield sample_latitudes, sample_longitudes
 
 
 class MissionTarget(Flag):
@@ -116,6 +275,30 @@ class MissionStage(object):
    """Maximum opposing speed of the ocean currents required to be achievable during the
    mission stage (in `m/s`)."""
 
+   waypoints: Optional[WaypointReader]
+   """Source of the waypoints from which the mission stage was loaded, if any."""
+
+   current_profile: Optional[RouteCurrentProfile]
+   """Ocean currents projected onto each segment of the mission stage route, if computed."""
+
+   route_simplification_error: Optional[float]
+   """Reduction in the length of the mission stage route caused by simplifying its waypoints
+   (in `m`), if the waypoints were simplified while loading."""
+
+   turn_profile: Optional[RouteTurnProfile]
+   """Heading changes and turn radii at each waypoint of the mission stage route, if computed."""
+
+   maximum_heading_change: Optional[float]
+   """Largest change in heading at any waypoint of the mission stage route (in `degrees`), if
+   computed."""
+
+   minimum_turn_radius: Optional[float]
+   """Radius of the tightest turn along the mission stage route (in `m`), if computed."""
+
+   maximum_yaw_rate: Optional[float]
+   """Yaw rate required to follow the tightest turn along the mission stage route
+   (in `degrees/s`), if computed."""
+
 
    # Constructor ----------------------------------------------------------------------------------
 
@@ -149,138 +332,506 @@ class MissionStage(object):
       self.maximum_density = None
       self.expected_transit_slope = 35.0
       self.maximum_ocean_current_speed = None
-
-
-   # Public methods -------------------------------------------------------------------------------
-
-   def load_waypoints_and_ocean_data(self, waypoints_path: str,
-                                           bathymetry_model: Union[str, Callable, None],
-                                           ocean_currents_model: Union[str, Callable, None],
-                                           salinity_model: Union[str, Callable, None],
-                                           temperature_model: Union[str, Callable, None]) -> None:
-      """
-      TODO: Documentation, indicate which parameters this will overwrite/load
-
-      Bathymetry model should be npz: data[latIdx][lonIdx] = depth, or callable(lat, lon) -> -depth
-      Salinity model should be npz: data[latIdx][lonIdx][depth] = salinity, or callable(lat, lon, depth) -> salinity
-      Temperature model should be npz: data[latIdx][lonIdx][depth] = temperature, or callable(lat, lon, depth) -> temperature
-      """
-
-      # Load the bathymetry model
+      self.waypoints = None
+      self.current_profile = None
+      self.route_simplification_error = None
+      self.turn_profile = None
+      self.maximum_heading_change = None
+      self.minimum_turn_radius = None
+      self.maximum_yaw_rate = None
+
+
+   # Helper methods -------------------------------------------------------------------------------
+
+   @staticmethod
+   def _preload_models(bathymetry_model: Union[str, Callable, None],
+                       ocean_currents_model: Union[str, Callable, None],
+                       field_models: List[Union[str, Callable, None]]) -> None:
+      """Concurrently decompresses every array required from all file-based environmental models,
+      across all of their archive members at once."""
+      required_arrays = {}
       if isinstance(bathymetry_model, str):
-         bathymetry_data = numpy.load(bathymetry_model)
-         bath_lats = numpy.array(bathymetry_data['latIndex'])
-         bath_lons = numpy.array(bathymetry_data['lonIndex'])
-         bath_depths = numpy.array(bathymetry_data['zMat'])
-         def get_bathymetry(latitude: float, longitude: float) -> float:
-            lat_index = numpy.abs(bath_lats - latitude).argmin()
-            lon_index = numpy.abs(bath_lons - longitude).argmin()
-            return -bath_depths[lat_index][lon_index]
+         required_arrays.setdefault(bathymetry_model, []).extend(['latIndex', 'lonIndex', 'zMat'])
+      if isinstance(ocean_currents_model, str):
+         required_arrays.setdefault(ocean_currents_model, []).extend(['latIndex', 'lonIndex', 'depthIndex'])
+      for model in field_models:
+         if isinstance(model, str):
+            required_arrays.setdefault(model, []).extend(['latIndex', 'lonIndex', 'depthIndex', 'data'])
+      OceanEnvironment.preload({ path: list(dict.fromkeys(names)) for path, names in required_arrays.items() })
+
+   @staticmethod
+   def _create_waypoint_reader(waypoints_path: Union[str, Iterable, WaypointReader],
+                               simplification_tolerance: Optional[float],
+                               geodesic_mode: GeodesicMode) -> WaypointReader:
+      """Returns a `WaypointReader` for the specified waypoint source, configured to simplify the
+      route to within the specified tolerance (in `m`), as measured using `geodesic_mode`, if the
+      tolerance is not `None`."""
+      if not isinstance(waypoints_path, WaypointReader):
+         return WaypointReader(waypoints_path, simplification_tolerance=simplification_tolerance, geodesic_mode=geodesic_mode)
+      elif simplification_tolerance is None or (waypoints_path.simplification_tolerance == simplification_tolerance and
+                                                waypoints_path.geodesic_mode == geodesic_mode):
+         return waypoints_path
+      return WaypointReader(waypoints_path.source, waypoints_path.chunk_size,
+                            waypoints_path.waypoint_format, simplification_tolerance, geodesic_mode)
+
+   @staticmethod
+   def _create_bathymetry_lookup(bathymetry_model: Union[str, Callable, None]) -> Callable:
+      """Returns a function(latitude, longitude) -> depth for the specified bathymetry model which
+      accepts either scalar or array-based coordinates."""
+      if isinstance(bathymetry_model, str):
+         bathymetry_data = OceanEnvironment.load(bathymetry_model)
+         bath_grid = bathymetry_data.grid(with_depth=False)
+         bath_depths = bathymetry_data['zMat']
+         def get_bathymetry(latitude, longitude):
+            lat_index, lon_index = bath_grid.nearest(latitude, longitude)
+            return -bath_depths[lat_index, lon_index]
       elif callable(bathymetry_model):
-         def get_bathymetry(latitude: float, longitude: float) -> float:
-            return -bathymetry_model(latitude, longitude)
+         def get_bathymetry(latitude, longitude):
+            return -EnvironmentSampler.evaluate_model(bathymetry_model, latitude, longitude)
       else:
-         def get_bathymetry(_latitude: float, _longitude: float) -> float:
-            return 0.0
-
-      # Load the salinity model
-      if isinstance(salinity_model, str):
-         salinity_data = numpy.load(salinity_model)
-         sal_lats = numpy.array(salinity_data['latIndex'])
-         sal_lons = numpy.array(salinity_data['lonIndex'])
-         sal_depths = numpy.array(salinity_data['depthIndex'])
-         salinities = numpy.array(salinity_data['data'])
-         def get_salinity(latitude: float, longitude: float, depth: float) -> float:
-            lat_index = numpy.abs(sal_lats - latitude).argmin()
-            lon_index = numpy.abs(sal_lons - longitude).argmin()
-            depth_index = numpy.abs(sal_depths - depth).argmin()
-            return salinities[lat_index][lon_index][depth_index]
-      elif callable(salinity_model):
-         def get_salinity(latitude: float, longitude: float, depth: float) -> float:
-            return salinity_model(latitude, longitude, depth)
+         def get_bathymetry(latitude, longitude):
+            return numpy.full(numpy.broadcast(latitude, longitude).shape, 0.0)[()]
+      return get_bathymetry
+
+   @staticmethod
+   def _summarize_track(waypoint_chunks: Iterable[numpy.ndarray],
+                        get_bathymetry: Callable,
+                        sampler: EnvironmentSampler,
+                        maximum_depth: float,
+                        sample_spacing: Optional[float],
+                        field_reductions: List[Tuple[str, numpy.ufunc]],
+                        water_column: bool = False,
+                        geodesic_mode: GeodesicMode = GeodesicMode.CHORD) -> Optional[Tuple[float, float, float, float, List[float]]]:
+      """Computes the transit distance, latitude extents, and maximum depth of an entire waypoint
+      track, along with the reduction of each specified sampler field over all track samples, or
+      returns `None` if the track contains no waypoints.
+
+      Each field reduction is specified as a tuple of (field_name, reduction), where the named
+      field is reduced using `numpy.fmin` or `numpy.fmax`. Fields without a fixed depth are
+      sampled at the local seafloor depth. All aggregates are folded over each successive
+      chunk of waypoints and over fixed-size batches of samples within each chunk, such that
+      memory usage is independent of the length of the track. The sampling depths reproduce the
+      iterative loader behavior, in which the first sample is taken at the running maximum depth
+      and all others at their local seafloor depth.
+
+      If `water_column` is True, fields without a fixed depth are instead sampled over their
+      entire water-column profile down to the sampling depth (see
+      `EnvironmentSampler.sample_profiles()`), in smaller batches to bound the size of each
+      profile array."""
+      transit_distance, min_latitude, max_latitude = 0.0, math.inf, -math.inf
+      field_values = [math.nan] * len(field_reductions)
+      previous_waypoint = None
+      for waypoints in waypoint_chunks:
+
+         # Prepend the final waypoint of the previous chunk to connect the two chunks
+         if len(waypoints) == 0:
+            continue
+         if previous_waypoint is not None:
+            waypoints = numpy.concatenate((previous_waypoint, waypoints))
+         latitudes, longitudes, heights = waypoints[:, 0], waypoints[:, 1], waypoints[:, 2]
+         segment_distances = GlobalCoordinateArray.from_llh(latitudes, longitudes, heights).compute_segment_distances(geodesic_mode)
+         transit_distance += numpy.sum(segment_distances)
+
+         # Fold all environmental samples within the current chunk into the running aggregates
+         for batch_index, (sample_latitudes, sample_longitudes) in \
+               enumerate(_track_samples(latitudes, longitudes, segment_distances, sample_spacing)):
+            if previous_waypoint is not None and batch_index == 0:
+               sample_latitudes, sample_longitudes = sample_latitudes[1:], sample_longitudes[1:]
+               if len(sample_latitudes) == 0:
+                  continue
+            latitudes_rad = sample_latitudes * math.pi / 180.0
+            min_latitude = min(min_latitude, latitudes_rad.min())
+            max_latitude = max(max_latitude, latitudes_rad.max())
+            seafloor_depths = numpy.asarray(get_bathymetry(sample_latitudes, sample_longitudes), dtype=float)
+            sampling_depths = seafloor_depths
+            if previous_waypoint is None and batch_index == 0:
+               sampling_depths = seafloor_depths.copy()
+               sampling_depths[0] = max(maximum_depth, seafloor_depths[0])
+            maximum_depth = max(maximum_depth, numpy.fmax.reduce(seafloor_depths))
+            if water_column:
+               sample_batches = (sampler.sample_profiles(sample_latitudes[start:start+_PROFILE_SAMPLE_BATCH_SIZE],
+                                                         sample_longitudes[start:start+_PROFILE_SAMPLE_BATCH_SIZE],
+                                                         sampling_depths[start:start+_PROFILE_SAMPLE_BATCH_SIZE])
+                                 for start in range(0, len(sample_latitudes), _PROFILE_SAMPLE_BATCH_SIZE))
+            else:
+               sample_batches = (sampler.sample(sample_latitudes, sample_longitudes, sampling_depths),)
+            for samples in sample_batches:
+               for i, (field_name, reduction) in enumerate(field_reductions):
+                  values = numpy.asarray(samples[field_name], dtype=float)
+                  field_values[i] = reduction(field_values[i], reduction.reduce(values.reshape(-1)))
+         previous_waypoint = waypoints[-1:]
+
+      # Return None if no waypoints were processed
+      if previous_waypoint is None:
+         return None
+      return float(transit_distance), float(min_latitude), float(max_latitude), \
+             float(maximum_depth), [float(value) for value in field_values]
+
+
+   def _speed_is_fixed(self) -> bool:
+      """Returns whether the average horizontal speed bounds are fully determined by the stage
+      targets, such that they cannot be further tightened by mission-level constraints."""
+      return MissionTarget.HORIZONTAL_SPEED in self.targets or \
+             (self.target_duration is not None and self.target_distance is not None)
+
+   def _add_propagation_rules(self, propagator: ConstraintPropagator) -> None:
+      """Registers all rules relating the distance, duration, and speed bounds of the current
+      stage with the specified constraint propagator."""
+      targets = self.targets
+      if MissionTarget.EXACT_DISTANCE in targets:
+         def exact_distance() -> None:
+            propagator.set(self, 'minimum_distance', self.target_distance)
+            propagator.set(self, 'maximum_distance', self.target_distance)
+         propagator.add_rule([(self, 'target_distance')], exact_distance)
       else:
-         def get_salinity(_latitude: float, _longitude: float, _depth: float) -> float:
-            return -1.0
-
-      # Load the temperature model
-      if isinstance(temperature_model, str):
-         temperature_data = numpy.load(temperature_model)
-         temp_lats = numpy.array(temperature_data['latIndex'])
-         temp_lons = numpy.array(temperature_data['lonIndex'])
-         temp_depths = numpy.array(temperature_data['depthIndex'])
-         temperatures = numpy.array(temperature_data['data'])
-         def get_temperature(latitude: float, longitude: float, depth: float) -> float:
-            lat_index = numpy.abs(temp_lats - latitude).argmin()
-            lon_index = numpy.abs(temp_lons - longitude).argmin()
-            depth_index = numpy.abs(temp_depths - depth).argmin()
-            return temperatures[lat_index][lon_index][depth_index]
-      elif callable(temperature_model):
-         def get_temperature(latitude: float, longitude: float, depth: float) -> float:
-            return temperature_model(latitude, longitude, depth)
+         if MissionTarget.MINIMUM_DISTANCE in targets:
+            def minimum_distance() -> None:
+               duration = self.target_duration if self.target_duration is not None else self.minimum_duration
+               speed = self.target_average_horizontal_speed if self.target_average_horizontal_speed is not None else self.minimum_average_horizontal_speed
+               if self.minimum_distance is None and duration is not None and speed is not None:
+                  propagator.set(self, 'minimum_distance', 0.001 * duration * speed)
+            propagator.add_rule([(self, 'minimum_distance'), (self, 'target_duration'), (self, 'minimum_duration'),
+                                 (self, 'target_average_horizontal_speed'), (self, 'minimum_average_horizontal_speed')],
+                                minimum_distance)
+         if MissionTarget.MAXIMUM_DISTANCE in targets:
+            def maximum_distance() -> None:
+               duration = self.target_duration if self.target_duration is not None else self.maximum_duration
+               speed = self.target_average_horizontal_speed if self.target_average_horizontal_speed is not None else self.maximum_average_horizontal_speed
+               if self.maximum_distance is None and duration is not None and speed is not None:
+                  propagator.set(self, 'maximum_distance', 0.001 * duration * speed)
+            propagator.add_rule([(self, 'maximum_distance'), (self, 'target_duration'), (self, 'maximum_duration'),
+                                 (self, 'target_average_horizontal_speed'), (self, 'maximum_average_horizontal_speed')],
+                                maximum_distance)
+      if MissionTarget.EXACT_DURATION in targets:
+         def exact_duration() -> None:
+            propagator.set(self, 'minimum_duration', self.target_duration)
+            propagator.set(self, 'maximum_duration', self.target_duration)
+         propagator.add_rule([(self, 'target_duration')], exact_duration)
       else:
-         def get_temperature(_latitude: float, _longitude: float, _depth: float) -> float:
-            return -100.0
-
-      # Load the ocean currents model
-      if isinstance(ocean_currents_model, str):
-         ocean_currents_data = numpy.load(ocean_currents_model)
-         curr_lats = numpy.array(ocean_currents_data['latIndex'])
-         curr_lons = numpy.array(ocean_currents_data['lonIndex'])
-         curr_depths = numpy.array(ocean_currents_data['depthIndex'])
-         u_mean_data = numpy.array(ocean_currents_data['uMeanData'])
-         u_std_data = numpy.array(ocean_currents_data['uStdData'])
-         v_mean_data = numpy.array(ocean_currents_data['vMeanData'])
-         v_std_data = numpy.array(ocean_currents_data['vStdData'])
-         def get_ocean_current(latitude: float, longitude: float, depth: float) -> Tuple[float, float]:
-            lat_index = numpy.abs(curr_lats - latitude).argmin()
-            lon_index = numpy.abs(curr_lons - longitude).argmin()
-            depth_index = numpy.abs(curr_depths - depth).argmin()
-            return math.sqrt(
-                     (numpy.abs(u_mean_data[depth_index, lat_index, lon_index]) + (2.0 * u_std_data[depth_index, lat_index, lon_index]))**2 +
-                     (numpy.abs(v_mean_data[depth_index, lat_index, lon_index]) + (2.0 * v_std_data[depth_index, lat_index, lon_index]))**2)
-      elif callable(ocean_currents_model):
-         def get_ocean_current(latitude: float, longitude: float, depth: float) -> Tuple[float, float]:
-            return ocean_currents_model(latitude, longitude, depth)
+         if MissionTarget.MINIMUM_DURATION in targets:
+            def minimum_duration() -> None:
+               distance = self.target_distance if self.target_distance is not None else self.minimum_distance
+               speed = self.target_average_horizontal_speed if self.target_average_horizontal_speed is not None else self.maximum_average_horizontal_speed
+               if self.minimum_duration is None and distance is not None and speed is not None:
+                  propagator.set(self, 'minimum_duration', 1000.0 * distance / speed)
+            propagator.add_rule([(self, 'minimum_duration'), (self, 'target_distance'), (self, 'minimum_distance'),
+                                 (self, 'target_average_horizontal_speed'), (self, 'maximum_average_horizontal_speed')],
+                                minimum_duration)
+         elif MissionTarget.MAXIMUM_DURATION in targets:
+            def maximum_duration() -> None:
+               distance = self.target_distance if self.target_distance is not None else self.maximum_distance
+               speed = self.target_average_horizontal_speed if self.target_average_horizontal_speed is not None else self.minimum_average_horizontal_speed
+               if self.maximum_duration is None and distance is not None and speed is not None:
+                  propagator.set(self, 'maximum_duration', 1000.0 * distance / speed)
+            propagator.add_rule([(self, 'maximum_duration'), (self, 'target_distance'), (self, 'maximum_distance'),
+                                 (self, 'target_average_horizontal_speed'), (self, 'minimum_average_horizontal_speed')],
+                                maximum_duration)
+      if MissionTarget.HORIZONTAL_SPEED in targets:
+         def exact_speed() -> None:
+            propagator.set(self, 'minimum_average_horizontal_speed', self.target_average_horizontal_speed)
+            propagator.set(self, 'maximum_average_horizontal_speed', self.target_average_horizontal_speed)
+         propagator.add_rule([(self, 'target_average_horizontal_speed'), (self, 'minimum_average_horizontal_speed'),
+                              (self, 'maximum_average_horizontal_speed')], exact_speed)
       else:
-         def get_ocean_current(_latitude: float, _longitude: float, _depth: float) -> Tuple[float, float]:
-            return 0.0
+         def speed_bounds() -> None:
+            if self.target_duration is not None and self.target_distance is not None:
+               speed = 1000.0 * self.target_distance / self.target_duration
+               propagator.set(self, 'target_average_horizontal_speed', speed)
+               propagator.set(self, 'minimum_average_horizontal_speed', speed)
+               propagator.set(self, 'maximum_average_horizontal_speed', speed)
+            min_distance = self.target_distance if self.target_distance is not None else self.minimum_distance
+            min_duration = self.target_duration if self.target_duration is not None else self.minimum_duration
+            max_distance = self.target_distance if self.target_distance is not None else self.maximum_distance
+            max_duration = self.target_duration if self.target_duration is not None else self.maximum_duration
+            if min_distance is not None and max_duration is not None:
+               propagator.tighten_lower(self, 'minimum_average_horizontal_speed', 1000.0 * min_distance / max_duration)
+            if max_distance is not None and min_duration is not None:
+               propagator.tighten_upper(self, 'maximum_average_horizontal_speed', 1000.0 * max_distance / min_duration)
+         propagator.add_rule([(self, name) for name in ('target_distance', 'minimum_distance', 'maximum_distance',
+                                                        'target_duration', 'minimum_duration', 'maximum_duration',
+                                                        'target_average_horizontal_speed',
+                                                        'minimum_average_horizontal_speed',
+                                                        'maximum_average_horizontal_speed')], speed_bounds)
+
+   def _verify_targets(self) -> None:
+      """Ensures that every bound required by the stage targets was specified or calculated."""
+      if MissionTarget.EXACT_DISTANCE not in self.targets:
+         if MissionTarget.MINIMUM_DISTANCE in self.targets and self.minimum_distance is None:
+            raise RuntimeError('For Mission Stage "{}" with MINIMUM_DISTANCE target, minimum_distance must be specified or calculable.'.format(self.name))
+         if MissionTarget.MAXIMUM_DISTANCE in self.targets and self.maximum_distance is None:
+            raise RuntimeError('For Mission Stage "{}" with MAXIMUM_DISTANCE target, maximum_distance must be specified or calculable.'.format(self.name))
+      if MissionTarget.EXACT_DURATION not in self.targets:
+         if MissionTarget.MINIMUM_DURATION in self.targets:
+            if self.minimum_duration is None:
+               raise RuntimeError('For Mission Stage "{}" with MINIMUM_DURATION target, minimum_duration must be specified or calculable.'.format(self.name))
+         elif MissionTarget.MAXIMUM_DURATION in self.targets and self.maximum_duration is None:
+            raise RuntimeError('For Mission Stage "{}" with MAXIMUM_DURATION target, maximum_duration must be specified or calculable.'.format(self.name))
+
+   def _load_waypoints_and_fields(self, loader_name: str,
+                                        waypoints_path: Union[str, Iterable, WaypointReader],
+                                        bathymetry_model: Union[str, Callable, None],
+                                        ocean_currents_model: Union[str, Callable, None],
+                                        scalar_fields: List[Tuple[str, Union[str, Callable, None], float, bool]],
+                                        batched: bool,
+                                        ocean_current_sigma: float,
+                                        sample_spacing: Optional[float],
+                                        ocean_current_time_window: Optional[Tuple[float, float]],
+                                        water_column_profiles: bool,
+                                        summary_cache_directory: Optional[str],
+                                        route_simplification_tolerance: Optional[float],
+                                        geodesic_mode: GeodesicMode) -> List[Tuple[float, float]]:
+      """Loads the waypoints of the mission stage and samples the bathymetry, ocean currents, and
+      each specified scalar field along them, updating the stage distance, latitude, depth, and
+      maximum ocean current speed, and returning the (minimum, maximum) extremes of each scalar
+      field. The returned extremes are infinite if the stage has no waypoints.
+
+      Each scalar field is specified as a tuple of (field_name, model, missing_value,
+      minimum_at_surface), where `missing_value` is returned by the sampler wherever the model
+      has no data, and `minimum_at_surface` indicates whether the minimum of the field is taken
+      at the surface and its maximum at the seafloor, or vice versa.
+
+      Waypoints may be specified as a file path or iterable source supported by `WaypointReader`,
+      or as a preconfigured `WaypointReader` instance.
+
+      Callable models are called once per waypoint unless marked with `vectorized_model`, in which
+      case they are called once per batch of waypoints with `numpy` coordinate arrays.
+
+      Any npz model may instead be a directory of uncompressed .npy files containing the same
+      arrays (see `OceanDataset.convert_to_memory_mappable()`), in which case the model data is
+      memory-mapped and only read from disk where sampled. All file-based models are loaded through
+      the process-wide `OceanEnvironment` cache, so they are only read once across all stages.
+
+      If `batched` is True, the waypoint track is read and sampled in fixed-size chunks using
+      vectorized array operations, such that memory usage remains constant regardless of the
+      length of the route; otherwise, waypoints are processed one at a time. Both modes produce
+      the same mission stage parameters.
+
+      The maximum ocean current speed is taken from the worst-case current field, computed as the
+      magnitude of the mean current plus `ocean_current_sigma` standard deviations per axis. If the
+      ocean currents dataset is time-varying, this is the maximum over `ocean_current_time_window`,
+      a (start, end) tuple (in `s` since the Unix epoch) spanning the planned dates of the stage,
+      and only the time slices overlapping that window are read.
+
+      If `sample_spacing` (in `m`) is specified, each segment between waypoints is additionally
+      resampled along its great-circle path at no more than this spacing, and all environmental
+      fields are evaluated over the resulting dense set of samples rather than only at the
+      waypoints themselves. The transit distance is always computed from the waypoints.
+
+      By default, ocean currents are sampled at a depth of 10 m and all other fields at the surface
+      and at the local seafloor depth. If `water_column_profiles` is True, every field is instead
+      sampled over its entire water column down to the local seafloor, and the true extremes of
+      each field over all of these depth levels are used.
+
+      If `summary_cache_directory` is specified, the batched environmental summary of the stage is
+      stored in and reused from that directory (see `StageSummaryCache`), keyed by the contents of
+      the waypoint and model files together with all loader parameters, so that reloading an
+      unchanged stage requires neither the waypoints nor the models to be read. Callable models
+      are only cached if they are plain functions which read no globals, or if they are marked
+      with an explicit token using `cache_token()`. The worst-case ocean current field derived
+      from an ocean currents dataset is persisted in the same directory.
+
+      If `route_simplification_tolerance` is specified, the waypoints are simplified as they are
+      read such that the total route length, as measured using `geodesic_mode`, decreases by less
+      than the tolerance (in `m`). The achieved length reduction is stored in
+      `route_simplification_error` (see `WaypointReader`). Dense tracks are thereby sampled at far
+      fewer points.
+
+      The transit distance is measured between consecutive waypoints using `geodesic_mode` (see
+      `GeodesicMode`). The default straight-line chord is fastest, while `GeodesicMode.VINCENTY`
+      measures the true surface distance of routes with legs spanning hundreds of kilometers."""
+
+      # Load all environmental models
+      if sample_spacing is not None and not batched:
+         raise RuntimeError('Along-track sample spacing can only be used with batched waypoint loading')
+      if water_column_profiles and not batched:
+         raise RuntimeError('Water-column profiles can only be used with batched waypoint loading')
+      waypoint_reader = MissionStage._create_waypoint_reader(waypoints_path, route_simplification_tolerance, geodesic_mode)
+      self.waypoints = waypoint_reader
+      extreme_fields, sampled_fields = [], []
+      for name, model, missing_value, minimum_at_surface in scalar_fields:
+         if water_column_profiles:
+            extreme_fields.append((name, name))
+            sampled_fields.append((name, model, missing_value, None))
+         else:
+            surface_field, seafloor_field = 'surface_' + name, 'seafloor_' + name
+            extreme_fields.append((surface_field, seafloor_field) if minimum_at_surface else (seafloor_field, surface_field))
+            sampled_fields += [(field_name, model, missing_value, 0.0 if field_name == surface_field else None)
+                               for field_name in extreme_fields[-1]]
+      def load_models():
+         MissionStage._preload_models(bathymetry_model, ocean_currents_model, [model for _, model, _, _ in scalar_fields])
+         sampler = EnvironmentSampler()
+         sampler.add_current_field('ocean_current', ocean_currents_model, ocean_current_sigma,
+                                   depth=None if water_column_profiles else 10.0,
+                                   time_window=ocean_current_time_window, cache_directory=summary_cache_directory)
+         for field_name, model, missing_value, depth in sampled_fields:
+            sampler.add_field(field_name, model, missing_value, depth=depth)
+         field_reductions = [('ocean_current', numpy.fmax)] + \
+                            [reduction for minimum_field, maximum_field in extreme_fields
+                             for reduction in ((minimum_field, numpy.fmin), (maximum_field, numpy.fmax))]
+         return MissionStage._create_bathymetry_lookup(bathymetry_model), sampler, field_reductions
 
       # Iterate through all waypoints
-      transit_distance = 0.0
-      min_salinity = min_temp = min_latitude = 100.0
-      max_salinity = max_temp = max_current = -100.0
+      transit_distance, min_latitude, max_current = 0.0, 100.0, -100.0
+      field_extremes = [[math.inf, -math.inf] for _ in scalar_fields]
       max_depth = self.maximum_depth if self.maximum_depth is not None else -100.0
-      with open(waypoints_path, 'rb') as waypoint_file:
-         waypoints = pickle.load(waypoint_file)
-         waypoint, previous_waypoint = GlobalCoordinate(), GlobalCoordinate()
+      if batched:
+         def summarize_track():
+            get_bathymetry, sampler, field_reductions = load_models()
+            return MissionStage._summarize_track(waypoint_reader, get_bathymetry, sampler, max_depth, sample_spacing,
+                                                 field_reductions, water_column_profiles, geodesic_mode), waypoint_reader.simplification_error
+         track_summary, self.route_simplification_error = StageSummaryCache.load_or_compute(summary_cache_directory,
+            (loader_name, _TRACK_SUMMARY_VERSION, waypoint_reader, bathymetry_model, ocean_currents_model,
+             *[model for _, model, _, _ in scalar_fields], ocean_current_sigma, ocean_current_time_window,
+             sample_spacing, water_column_profiles, max_depth, geodesic_mode), summarize_track)
+         if track_summary is not None:
+            transit_distance, min_latitude, max_latitude, max_depth, reduced_values = track_summary
+            max_current = reduced_values[0]
+            field_extremes = [reduced_values[i:i+2] for i in range(1, len(reduced_values), 2)]
+      else:
+         get_bathymetry, sampler, _ = load_models()
+         waypoints = [waypoint for chunk in waypoint_reader for waypoint in chunk.tolist()]
+         self.route_simplification_error = waypoint_reader.simplification_error
          if len(waypoints) > 0:
+            waypoint, previous_waypoint = GlobalCoordinate(), GlobalCoordinate()
             previous_waypoint.set_llh(waypoints[0][0], waypoints[0][1], waypoints[0][2])
             min_latitude = max_latitude = previous_waypoint.latitude
             max_depth = max(max_depth, get_bathymetry(waypoints[0][0], waypoints[0][1]))
-            min_salinity = get_salinity(waypoints[0][0], waypoints[0][1], 0.0)
-            max_salinity = get_salinity(waypoints[0][0], waypoints[0][1], max_depth)
-            min_temp = get_temperature(waypoints[0][0], waypoints[0][1], max_depth)
-            max_temp = get_temperature(waypoints[0][0], waypoints[0][1], 0.0)
-            max_current = get_ocean_current(waypoints[0][0], waypoints[0][1], 10.0)
+            samples = sampler.sample(waypoints[0][0], waypoints[0][1], max_depth)
+            field_extremes = [[samples[minimum_field], samples[maximum_field]] for minimum_field, maximum_field in extreme_fields]
+            max_current = samples['ocean_current']
             for i in range(1, len(waypoints)):
                waypoint.set_llh(waypoints[i][0], waypoints[i][1], waypoints[i][2])
                min_latitude = min(min_latitude, waypoint.latitude)
                max_latitude = max(max_latitude, waypoint.latitude)
                depth = get_bathymetry(waypoints[i][0], waypoints[i][1])
                max_depth = max(max_depth, depth)
-               min_salinity = min(min_salinity, get_salinity(waypoints[i][0], waypoints[i][1], 0.0))
-               max_salinity = max(max_salinity, get_salinity(waypoints[i][0], waypoints[i][1], depth))
-               min_temp = min(min_temp, get_temperature(waypoints[i][0], waypoints[i][1], depth))
-               max_temp = max(max_temp, get_temperature(waypoints[i][0], waypoints[i][1], 0.0))
-               max_current = max(max_current, get_ocean_current(waypoints[i][0], waypoints[i][1], 10.0))
-               transit_distance += waypoint.compute_distance(previous_waypoint)
+               samples = sampler.sample(waypoints[i][0], waypoints[i][1], depth)
+               for extremes, (minimum_field, maximum_field) in zip(field_extremes, extreme_fields):
+                  extremes[0] = min(extremes[0], samples[minimum_field])
+                  extremes[1] = max(extremes[1], samples[maximum_field])
+               max_current = max(max_current, samples['ocean_current'])
+               transit_distance += waypoint.compute_distance(previous_waypoint, geodesic_mode)
                previous_waypoint.copy_from(waypoint)
 
-      # Update a subset of the mission stage parameters
+      # Update the route-related mission stage parameters
       self.targets |= MissionTarget.EXACT_DISTANCE
       if min_latitude < 100.0:
          self.average_latitude = 90.0 * (min_latitude + max_latitude) / math.pi
          self.target_distance = self.minimum_distance = self.maximum_distance = 0.001 * transit_distance
+      if max_current >= 0.0:
+         self.maximum_ocean_current_speed = max_current
+      if max_depth >= 0.0:
+         self.maximum_depth = max_depth
+      return [(minimum, maximum) for minimum, maximum in field_extremes]
+
+
+   @staticmethod
+   def _serialize_stages(stages: List[MissionStage], strings: List[str]) -> List[bytes]:
+      """Returns the serialized representations of a list of mission stages, stored column-wise
+      such that all stages are packed using only a handful of calls, and appends all of their
+      names, symbolic parameters, and waypoint sources to `strings`."""
+      targets, flags, geodesic_modes, chunk_sizes, tolerances, tags, numbers, profiles = [], [], [], [], [], [], [], []
+      for stage in stages:
+         strings.append(stage.name)
+         stage_tags, stage_numbers = _pack_values(_STAGE_VALUE_GETTER(stage), strings)
+         tags.extend(stage_tags)
+         numbers.extend(stage_numbers)
+         stage_flags, geodesic_mode, chunk_size, tolerance = 0, GeodesicMode.CHORD, 0, math.nan
+         if stage.waypoints is not None and stage.waypoints.waypoint_format is not None:
+            stage_flags, geodesic_mode, chunk_size = _HAS_WAYPOINTS, stage.waypoints.geodesic_mode, stage.waypoints.chunk_size
+            if stage.waypoints.simplification_tolerance is not None:
+               tolerance = stage.waypoints.simplification_tolerance
+            strings.extend((stage.waypoints.waypoint_format, str(stage.waypoints.source)))
+         if stage.current_profile is not None:
+            stage_flags |= _HAS_CURRENT_PROFILE
+            profiles.append(struct.pack('<Q', len(stage.current_profile.lengths)))
+            profiles.extend(numpy.ascontiguousarray(array, dtype='<f8').tobytes()
+                            for array in (stage.current_profile.lengths, stage.current_profile.along_track_currents,
+                                          stage.current_profile.cross_track_currents))
+         if stage.turn_profile is not None:
+            stage_flags |= _HAS_TURN_PROFILE
+            profiles.append(struct.pack('<Q', len(stage.turn_profile.heading_changes)))
+            profiles.extend(numpy.ascontiguousarray(array, dtype='<f8').tobytes()
+                            for array in (stage.turn_profile.heading_changes, stage.turn_profile.turn_radii))
+         targets.append(stage.targets.value)
+         flags.append(stage_flags)
+         geodesic_modes.append(geodesic_mode)
+         chunk_sizes.append(chunk_size)
+         tolerances.append(tolerance)
+      return [struct.pack('<{0}I{0}B{0}B{0}Q{0}d'.format(len(stages)), *targets, *flags, *geodesic_modes, *chunk_sizes, *tolerances),
+              bytes(tags),
+              struct.pack('<{}d'.format(len(numbers)), *numbers)] + profiles
+
+   @staticmethod
+   def _deserialize_stages(data: bytes, offset: int, num_stages: int,
+                           strings: Iterator[str]) -> Tuple[List[MissionStage], int]:
+      """Reconstructs a list of mission stages serialized by `_serialize_stages()` at the
+      specified offset, returning the stages along with the offset of the data following them."""
+      columns = struct.Struct('<{0}I{0}B{0}B{0}Q{0}d'.format(num_stages))
+      targets = columns.unpack_from(data, offset)
+      flags, geodesic_modes = targets[num_stages:2*num_stages], targets[2*num_stages:3*num_stages]
+      chunk_sizes, tolerances = targets[3*num_stages:4*num_stages], targets[4*num_stages:]
+      fields, num_fields = _STAGE_VALUE_FIELDS, len(_STAGE_VALUE_FIELDS)
+      offset += columns.size
+      tags = data[offset:offset+(num_stages*num_fields)]
+      offset += num_stages * num_fields
+      numbers = struct.unpack_from('<{}d'.format(num_stages * num_fields), data, offset)
+      offset += 8 * num_stages * num_fields
+      stages = []
+      for i in range(num_stages):
+         stage = MissionStage(next(strings), [MissionTarget(targets[i])])
+         start = i * num_fields
+         values = [number if tag == _FLOAT_VALUE else None if tag == _NONE_VALUE else _unpack_value(tag, number, strings)
+                   for tag, number in zip(tags[start:start+num_fields], numbers[start:start+num_fields])]
+         stage.__dict__.update(zip(fields, values))
+         if flags[i] & _HAS_WAYPOINTS:
+            waypoint_format = next(strings)
+            stage.waypoints = WaypointReader(next(strings), chunk_sizes[i], waypoint_format,
+                                             None if math.isnan(tolerances[i]) else tolerances[i], geodesic_modes[i])
+         stages.append(stage)
+      for i in range(num_stages):
+         for flag, num_arrays, profile_type, attribute in ((_HAS_CURRENT_PROFILE, 3, RouteCurrentProfile, 'current_profile'),
+                                                           (_HAS_TURN_PROFILE, 2, RouteTurnProfile, 'turn_profile')):
+            if flags[i] & flag:
+               num_entries, = struct.unpack_from('<Q', data, offset)
+               offset += 8
+               arrays = []
+               for _ in range(num_arrays):
+                  arrays.append(numpy.frombuffer(data, dtype='<f8', count=num_entries, offset=offset).copy())
+                  offset += 8 * num_entries
+               setattr(stages[i], attribute, profile_type(*arrays))
+      return stages, offset
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   def load_waypoints_and_ocean_data(self, waypoints_path: Union[str, Iterable],
+                                           bathymetry_model: Union[str, Callable, None],
+                                           ocean_currents_model: Union[str, Callable, None],
+                                           salinity_model: Union[str, Callable, None],
+                                           temperature_model: Union[str, Callable, None],
+                                           batched: bool = True,
+                                           ocean_current_sigma: float = 2.0,
+                                           sample_spacing: Optional[float] = None,
+                                           ocean_current_time_window: Optional[Tuple[float, float]] = None,
+                                           water_column_profiles: bool = False,
+                                           summary_cache_directory: Optional[str] = None,
+                                           route_simplification_tolerance: Optional[float] = None,
+                                           geodesic_mode: GeodesicMode = GeodesicMode.CHORD) -> None:
+      """
+      TODO: Documentation, indicate which parameters this will overwrite/load
+
+      Bathymetry model should be npz: data[latIdx][lonIdx] = depth, or callable(lat, lon) -> -depth
+      Salinity model should be npz: data[latIdx][lonIdx][depth] = salinity, or callable(lat, lon, depth) -> salinity
+      Temperature model should be npz: data[latIdx][lonIdx][depth] = temperature, or callable(lat, lon, depth) -> temperature
+
+      See `_load_waypoints_and_fields()` for a description of the remaining parameters.
+      """
+      (min_salinity, max_salinity), (min_temp, max_temp) = self._load_waypoints_and_fields(
+         'load_waypoints_and_ocean_data', waypoints_path, bathymetry_model, ocean_currents_model,
+         [('salinity', salinity_model, -1.0, True), ('temperature', temperature_model, -100.0, False)],
+         batched, ocean_current_sigma, sample_spacing, ocean_current_time_window, water_column_profiles,
+         summary_cache_directory, route_simplification_tolerance, geodesic_mode)
       if min_salinity >= 0.0 and min_salinity < 100.0:
          self.minimum_salinity = min_salinity
       if max_salinity >= 0.0 and max_salinity < 100.0:
@@ -289,120 +840,134 @@ class MissionStage(object):
          self.minimum_temperature = min_temp
       if max_temp > -10.0 and max_temp < 100.0:
          self.maximum_temperature = max_temp
-      if max_current >= 0.0:
-         self.maximum_ocean_current_speed = max_current
-      if max_depth >= 0.0:
-         self.maximum_depth = max_depth
 
-
-   def load_waypoints_and_custom_density(self, waypoints_path: str,
+   def load_waypoints_and_custom_density(self, waypoints_path: Union[str, Iterable],
                                                bathymetry_model: Union[str, Callable, None],
                                                ocean_currents_model: Union[str, Callable, None],
-                                               density_model: Union[str, Callable, None]) -> None:
+                                               density_model: Union[str, Callable, None],
+                                               batched: bool = True,
+                                               ocean_current_sigma: float = 2.0,
+                                               sample_spacing: Optional[float] = None,
+                                               ocean_current_time_window: Optional[Tuple[float, float]] = None,
+                                               water_column_profiles: bool = False,
+                                               summary_cache_directory: Optional[str] = None,
+                                               route_simplification_tolerance: Optional[float] = None,
+                                               geodesic_mode: GeodesicMode = GeodesicMode.CHORD) -> None:
       """
       TODO: Documentation
-      """
-
-      # Load the bathymetry model
-      if isinstance(bathymetry_model, str):
-         bathymetry_data = numpy.load(bathymetry_model)
-         bath_lats = numpy.array(bathymetry_data['latIndex'])
-         bath_lons = numpy.array(bathymetry_data['lonIndex'])
-         bath_depths = numpy.array(bathymetry_data['zMat'])
-         def get_bathymetry(latitude: float, longitude: float) -> float:
-            lat_index = numpy.abs(bath_lats - latitude).argmin()
-            lon_index = numpy.abs(bath_lons - longitude).argmin()
-            return -bath_depths[lat_index][lon_index]
-      elif callable(bathymetry_model):
-         def get_bathymetry(latitude: float, longitude: float) -> float:
-            return -bathymetry_model(latitude, longitude)
-      else:
-         def get_bathymetry(_latitude: float, _longitude: float) -> float:
-            return 0.0
-
-      # Load the ocean currents model
-      if isinstance(ocean_currents_model, str):
-         ocean_currents_data = numpy.load(ocean_currents_model)
-         curr_lats = numpy.array(ocean_currents_data['latIndex'])
-         curr_lons = numpy.array(ocean_currents_data['lonIndex'])
-         curr_depths = numpy.array(ocean_currents_data['depthIndex'])
-         u_mean_data = numpy.array(ocean_currents_data['uMeanData'])
-         u_std_data = numpy.array(ocean_currents_data['uStdData'])
-         v_mean_data = numpy.array(ocean_currents_data['vMeanData'])
-         v_std_data = numpy.array(ocean_currents_data['vStdData'])
-         def get_ocean_current(latitude: float, longitude: float, depth: float) -> Tuple[float, float]:
-            lat_index = numpy.abs(curr_lats - latitude).argmin()
-            lon_index = numpy.abs(curr_lons - longitude).argmin()
-            depth_index = numpy.abs(curr_depths - depth).argmin()
-            return math.sqrt(
-                     (numpy.abs(u_mean_data[depth_index, lat_index, lon_index]) + (2.0 * u_std_data[depth_index, lat_index, lon_index]))**2 +
-                     (numpy.abs(v_mean_data[depth_index, lat_index, lon_index]) + (2.0 * v_std_data[depth_index, lat_index, lon_index]))**2)
-      elif callable(ocean_currents_model):
-         def get_ocean_current(latitude: float, longitude: float, depth: float) -> Tuple[float, float]:
-            return ocean_currents_model(latitude, longitude, depth)
-      else:
-         def get_ocean_current(_latitude: float, _longitude: float, _depth: float) -> Tuple[float, float]:
-            return 0.0
-
-      # Load the density model
-      if isinstance(density_model, str):
-         density_data = numpy.load(density_model)
-         dens_lats = numpy.array(density_data['latIndex'])
-         dens_lons = numpy.array(density_data['lonIndex'])
-         dens_depths = numpy.array(density_data['depthIndex'])
-         densities = numpy.array(density_data['data'])
-         def get_density(latitude: float, longitude: float, depth: float) -> float:
-            lat_index = numpy.abs(dens_lats - latitude).argmin()
-            lon_index = numpy.abs(dens_lons - longitude).argmin()
-            depth_index = numpy.abs(dens_depths - depth).argmin()
-            return densities[lat_index][lon_index][depth_index]
-      elif callable(density_model):
-         def get_density(latitude: float, longitude: float, depth: float) -> float:
-            return density_model(latitude, longitude, depth)
-      else:
-         def get_density(_latitude: float, _longitude: float, _depth: float) -> float:
-            return 0.0
-
-      # Iterate through all waypoints
-      transit_distance = 0.0
-      min_density = min_latitude = 100000.0
-      max_density = max_current = -100.0
-      max_depth = self.maximum_depth if self.maximum_depth is not None else -100.0
-      with open(waypoints_path, 'rb') as waypoint_file:
-         waypoints = pickle.load(waypoint_file)
-         waypoint, previous_waypoint = GlobalCoordinate(), GlobalCoordinate()
-         if len(waypoints) > 0:
-            previous_waypoint.set_llh(waypoints[0][0], waypoints[0][1], waypoints[0][2])
-            min_latitude = max_latitude = previous_waypoint.latitude
-            max_depth = max(max_depth, get_bathymetry(waypoints[0][0], waypoints[0][1]))
-            min_density = get_density(waypoints[0][0], waypoints[0][1], 0.0)
-            max_density = get_density(waypoints[0][0], waypoints[0][1], max_depth)
-            max_current = get_ocean_current(waypoints[0][0], waypoints[0][1], 10.0)
-            for i in range(1, len(waypoints)):
-               waypoint.set_llh(waypoints[i][0], waypoints[i][1], waypoints[i][2])
-               min_latitude = min(min_latitude, waypoint.latitude)
-               max_latitude = max(max_latitude, waypoint.latitude)
-               depth = get_bathymetry(waypoints[i][0], waypoints[i][1])
-               max_depth = max(max_depth, depth)
-               min_density = min(min_density, get_density(waypoints[i][0], waypoints[i][1], 0.0))
-               max_density = max(max_density, get_density(waypoints[i][0], waypoints[i][1], depth))
-               max_current = max(max_current, get_ocean_current(waypoints[i][0], waypoints[i][1], 10.0))
-               transit_distance += waypoint.compute_distance(previous_waypoint)
-               previous_waypoint.copy_from(waypoint)
 
-      # Update a subset of the mission stage parameters
-      self.targets |= MissionTarget.EXACT_DISTANCE
-      if min_latitude < 100.0:
-         self.average_latitude = 90.0 * (min_latitude + max_latitude) / math.pi
-         self.target_distance = self.minimum_distance = self.maximum_distance = 0.001 * transit_distance
+      See `_load_waypoints_and_fields()` for a description of the remaining parameters.
+      """
+      (min_density, max_density), = self._load_waypoints_and_fields(
+         'load_waypoints_and_custom_density', waypoints_path, bathymetry_model, ocean_currents_model,
+         [('density', density_model, 0.0, True)],
+         batched, ocean_current_sigma, sample_spacing, ocean_current_time_window, water_column_profiles,
+         summary_cache_directory, route_simplification_tolerance, geodesic_mode)
       if min_density > 0.0 and min_density < 50000.0:
          self.minimum_density = min_density
       if max_density > 0.0 and max_density < 50000.0:
          self.maximum_density = max_density
-      if max_current >= 0.0:
-         self.maximum_ocean_current_speed = max_current
-      if max_depth >= 0.0:
-         self.maximum_depth = max_depth
+
+
+   def serialize(self) -> bytes:
+      """Returns a compact, versioned binary representation of the mission stage.
+
+      All scalar parameters are stored as packed binary doubles, symbolic parameters are stored
+      by symbol name (or as a `sympy.srepr` string for any other expression), file-based waypoint
+      sources are stored by path, and any current or turn profile is stored as raw arrays. Waypoints
+      read from in-memory iterables are not serialized. Unlike a pickle, the layout does not depend on
+      the internal structure of `sympy` or of the mission classes, and data written with any other
+      version of the layout is rejected rather than misread."""
+      strings = []
+      stage_parts = MissionStage._serialize_stages([self], strings)
+      return b''.join([_SERIALIZATION_HEADER.pack(_STAGE_SERIALIZATION_MAGIC, _SERIALIZATION_VERSION),
+                       _pack_strings(strings)] + stage_parts)
+
+   @staticmethod
+   def deserialize(data: bytes) -> MissionStage:
+      """Reconstructs a mission stage from the output of `serialize()`."""
+      offset = _check_serialization_header(data, _STAGE_SERIALIZATION_MAGIC, 'Mission Stage')
+      strings, offset = _unpack_strings(data, offset)
+      return MissionStage._deserialize_stages(data, offset, 1, iter(strings))[0][0]
+
+
+   def read_waypoints(self) -> numpy.ndarray:
+      """Returns all waypoints from which the mission stage was loaded as a single (N x 3) array
+      of [latitude, longitude, height] rows. The waypoint source is re-read on every call, so
+      stages loaded from a one-shot iterable cannot be read again."""
+      if self.waypoints is None:
+         raise RuntimeError('Mission Stage "{}" was not loaded from any waypoints'.format(self.name))
+      chunks = [chunk for chunk in self.waypoints]
+      return numpy.concatenate(chunks) if chunks else numpy.empty((0, 3))
+
+   def read_track(self) -> Track:
+      """Returns the path through all waypoints from which the mission stage was loaded as a
+      `Track`, providing cumulative distances, leg bearings, and point-to-track queries."""
+      return Track.from_waypoints(self.read_waypoints())
+
+   def read_spatial_index(self) -> SpatialIndex:
+      """Returns a `SpatialIndex` over all waypoints from which the mission stage was loaded, for
+      answering nearest-waypoint and fixed-radius queries in ECEF space."""
+      return SpatialIndex.from_waypoints(self.read_waypoints())
+
+
+   def compute_current_profile(self, ocean_currents_model: str,
+                                     depth: float = 10.0,
+                                     sigma: float = 0.0,
+                                     maximum_speed_through_water: Optional[float] = None) -> RouteCurrentProfile:
+      """Projects the mean ocean currents at the specified `depth` (in `m`) onto every segment of
+      the mission stage route, optionally made adverse by `sigma` standard deviations, and stores
+      the resulting `RouteCurrentProfile` in `current_profile`.
+
+      The profile relates the speed of the vehicle through the water to its speed over the ground
+      on every segment, such that transit durations and energies may be integrated along the
+      actual route rather than bounded using the single worst-case current speed. If
+      `maximum_speed_through_water` (in `m/s`) is specified, the minimum duration of the stage is
+      raised to the time required to transit the route at that speed.
+
+      The profile only feeds into the stage bounds through that minimum duration. Without
+      `maximum_speed_through_water`, it is stored for inspection alone, and finalization of the
+      mission continues to rely solely on `maximum_ocean_current_speed`."""
+      waypoints = self.read_waypoints()
+      self.current_profile = RouteCurrentProfile.from_route(ocean_currents_model, waypoints[:-1, 0], waypoints[:-1, 1],
+                                                            *GlobalCoordinateArray.from_llh(waypoints[:, 0], waypoints[:, 1], waypoints[:, 2]).compute_segment_enu(),
+                                                            depth=depth, sigma=sigma)
+      if maximum_speed_through_water is not None:
+         minimum_duration = float(self.current_profile.transit_durations(maximum_speed_through_water))
+         if math.isinf(minimum_duration):
+            raise RuntimeError('Mission Stage "{}" cannot be transited at {} m/s through the water'
+                               .format(self.name, maximum_speed_through_water))
+         if self.minimum_duration is None or self.minimum_duration < minimum_duration:
+            self.minimum_duration = minimum_duration
+      return self.current_profile
+
+
+   def compute_turn_profile(self, speed: Optional[float] = None) -> RouteTurnProfile:
+      """Computes the change in heading and the turn radius at every waypoint of the mission stage
+      route, stores the resulting `RouteTurnProfile` in `turn_profile`, and updates the
+      `maximum_heading_change` and `minimum_turn_radius` of the stage.
+
+      The `maximum_yaw_rate` (in `degrees/s`) of the stage is updated to the rate required to
+      follow the tightest turn at the specified `speed` (in `m/s`), which defaults to the
+      maximum or else the target average horizontal speed of the stage, if numeric. Percentiles
+      of all quantities are available from the returned profile.
+
+      Raises a `RuntimeError` without updating the stage if the route reverses direction at any
+      waypoint, since no finite turn radius or yaw rate can follow such a route."""
+      waypoints = self.read_waypoints()
+      turn_profile = RouteTurnProfile.from_route(waypoints[:, 0], waypoints[:, 1], waypoints[:, 2])
+      if turn_profile.num_reversals > 0:
+         raise RuntimeError('Mission Stage "{}" reverses direction at {} waypoint(s), so no finite turn radius or '
+                            'yaw rate can follow its route'.format(self.name, turn_profile.num_reversals))
+      self.turn_profile = turn_profile
+      self.maximum_heading_change = self.turn_profile.maximum_heading_change
+      self.minimum_turn_radius = self.turn_profile.minimum_turn_radius
+      if speed is None:
+         speed = next((value for value in (self.maximum_average_horizontal_speed, self.target_average_horizontal_speed)
+                       if isinstance(value, (int, float))), None)
+      if speed is not None:
+         self.maximum_yaw_rate = self.turn_profile.maximum_yaw_rate(float(speed))
+      return self.turn_profile
 
 
    def finalize(self) -> None:
@@ -443,59 +1008,16 @@ class MissionStage(object):
       elif self.maximum_net_buoyancy < 1.0:
          self.maximum_net_buoyancy = max(self.maximum_net_buoyancy, (self.maximum_density / self.minimum_density) - 1.0)
 
-      if MissionTarget.EXACT_DISTANCE in self.targets:
-         if self.target_distance is None:
-            raise RuntimeError('For Mission Stage "{}" with EXACT_DISTANCE target, target_distance must be specified.')
-         self.minimum_distance = self.maximum_distance = self.target_distance
-      else:
-         if MissionTarget.MINIMUM_DISTANCE in self.targets and self.minimum_distance is None:
-            duration = self.target_duration if self.target_duration is not None else self.minimum_duration
-            speed = self.target_average_horizontal_speed if self.target_average_horizontal_speed is not None else self.minimum_average_horizontal_speed
-            if duration is not None and speed is not None:
-               self.minimum_distance = 0.001 * duration * speed
-            else:
-               raise RuntimeError('For Mission Stage "{}" with MINIMUM_DISTANCE target, minimum_distance must be specified or calculable.')
-         if MissionTarget.MAXIMUM_DISTANCE in self.targets and self.maximum_distance is None:
-            duration = self.target_duration if self.target_duration is not None else self.maximum_duration
-            speed = self.target_average_horizontal_speed if self.target_average_horizontal_speed is not None else self.maximum_average_horizontal_speed
-            if duration is not None and speed is not None:
-               self.maximum_distance = 0.001 * duration * speed
-            else:
-               raise RuntimeError('For Mission Stage "{}" with MAXIMUM_DISTANCE target, maximum_distance must be specified or calculable.')
-      if MissionTarget.EXACT_DURATION in self.targets:
-         if self.target_duration is None:
-            raise RuntimeError('For Mission Stage "{}" with EXACT_DURATION target, target_duration must be specified.')
-         self.minimum_duration = self.maximum_duration = self.target_duration
-      else:
-         if MissionTarget.MINIMUM_DURATION in self.targets and self.minimum_duration is None:
-            distance = self.target_distance if self.target_distance is not None else self.minimum_distance
-            speed = self.target_average_horizontal_speed if self.target_average_horizontal_speed is not None else self.maximum_average_horizontal_speed
-            if distance is not None and speed is not None:
-               self.minimum_duration = 1000.0 * distance / speed
-            else:
-               raise RuntimeError('For Mission Stage "{}" with MINIMUM_DURATION target, minimum_duration must be specified or calculable.')
-         elif MissionTarget.MAXIMUM_DURATION in self.targets and self.maximum_duration is None:
-            distance = self.target_distance if self.target_distance is not None else self.maximum_distance
-            speed = self.target_average_horizontal_speed if self.target_average_horizontal_speed is not None else self.minimum_average_horizontal_speed
-            if distance is not None and speed is not None:
-               self.maximum_duration = 1000.0 * distance / speed
-            else:
-               raise RuntimeError('For Mission Stage "{}" with MAXIMUM_DURATION target, maximum_duration must be specified or calculable.')
-      if MissionTarget.HORIZONTAL_SPEED in self.targets:
-         if self.target_average_horizontal_speed is None:
-            raise RuntimeError('For Mission Stage "{}" with HORIZONTAL_SPEED target, target_average_horizontal_speed must be specified.')
-         self.minimum_average_horizontal_speed = self.maximum_average_horizontal_speed = self.target_average_horizontal_speed
-      else:
-         if self.target_duration is not None and self.target_distance is not None:
-            self.minimum_average_horizontal_speed = self.maximum_average_horizontal_speed = self.target_average_horizontal_speed = 1000.0 * self.target_distance / self.target_duration
-         min_distance = self.target_distance if self.target_distance is not None else self.minimum_distance
-         min_duration = self.target_duration if self.target_duration is not None else self.minimum_duration
-         max_distance = self.target_distance if self.target_distance is not None else self.maximum_distance
-         max_duration = self.target_duration if self.target_duration is not None else self.maximum_duration
-         if self.minimum_average_horizontal_speed is None and min_distance is not None and max_duration is not None:
-            self.minimum_average_horizontal_speed = 1000.0 * min_distance / max_duration
-         if self.maximum_average_horizontal_speed is None and max_distance is not None and min_duration is not None:
-            self.maximum_average_horizontal_speed = 1000.0 * max_distance / min_duration
+      if MissionTarget.EXACT_DISTANCE in self.targets and self.target_distance is None:
+         raise RuntimeError('For Mission Stage "{}" with EXACT_DISTANCE target, target_distance must be specified.'.format(self.name))
+      if MissionTarget.EXACT_DURATION in self.targets and self.target_duration is None:
+         raise RuntimeError('For Mission Stage "{}" with EXACT_DURATION target, target_duration must be specified.'.format(self.name))
+      if MissionTarget.HORIZONTAL_SPEED in self.targets and self.target_average_horizontal_speed is None:
+         raise RuntimeError('For Mission Stage "{}" with HORIZONTAL_SPEED target, target_average_horizontal_speed must be specified.'.format(self.name))
+      propagator = ConstraintPropagator()
+      self._add_propagation_rules(propagator)
+      propagator.propagate()
+      self._verify_targets()
 
 
 class MissionIterator(object):
@@ -559,75 +1081,89 @@ class Mission(object):
       self.stages.append(stage)
 
 
+   def add_stages(self, stages: Iterable[Union[MissionStage, Callable[[], MissionStage]]],
+                        max_workers: Optional[int] = None) -> None:
+      """Concurrently loads and finalizes multiple mission stages on a thread pool, then adds
+      them to the mission in the order in which they were specified.
+
+      Each entry may be either a `MissionStage` or a callable which creates, loads, and returns a
+      `MissionStage` (e.g., by calling `load_waypoints_and_custom_density()`). Since the bulk of
+      stage loading consists of array operations which release the GIL, total setup time scales
+      with the slowest stage rather than with the sum of all stages. If any stage fails to load
+      or finalize, its exception is raised and none of the stages are added to the mission."""
+
+      def prepare_stage(stage: Union[MissionStage, Callable[[], MissionStage]]) -> MissionStage:
+         stage = stage if isinstance(stage, MissionStage) else stage()
+         stage.finalize()
+         return stage
+
+      stages = list(stages)
+      with ThreadPoolExecutor(max_workers=max_workers) as executor:
+         prepared_stages = [future.result() for future in [executor.submit(prepare_stage, stage) for stage in stages]]
+      self.stages.extend(prepared_stages)
+
+
    def finalize(self) -> None:
+      """Propagates all mission-level and stage-level distance, duration, and speed bounds to a
+      fixpoint, then symbolizes any stage targets which remain unknown.
+
+      The dependency graph between all bounds is built once, and each rule relating them is only
+      re-evaluated when one of its inputs changes, such that inferences enabled by bounds which
+      are calculated late in the process are never missed, and the total cost scales linearly
+      with the number of mission stages."""
+
+      # Build the constraint graph for all mission stages and mission-level bounds
+      propagator = ConstraintPropagator()
+      for stage in self.stages:
+         stage._add_propagation_rules(propagator)
 
       # Ensure that all mission stage speeds are correct
-      if self.maximum_average_horizontal_speed is not None:
-         for stage in self.stages:
-            if stage.maximum_average_horizontal_speed is None or stage.maximum_average_horizontal_speed > self.maximum_average_horizontal_speed:
-               stage.maximum_average_horizontal_speed = self.maximum_average_horizontal_speed
-               stage.finalize()
-
-      # Attempt to compute the total minimum mission distance
-      stage_distances = [stage.minimum_distance for stage in self.stages if stage.minimum_distance is not None]
-      if self.minimum_distance is None:
-         if len(stage_distances) == len(self.stages):
-            self.minimum_distance = sum(stage_distances)
-      else:
-         if len(stage_distances) == len(self.stages) - 1:
-            for stage in self.stages:
-               if stage.minimum_distance is None:
-                  stage.minimum_distance = self.minimum_distance - sum(stage_distances)
-                  stage.finalize()
-         elif len(stage_distances) == len(self.stages):
-            self.minimum_distance = max(self.minimum_distance, stage_distances)
-
-      # Attempt to compute the total minimum mission duration
-      stage_durations = [stage.minimum_duration for stage in self.stages if stage.minimum_duration is not None]
-      if self.minimum_duration is None:
-         if len(stage_durations) == len(self.stages):
-            self.minimum_duration = sum(stage_durations)
-      else:
-         if len(stage_durations) == len(self.stages) - 1:
-            for stage in self.stages:
-               if stage.minimum_duration is None:
-                  stage.minimum_duration = self.minimum_duration - sum(stage_durations)
-                  stage.finalize()
-         elif len(stage_durations) == len(self.stages):
-            self.minimum_duration = max(self.minimum_duration, stage_durations)
-
-      # Attempt to compute the total maximum mission duration
-      stage_durations = [stage.maximum_duration for stage in self.stages if stage.maximum_duration is not None]
-      if self.maximum_duration is None:
-         if len(stage_durations) == len(self.stages):
-            self.maximum_duration = sum(stage_durations)
-      else:
-         if len(stage_durations) == len(self.stages) - 1:
+      def maximum_speed() -> None:
+         if self.maximum_average_horizontal_speed is not None:
             for stage in self.stages:
-               if stage.maximum_duration is None:
-                  stage.maximum_duration = self.maximum_duration - sum(stage_durations)
-                  stage.finalize()
-         elif len(stage_durations) == len(self.stages):
-            self.maximum_duration = min(self.maximum_duration, stage_durations)
-
-      # Ensure that the total mission parameters are at least greater than the sum of the individual stage parts
-      stage_distances = sum([stage.minimum_distance for stage in self.stages if stage.minimum_distance is not None])
-      stage_min_durations = sum([stage.minimum_duration for stage in self.stages if stage.minimum_duration is not None])
-      stage_max_durations = sum([stage.maximum_duration for stage in self.stages if stage.maximum_duration is not None])
-      # TODO: Add back: if self.minimum_distance is not None and self.minimum_distance < stage_distances:
-      #   self.minimum_distance = stage_distances
-      if self.minimum_duration is not None and self.minimum_duration < stage_min_durations:
-         self.minimum_duration = stage_min_durations
-      if self.maximum_duration is not None and self.maximum_duration < stage_max_durations:
-         self.maximum_duration = stage_max_durations
+               if not stage._speed_is_fixed() and (stage.maximum_average_horizontal_speed is None or
+                     stage.maximum_average_horizontal_speed > self.maximum_average_horizontal_speed):
+                  propagator.set(stage, 'maximum_average_horizontal_speed', self.maximum_average_horizontal_speed)
+      propagator.add_rule([(self, 'maximum_average_horizontal_speed')] +
+                          [(stage, 'maximum_average_horizontal_speed') for stage in self.stages], maximum_speed)
+
+      # Attempt to compute the total mission bounds, or the single unknown stage bound from the total
+      def total_bound(mission_attribute: str, stage_attribute: str, reduce_total: Callable) -> Callable:
+         def rule() -> None:
+            total = getattr(self, mission_attribute)
+            stage_values = [getattr(stage, stage_attribute) for stage in self.stages]
+            known_values = [value for value in stage_values if value is not None]
+            if total is None:
+               if len(known_values) == len(self.stages):
+                  propagator.set(self, mission_attribute, sum(known_values))
+            elif len(known_values) == len(self.stages) - 1:
+               propagator.set(self.stages[stage_values.index(None)], stage_attribute, total - sum(known_values))
+            else:
+               propagator.set(self, mission_attribute, reduce_total(total, sum(known_values), len(known_values) == len(self.stages)))
+         propagator.add_rule([(self, mission_attribute)] + [(stage, stage_attribute) for stage in self.stages], rule)
+      # TODO: Add back raising the minimum distance to the sum of any known stage distances
+      total_bound('minimum_distance', 'minimum_distance',
+                  lambda total, stage_sum, all_known: max(total, stage_sum) if all_known else total)
+      total_bound('minimum_duration', 'minimum_duration',
+                  lambda total, stage_sum, all_known: max(total, stage_sum))
+      total_bound('maximum_duration', 'maximum_duration',
+                  lambda total, stage_sum, all_known: stage_sum if all_known else max(total, stage_sum))
 
       # Attempt to fill in any missing average horizontal speeds for all mission stages
-      if self.minimum_distance is not None and self.maximum_duration is not None:
-         min_speed = 1000.0 * self.minimum_distance / self.maximum_duration
-         for stage in self.stages:
-            if stage.minimum_average_horizontal_speed is None or stage.minimum_average_horizontal_speed < min_speed:
-               stage.minimum_average_horizontal_speed = min_speed
-               stage.finalize()
+      def minimum_speed() -> None:
+         if self.minimum_distance is not None and self.maximum_duration is not None:
+            min_speed = 1000.0 * self.minimum_distance / self.maximum_duration
+            for stage in self.stages:
+               if not stage._speed_is_fixed() and (stage.minimum_average_horizontal_speed is None or
+                                                   stage.minimum_average_horizontal_speed < min_speed):
+                  propagator.set(stage, 'minimum_average_horizontal_speed', min_speed)
+      propagator.add_rule([(self, 'minimum_distance'), (self, 'maximum_duration')] +
+                          [(stage, 'minimum_average_horizontal_speed') for stage in self.stages], minimum_speed)
+
+      # Propagate all bounds to a fixpoint and ensure that all stage targets are still satisfiable
+      propagator.propagate()
+      for stage in self.stages:
+         stage._verify_targets()
 
       # Symbolize any missing target mission parameters for all mission stages
       for stage in self.stages:
@@ -638,4 +1174,70 @@ class Mission(object):
          if stage.target_average_horizontal_speed is None:
             stage.target_average_horizontal_speed = Symbol(stage.name + '_average_speed')
 
+
+   def serialize(self) -> bytes:
+      """Returns a compact, versioned binary representation of the mission and all of its stages
+      (see `MissionStage.serialize()`), suitable for shipping a finalized mission to many worker
+      processes. The parameters of all stages are packed column-wise, such that a mission
+      serializes and deserializes in a few microseconds per stage."""
+      strings = []
+      tags, numbers = _pack_values(_MISSION_VALUE_GETTER(self), strings)
+      stage_parts = MissionStage._serialize_stages(self.stages, strings)
+      return b''.join([_SERIALIZATION_HEADER.pack(_MISSION_SERIALIZATION_MAGIC, _SERIALIZATION_VERSION),
+                       _MISSION_RECORD.pack(*tags, *numbers, len(self.stages)), _pack_strings(strings)] + stage_parts)
+
+   @staticmethod
+   def deserialize(data: bytes) -> Mission:
+      """Reconstructs a mission from the output of `serialize()`."""
+      offset = _check_serialization_header(data, _MISSION_SERIALIZATION_MAGIC, 'Mission')
+      record = _MISSION_RECORD.unpack_from(data, offset)
+      strings, offset = _unpack_strings(data, offset + _MISSION_RECORD.size)
+      num_fields, string_iterator = len(_MISSION_VALUE_FIELDS), iter(strings)
+      mission = Mission()
+      for name, tag, number in zip(_MISSION_VALUE_FIELDS, record[:num_fields], record[num_fields:2*num_fields]):
+         setattr(mission, name, _unpack_value(tag, number, string_iterator))
+      mission.stages = MissionStage._deserialize_stages(data, offset, record[-1], string_iterator)[0]
+      return mission
+
+
+   def simulate_current_ensemble(self, ocean_currents_model: str,
+                                       num_realizations: int,
+                                       drag_area: float,
+                                       ground_speeds: Optional[Dict[str, float]] = None,
+                                       depth: float = 10.0,
+                                       propulsive_efficiency: float = 1.0,
+                                       hotel_power: float = 0.0,
+                                       seed: Optional[int] = None) -> Dict[str, CurrentEnsembleStatistics]:
+      """Simulates the waypoint route of every mission stage under `num_realizations` stochastic
+      realizations of the ocean currents at the specified `depth` (in `m`), returning the
+      distributions of the required speed through the water and of the transit energy for each
+      stage, keyed by stage name (see `CurrentEnsemble`).
+
+      Rather than relying on the single deterministic worst-case current speed of each stage,
+      these distributions allow the vehicle to be sized for any chosen percentile of conditions.
+      Realization `i` of every stage is drawn from the same current field, so per-realization
+      mission totals are given by summing the distributions over all stages.
+
+      Each stage is simulated at the speed over the ground given in `ground_speeds`, defaulting to
+      its numeric target average horizontal speed if known, or else to its minimum average
+      horizontal speed. The water density of each stage is taken as its maximum density. The
+      `drag_area` is the drag coefficient multiplied by the reference area of the vehicle (in
+      `m^2`), and `hotel_power` is any constant non-propulsive power draw (in `W`)."""
+      routes, speeds, densities = {}, {}, {}
+      for stage in self.stages:
+         speed = ground_speeds.get(stage.name) if ground_speeds is not None else None
+         if speed is None:
+            speed = stage.target_average_horizontal_speed if not isinstance(stage.target_average_horizontal_speed, Expr) else None
+            speed = speed if speed is not None else stage.minimum_average_horizontal_speed
+         if speed is None:
+            raise RuntimeError('Unable to determine the ground speed at which to simulate Mission Stage "{}"'
+                               .format(stage.name))
+         waypoints = stage.read_waypoints()
+         routes[stage.name] = (waypoints[:-1, 0], waypoints[:-1, 1]) + \
+                              GlobalCoordinateArray.from_llh(waypoints[:, 0], waypoints[:, 1], waypoints[:, 2]).compute_segment_enu()
+         speeds[stage.name] = float(speed)
+         densities[stage.name] = stage.maximum_density if stage.maximum_density is not None else 1025.0
+      return CurrentEnsemble(ocean_currents_model, depth).simulate(routes, speeds, densities, num_realizations, drag_area,
+                                                                   propulsive_efficiency, hotel_power, seed)
+
 # TODO: If glider, alter max_net_buoyancy to achieve required speeds at all depths
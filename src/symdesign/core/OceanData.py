@@ -0,0 +1,678 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+from .OceanGrid import OceanGrid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import hashlib, json, numpy, os, threading, zipfile
+
+
+def _read_npz_member(npz_path: Union[str, Path], name: str) -> numpy.ndarray:
+   """Decompresses a single array from an `.npz` archive directly into a preallocated array."""
+   with zipfile.ZipFile(npz_path) as archive, archive.open(name + '.npy') as member:
+      version = numpy.lib.format.read_magic(member)
+      shape, fortran_order, dtype = numpy.lib.format.read_array_header_1_0(member) if version == (1, 0) else \
+                                    numpy.lib.format.read_array_header_2_0(member)
+      if dtype.hasobject:
+         raise RuntimeError('Array "{}" in {} contains Python objects and cannot be loaded'.format(name, npz_path))
+      array = numpy.empty(shape, dtype=dtype, order='F' if fortran_order else 'C')
+      buffer = memoryview(array.reshape(-1, order='F' if fortran_order else 'C')).cast('B')
+      offset = 0
+      while offset < len(buffer):
+         num_bytes = member.readinto(buffer[offset:offset + (1 << 24)])
+         if num_bytes == 0:
+            raise RuntimeError('Array "{}" in {} is truncated'.format(name, npz_path))
+         offset += num_bytes
+   return array
+
+
+def read_npz_arrays(npz_path: Union[str, Path],
+                    names: Optional[Iterable[str]] = None,
+                    max_workers: Optional[int] = None) -> Dict[str, numpy.ndarray]:
+   """Returns a dictionary containing the specified arrays (or all arrays) from an `.npz`
+   archive, decompressing each archive member concurrently into its own preallocated array.
+
+   Since `zlib` releases the global interpreter lock while inflating data, the load time for an
+   archive containing several large arrays decreases roughly in proportion to the number of
+   available cores, up to the number of arrays being loaded."""
+   if names is None:
+      with zipfile.ZipFile(npz_path) as archive:
+         names = [member[:-4] for member in archive.namelist() if member.endswith('.npy')]
+   names = list(names)
+   if len(names) <= 1 or max_workers == 1:
+      return { name: _read_npz_member(npz_path, name) for name in names }
+   with ThreadPoolExecutor(max_workers=min(max_workers or os.cpu_count() or 1, len(names))) as executor:
+      futures = { name: executor.submit(_read_npz_member, npz_path, name) for name in names }
+      return { name: future.result() for name, future in futures.items() }
+
+
+def _worst_case_current_speed(u_mean: numpy.ndarray, u_std: numpy.ndarray,
+                              v_mean: numpy.ndarray, v_std: numpy.ndarray, sigma: float) -> numpy.ndarray:
+   return numpy.sqrt((numpy.abs(u_mean) + (sigma * u_std))**2 + (numpy.abs(v_mean) + (sigma * v_std))**2)
+
+
+def _modification_time(dataset_path: Path) -> int:
+   """Returns the most recent modification time (in `ns`) of the specified dataset, accounting
+   for its member `.npy` files or tile manifest if the dataset is a directory."""
+   modification_time = dataset_path.stat().st_mtime_ns
+   if dataset_path.is_dir():
+      modification_time = max([modification_time] + [member.stat().st_mtime_ns for member in dataset_path.glob('*.npy')] +
+                              [member.stat().st_mtime_ns for member in dataset_path.glob(TiledOceanDataset.MANIFEST_NAME)])
+   return modification_time
+
+
+def _time_window_samples(times: numpy.ndarray,
+                         time_window: Optional[Tuple[float, float]]) -> List[Tuple[int, float]]:
+   """Returns the (time_index, fraction) pairs at which to evaluate a time-varying field over the
+   specified time window, where each pair denotes a linear interpolation between the time slices
+   at `time_index` and `time_index + 1`. The window end points are always evaluated, along with
+   every time slice falling strictly within the window. Times outside of the range of the time
+   axis are clamped to its first or last slice."""
+   times = numpy.asarray(times, dtype=float).reshape(-1)
+   if times.size == 0 or numpy.any(numpy.diff(times) <= 0.0):
+      raise RuntimeError('The time axis of a time-varying dataset must be strictly increasing')
+   start_time, end_time = (times[0], times[-1]) if time_window is None else (float(time_window[0]), float(time_window[1]))
+   if end_time < start_time:
+      raise RuntimeError('The end of a time window cannot precede its start')
+   def locate(time: float) -> Tuple[int, float]:
+      if time <= times[0]:
+         return 0, 0.0
+      elif time >= times[-1]:
+         return times.size - 1, 0.0
+      index = int(numpy.searchsorted(times, time, side='right')) - 1
+      return index, float((time - times[index]) / (times[index + 1] - times[index]))
+   interior_indices = numpy.nonzero((times > start_time) & (times < end_time))[0].tolist()
+   return sorted(set([locate(start_time)] + [(index, 0.0) for index in interior_indices] + [locate(end_time)]))
+
+
+def _windowed_current_speeds(slices: Iterator[Tuple[numpy.ndarray, ...]],
+                             first_index: int,
+                             samples: List[Tuple[int, float]],
+                             sigma: float) -> numpy.ndarray:
+   """Folds a sequential stream of (u_mean, u_std, v_mean, v_std) time slices, beginning at time
+   index `first_index`, into the maximum worst-case current speed over all specified time window
+   samples. At most two time slices are held in memory at once."""
+   pending = sorted(samples, key=lambda sample: sample[0] + (1 if sample[1] > 0.0 else 0))
+   previous_slice, current_speeds = None, None
+   for time_index, current_slice in enumerate(slices, first_index):
+      while pending and pending[0][0] + (1 if pending[0][1] > 0.0 else 0) == time_index:
+         sample_index, fraction = pending.pop(0)
+         components = current_slice if fraction == 0.0 else \
+                      [((1.0 - fraction) * previous) + (fraction * current) for previous, current in zip(previous_slice, current_slice)]
+         speeds = _worst_case_current_speed(*components, sigma)
+         current_speeds = speeds if current_speeds is None else numpy.fmax(current_speeds, speeds)
+      if not pending:
+         break
+      previous_slice = current_slice
+   if pending:
+      raise RuntimeError('Time-varying ocean current data ended before time index {}'.format(pending[0][0]))
+   return current_speeds
+
+
+class OceanDataset(object):
+   """Read-only collection of the named arrays making up an environmental dataset.
+
+   A dataset may be stored either as a single `.npz` archive or as a directory containing one
+   uncompressed `.npy` file per named array. Archive members are decompressed into memory the
+   first time they are accessed, whereas directory members are opened as read-only memory maps
+   so that only the pages of data actually touched by a lookup are ever read from disk.
+
+   An ocean currents dataset may optionally contain a 'timeIndex' array of strictly increasing
+   times (in `s` since the Unix epoch), in which case its current arrays are indexed as
+   [time, depth, latitude, longitude]. Such arrays are only ever read one time slice at a time.
+   """
+
+
+   # Public attributes ----------------------------------------------------------------------------
+
+   path: Path
+   """Location of the `.npz` archive or `.npy` directory containing the dataset."""
+
+   memory_mapped: bool
+   """Whether the arrays in this dataset are memory-mapped from disk."""
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self, dataset_path: Union[str, Path],
+                      array_loaded_callback: Optional[Callable[[], None]] = None) -> None:
+      super().__init__()
+      self.path = Path(dataset_path)
+      self._arrays: Dict[str, numpy.ndarray] = {}
+      self._grids: Dict[bool, OceanGrid] = {}
+      self._current_speeds: Dict[Union[float, Tuple], numpy.ndarray] = {}
+      self._array_loaded_callback = array_loaded_callback
+      self._lock = threading.RLock()
+      self._open()
+
+
+   # Built-in method implementations --------------------------------------------------------------
+
+   def __repr__(self) -> str:
+      return 'OceanDataset({}: {})'.format(self.path, ', '.join(self._names))
+
+   def __str__(self) -> str:
+      return self.__repr__()
+
+   def __contains__(self, name: str) -> bool:
+      return name in self._names
+
+   def __getitem__(self, name: str) -> numpy.ndarray:
+      with self._lock:
+         if name not in self._arrays:
+            if name not in self._names:
+               raise KeyError('Array "{}" does not exist in the environmental dataset at {}'.format(name, self.path))
+            if self.memory_mapped:
+               self._arrays[name] = numpy.load(self.path.joinpath(name + '.npy'), mmap_mode='r')
+            else:
+               self._arrays[name] = self._archive[name]
+               if self._array_loaded_callback is not None:
+                  self._array_loaded_callback()
+         return self._arrays[name]
+
+
+   # Helper methods -------------------------------------------------------------------------------
+
+   def _open(self) -> None:
+      """Opens the storage backing this dataset and determines the names of its arrays."""
+      self.memory_mapped = self.path.is_dir()
+      if self.memory_mapped:
+         self._archive = None
+         self._names = sorted(member.stem for member in self.path.glob('*.npy'))
+      else:
+         self._archive = numpy.load(self.path)
+         self._names = list(self._archive.files)
+
+   def _read_uncached(self, names: List[str]) -> Dict[str, numpy.ndarray]:
+      """Returns the named arrays without retaining decompressed copies of them in this dataset,
+      decompressing any archive members concurrently."""
+      arrays = { name: self[name] for name in names if name in self._arrays or self.memory_mapped }
+      arrays.update(read_npz_arrays(self.path, [name for name in names if name not in arrays]))
+      return arrays
+
+   def _iterate_slices(self, name: str, start: int = 0) -> Iterator[numpy.ndarray]:
+      """Yields consecutive slices along the first axis of the named array, beginning at index
+      `start`, without ever decompressing the entire array into memory."""
+      if name in self._arrays or self.memory_mapped:
+         data = self[name]
+         for index in range(start, data.shape[0]):
+            yield data[index]
+         return
+      with zipfile.ZipFile(self.path) as archive, archive.open(name + '.npy') as member:
+         version = numpy.lib.format.read_magic(member)
+         shape, fortran_order, dtype = numpy.lib.format.read_array_header_1_0(member) if version == (1, 0) else \
+                                       numpy.lib.format.read_array_header_2_0(member)
+         if fortran_order or dtype.hasobject:
+            raise RuntimeError('Array "{}" in {} cannot be read one slice at a time'.format(name, self.path))
+         slice_shape = shape[1:]
+         slice_bytes = int(numpy.prod(slice_shape, dtype=numpy.int64)) * dtype.itemsize
+         bytes_to_skip = start * slice_bytes
+         while bytes_to_skip > 0:
+            skipped_bytes = len(member.read(min(bytes_to_skip, 1 << 20)))
+            if skipped_bytes == 0:
+               break
+            bytes_to_skip -= skipped_bytes
+         for _ in range(start, shape[0]):
+            yield numpy.frombuffer(member.read(slice_bytes), dtype=dtype).reshape(slice_shape)
+
+   def _compute_windowed_current_speeds(self, sigma: float, time_window: Optional[Tuple[float, float]]) -> numpy.ndarray:
+      samples = _time_window_samples(self['timeIndex'], time_window)
+      first_index = samples[0][0]
+      slices = zip(*(self._iterate_slices(name, first_index) for name in ('uMeanData', 'uStdData', 'vMeanData', 'vStdData')))
+      return _windowed_current_speeds(slices, first_index, samples, sigma)
+
+   def _missing_arrays(self, names: Optional[Iterable[str]]) -> List[str]:
+      """Returns the subset of the specified (or all) array names which exist in an `.npz`
+      dataset but have not yet been decompressed into memory."""
+      if self.memory_mapped:
+         return []
+      with self._lock:
+         return [name for name in (self._names if names is None else names)
+                 if name in self._names and name not in self._arrays]
+
+   def _store_arrays(self, arrays: Dict[str, numpy.ndarray]) -> None:
+      with self._lock:
+         for name, array in arrays.items():
+            self._arrays.setdefault(name, array)
+      if self._array_loaded_callback is not None:
+         self._array_loaded_callback()
+
+   def _current_speed_cache_path(self, sigma: float, cache_directory: Union[str, Path]) -> Path:
+      """Returns the path within the cache directory at which the worst-case current speed field of
+      this dataset is persisted, distinguishing datasets with identical names by their location."""
+      location_hash = hashlib.sha256(str(self.path.resolve()).encode('utf-8')).hexdigest()[:16]
+      return Path(cache_directory).joinpath('{}.{}.worst_case_speed_{}sigma.npy'.format(self.path.name, location_hash, float(sigma).hex()))
+
+   def _compute_current_speeds(self, sigma: float, output_path: Optional[Path]) -> numpy.ndarray:
+      """Computes the worst-case current speed field one depth layer at a time, writing it directly
+      into a new `.npy` file if an output path is specified."""
+      current_data = self._read_uncached(['uMeanData', 'uStdData', 'vMeanData', 'vStdData'])
+      u_mean_data, u_std_data, v_mean_data, v_std_data = (current_data[name] for name in
+                                                          ('uMeanData', 'uStdData', 'vMeanData', 'vStdData'))
+      dtype = numpy.result_type(u_mean_data, u_std_data, v_mean_data, v_std_data, float)
+      if output_path is None:
+         current_speeds = numpy.empty(u_mean_data.shape, dtype=dtype)
+      else:
+         current_speeds = numpy.lib.format.open_memmap(output_path, mode='w+', dtype=dtype, shape=u_mean_data.shape)
+      for depth_index in range(u_mean_data.shape[0]):
+         current_speeds[depth_index] = _worst_case_current_speed(u_mean_data[depth_index], u_std_data[depth_index],
+                                                                 v_mean_data[depth_index], v_std_data[depth_index], sigma)
+      if output_path is not None:
+         current_speeds.flush()
+      return current_speeds
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   def keys(self) -> List[str]:
+      """Returns the names of all arrays stored in the dataset."""
+      return list(self._names)
+
+   def preload(self, names: Optional[Iterable[str]] = None, max_workers: Optional[int] = None) -> None:
+      """Decompresses the specified (or all) arrays of an `.npz` dataset into memory concurrently,
+      rather than one at a time as they are accessed. Memory-mapped datasets are unaffected."""
+      with self._lock:
+         missing_names = self._missing_arrays(names)
+         if missing_names:
+            self._store_arrays(read_npz_arrays(self.path, missing_names, max_workers))
+
+   def grid(self, with_depth: bool = True) -> OceanGrid:
+      """Returns the (cached) `OceanGrid` index over the axes of this dataset."""
+      with self._lock:
+         if with_depth not in self._grids:
+            self._grids[with_depth] = OceanGrid.from_dataset(self, with_depth)
+         return self._grids[with_depth]
+
+   def worst_case_current_speeds(self, sigma: float = 2.0,
+                                       time_window: Optional[Tuple[float, float]] = None,
+                                       cache_directory: Union[str, Path, None] = None) -> numpy.ndarray:
+      """Returns the worst-case ocean current speed field (in `m/s`) indexed as
+      [depth, latitude, longitude] for an ocean currents dataset.
+
+      The worst-case speed at each grid cell is computed as
+      sqrt((|u_mean| + sigma * u_std)^2 + (|v_mean| + sigma * v_std)^2). The field is derived only
+      once per `sigma` multiplier and kept in memory. If a `cache_directory` is specified, the field
+      is instead persisted there as an uncompressed `.npy` file, so that later runs memory-map
+      this single array instead of reading all four underlying current arrays. Nothing is ever
+      written next to the dataset itself, and if the cache file cannot be written, the field is
+      kept in memory.
+
+      For a time-varying dataset, the field is instead the maximum worst-case speed over the
+      specified (start, end) `time_window` (in `s` since the Unix epoch), or over all times if no
+      window is specified. Current components are linearly interpolated in time to each end of
+      the window, and only the time slices overlapping the window are ever read. Since the
+      worst-case speed is convex in the current components, this maximum is exact over the entire
+      window. A time window has no effect on a dataset without a time axis."""
+      sigma = float(sigma)
+      with self._lock:
+         if 'timeIndex' in self:
+            key = (sigma,) + (() if time_window is None else (float(time_window[0]), float(time_window[1])))
+            if key not in self._current_speeds:
+               self._current_speeds[key] = self._compute_windowed_current_speeds(sigma, time_window)
+               if self._array_loaded_callback is not None:
+                  self._array_loaded_callback()
+            return self._current_speeds[key]
+         if sigma not in self._current_speeds and cache_directory is not None:
+            cache_path = self._current_speed_cache_path(sigma, cache_directory)
+            if cache_path.exists() and cache_path.stat().st_mtime_ns >= _modification_time(self.path):
+               self._current_speeds[sigma] = numpy.load(cache_path, mmap_mode='r')
+            else:
+               temporary_path = cache_path.with_name('{}.{}.tmp.npy'.format(cache_path.stem, os.getpid()))
+               try:
+                  cache_path.parent.mkdir(parents=True, exist_ok=True)
+                  self._compute_current_speeds(sigma, temporary_path)
+                  os.replace(temporary_path, cache_path)
+                  self._current_speeds[sigma] = numpy.load(cache_path, mmap_mode='r')
+               except OSError:
+                  temporary_path.unlink(missing_ok=True)
+         if sigma not in self._current_speeds:
+            self._current_speeds[sigma] = self._compute_current_speeds(sigma, None)
+            if self._array_loaded_callback is not None:
+               self._array_loaded_callback()
+         return self._current_speeds[sigma]
+
+   def resident_bytes(self) -> int:
+      """Returns the number of bytes of array data currently held in memory by this dataset,
+      excluding any file-backed memory-mapped arrays."""
+      return sum(array.nbytes for array in list(self._arrays.values()) + list(self._current_speeds.values())
+                 if not isinstance(array, numpy.memmap))
+
+   @staticmethod
+   def convert_to_memory_mappable(npz_path: Union[str, Path], output_path: Union[str, Path]) -> Path:
+      """Converts an `.npz` environmental dataset into a directory of uncompressed `.npy` files
+      that can be memory-mapped, returning the path to the resulting directory."""
+      output_path = Path(output_path)
+      output_path.mkdir(parents=True, exist_ok=True)
+      with zipfile.ZipFile(npz_path) as archive:
+         names = [member[:-4] for member in archive.namelist() if member.endswith('.npy')]
+      def convert(name: str) -> None:
+         numpy.save(output_path.joinpath(name + '.npy'), _read_npz_member(npz_path, name))
+      with ThreadPoolExecutor(max_workers=max(min(os.cpu_count() or 1, len(names)), 1)) as executor:
+         for _ in executor.map(convert, names):
+            pass
+      return output_path
+
+
+class _TiledArray(object):
+   """Lazily loaded array whose latitude and longitude dimensions are split into fixed-size
+   tiles, supporting integer and integer-array indexing of individual elements. Slices and
+   other basic indexing are not supported and raise a `TypeError`."""
+
+   def __init__(self, shape: Tuple[int, ...], dtype: numpy.dtype,
+                      latitude_axis: int, longitude_axis: int, tile_size: Tuple[int, int],
+                      load_tile: Callable[[int, int], numpy.ndarray]) -> None:
+      super().__init__()
+      self.shape, self.dtype, self.ndim = tuple(shape), numpy.dtype(dtype), len(shape)
+      self.latitude_axis, self.longitude_axis = latitude_axis, longitude_axis
+      self.tile_size = tile_size
+      self._num_tile_columns = -(-self.shape[longitude_axis] // tile_size[1])
+      self._load_tile = load_tile
+
+   def __getitem__(self, key) -> numpy.ndarray:
+      key = key if isinstance(key, tuple) else (key,)
+      if len(key) != self.ndim:
+         raise IndexError('Tiled arrays must be indexed by exactly {} integer indices'.format(self.ndim))
+      indices = []
+      for index in key:
+         index = None if isinstance(index, slice) or index is Ellipsis else numpy.asarray(index)
+         if index is None or index.dtype.kind not in 'iu':
+            raise TypeError('Tiled arrays only support integer and integer-array indices, not {}'.format(key))
+         indices.append(index.astype(numpy.intp, copy=False))
+      indices = numpy.broadcast_arrays(*indices)
+      result_shape = indices[0].shape
+      indices = [numpy.where(index < 0, index + length, index).reshape(-1) for index, length in zip(indices, self.shape)]
+      tile_rows = indices[self.latitude_axis] // self.tile_size[0]
+      tile_columns = indices[self.longitude_axis] // self.tile_size[1]
+      tile_ids = (tile_rows * self._num_tile_columns) + tile_columns
+      order = numpy.argsort(tile_ids, kind='stable')
+      unique_tile_ids, group_starts = numpy.unique(tile_ids[order], return_index=True)
+      group_ends = numpy.append(group_starts[1:], len(order))
+      result = numpy.empty(len(order), dtype=self.dtype)
+      for tile_id, start, end in zip(unique_tile_ids.tolist(), group_starts, group_ends):
+         row, column = divmod(tile_id, self._num_tile_columns)
+         members = order[start:end]
+         local_indices = [index[members] for index in indices]
+         local_indices[self.latitude_axis] -= row * self.tile_size[0]
+         local_indices[self.longitude_axis] -= column * self.tile_size[1]
+         result[members] = self._load_tile(row, column)[tuple(local_indices)]
+      return result.reshape(result_shape)[()]
+
+
+class TiledOceanDataset(OceanDataset):
+   """Environmental dataset whose gridded arrays are stored as a directory of fixed-size
+   latitude/longitude tiles described by a `manifest.json` file.
+
+   The dataset axes ('latIndex', 'lonIndex', and 'depthIndex') and any other non-gridded arrays
+   are stored as `.npy` files in the top-level dataset directory, while each gridded array is
+   stored as a subdirectory of compressed `<row>_<col>.npz` tiles. Tiles are only read and
+   decoded when an element within them is first accessed, and the most recently used decoded
+   tiles are kept in memory, up to a maximum of `maximum_cached_tiles`. A regional route thus
+   only ever reads the handful of tiles that it actually intersects, regardless of the total
+   size of the dataset.
+   """
+
+   MANIFEST_NAME = 'manifest.json'
+   """Name of the manifest file describing the layout of a tiled dataset."""
+
+   maximum_cached_tiles: int = 256
+   """Maximum number of decoded tiles to keep in memory per dataset."""
+
+
+   # Built-in method implementations --------------------------------------------------------------
+
+   def __repr__(self) -> str:
+      return 'TiledOceanDataset({}: {})'.format(self.path, ', '.join(self._names))
+
+   def __getitem__(self, name: str) -> Union[numpy.ndarray, _TiledArray]:
+      with self._lock:
+         if name not in self._arrays and name in self._manifest['arrays']:
+            layout = self._manifest['arrays'][name]
+            self._arrays[name] = _TiledArray(layout['shape'], layout['dtype'], layout['latitude_axis'],
+                                             layout['longitude_axis'], self._tile_size,
+                                             lambda row, column: self._tile(name, row, column))
+         return super().__getitem__(name)
+
+
+   # Helper methods -------------------------------------------------------------------------------
+
+   def _open(self) -> None:
+      """Reads the manifest of this dataset, leaving all tiles to be loaded on first access."""
+      self.memory_mapped = True
+      self._archive = None
+      with open(self.path.joinpath(TiledOceanDataset.MANIFEST_NAME), 'r') as manifest_file:
+         self._manifest = json.load(manifest_file)
+      self._tile_size = tuple(self._manifest['tile_size'])
+      self._tiles: OrderedDict = OrderedDict()
+      self._names = sorted(list(self._manifest['arrays']) + [member.stem for member in self.path.glob('*.npy')])
+
+   def _tile(self, name: str, row: int, column: int) -> numpy.ndarray:
+      """Returns the decoded tile of the named array at the specified tile row and column,
+      reading it from disk if it is not already cached."""
+      key = (name, row, column)
+      with self._lock:
+         tile = self._tiles.get(key)
+         if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+         with numpy.load(self.path.joinpath(name, '{}_{}.npz'.format(row, column))) as tile_file:
+            tile = tile_file['tile']
+         self._cache_tile(key, tile)
+         return tile
+
+   def _cache_tile(self, key: Tuple, tile: numpy.ndarray) -> None:
+      self._tiles[key] = tile
+      while len(self._tiles) > TiledOceanDataset.maximum_cached_tiles:
+         self._tiles.popitem(last=False)
+      if self._array_loaded_callback is not None:
+         self._array_loaded_callback()
+
+   @staticmethod
+   def _grid_axes(name: str, shape: Tuple[int, ...],
+                  num_latitudes: int, num_longitudes: int) -> Optional[Tuple[int, int]]:
+      """Returns the (latitude, longitude) axes of the named array with the specified shape, or
+      `None` if the array is not gridded over latitude and longitude."""
+      if name in ('zMat', 'data'):
+         grid_axes = (0, 1)
+      elif name in ('uMeanData', 'uStdData', 'vMeanData', 'vStdData'):
+         grid_axes = (len(shape) - 2, len(shape) - 1)
+      else:
+         candidates = [(latitude_axis, longitude_axis) for latitude_axis in range(len(shape))
+                       for longitude_axis in range(latitude_axis + 1, len(shape))
+                       if shape[latitude_axis] == num_latitudes and shape[longitude_axis] == num_longitudes]
+         if len(candidates) > 1:
+            raise RuntimeError('The latitude and longitude axes of array "{}" with shape {} are ambiguous'.format(name, shape))
+         return candidates[0] if candidates else None
+      if len(shape) < 2 or shape[grid_axes[0]] != num_latitudes or shape[grid_axes[1]] != num_longitudes:
+         raise RuntimeError('Array "{}" with shape {} does not match the dataset latitude and longitude indices'.format(name, shape))
+      return grid_axes
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   def worst_case_current_speeds(self, sigma: float = 2.0,
+                                       time_window: Optional[Tuple[float, float]] = None,
+                                       cache_directory: Union[str, Path, None] = None) -> _TiledArray:
+      """Returns a lazily tiled worst-case ocean current speed field (in `m/s`) indexed as
+      [depth, latitude, longitude], computed for each tile as
+      sqrt((|u_mean| + sigma * u_std)^2 + (|v_mean| + sigma * v_std)^2) when first accessed.
+      For a time-varying dataset, each tile holds the maximum worst-case speed over the specified
+      `time_window`, as described in `OceanDataset.worst_case_current_speeds()`. Since only the
+      tiles actually accessed are ever computed, `cache_directory` is unused."""
+      sigma = float(sigma)
+      time_varying = 'timeIndex' in self
+      key = (sigma,) + (() if time_window is None else (float(time_window[0]), float(time_window[1]))) \
+            if time_varying else sigma
+      with self._lock:
+         if key not in self._current_speeds:
+            u_mean_data = self['uMeanData']
+            samples = _time_window_samples(self['timeIndex'], time_window) if time_varying else None
+            tile_key_prefix = 'worst_case_speed_{}'.format(key)
+            def load_tile(row: int, column: int) -> numpy.ndarray:
+               tile_key = (tile_key_prefix, row, column)
+               with self._lock:
+                  tile = self._tiles.get(tile_key)
+                  if tile is None:
+                     components = [self._tile(name, row, column) for name in ('uMeanData', 'uStdData', 'vMeanData', 'vStdData')]
+                     if samples is None:
+                        tile = _worst_case_current_speed(*components, sigma)
+                     else:
+                        first_index = samples[0][0]
+                        tile = _windowed_current_speeds(zip(*(component[first_index:] for component in components)),
+                                                        first_index, samples, sigma)
+                     self._cache_tile(tile_key, tile)
+                  else:
+                     self._tiles.move_to_end(tile_key)
+                  return tile
+            field_shape = u_mean_data.shape[1:] if time_varying else u_mean_data.shape
+            axis_offset = 1 if time_varying else 0
+            self._current_speeds[key] = _TiledArray(field_shape, float, u_mean_data.latitude_axis - axis_offset,
+                                                    u_mean_data.longitude_axis - axis_offset, self._tile_size, load_tile)
+         return self._current_speeds[key]
+
+   def resident_bytes(self) -> int:
+      """Returns the number of bytes of decoded tile data currently held in memory by this
+      dataset, excluding any file-backed memory-mapped arrays."""
+      return sum(tile.nbytes for tile in list(self._tiles.values()))
+
+   @staticmethod
+   def is_tiled_dataset(dataset_path: Union[str, Path]) -> bool:
+      """Returns whether the specified path contains a tiled environmental dataset."""
+      return Path(dataset_path).joinpath(TiledOceanDataset.MANIFEST_NAME).is_file()
+
+   @staticmethod
+   def convert_to_tiles(dataset_path: Union[str, Path],
+                        output_path: Union[str, Path],
+                        tile_size: Tuple[int, int] = (256, 256)) -> Path:
+      """Converts an `.npz` or `.npy` directory environmental dataset into a tiled dataset with
+      the specified (latitude, longitude) tile size, returning the path to the tiled dataset.
+
+      Arrays with a known layout are tiled along their latitude and longitude axes: 'zMat' is
+      indexed as [latitude, longitude], 'data' as [latitude, longitude, depth], and the current
+      arrays as [(time,) depth, latitude, longitude]. Any other array with exactly one dimension
+      matching the length of 'latIndex' followed by another matching the length of 'lonIndex' is
+      also tiled, and a `RuntimeError` is raised if more than one pair of dimensions matches. All
+      remaining arrays are copied as-is. Memory-mapped source datasets are converted one tile at a time, while all
+      members of an `.npz` source dataset are first decompressed concurrently."""
+      source = OceanDataset(dataset_path)
+      source.preload()
+      output_path = Path(output_path)
+      output_path.mkdir(parents=True, exist_ok=True)
+      num_latitudes, num_longitudes = len(source['latIndex']), len(source['lonIndex'])
+      manifest = { 'version': 1, 'tile_size': list(tile_size), 'arrays': {} }
+      for name in source.keys():
+         data = source[name]
+         grid_axes = None if name in ('latIndex', 'lonIndex', 'depthIndex', 'timeIndex') else \
+                     TiledOceanDataset._grid_axes(name, data.shape, num_latitudes, num_longitudes)
+         if grid_axes is None:
+            numpy.save(output_path.joinpath(name + '.npy'), numpy.asarray(data))
+            continue
+         latitude_axis, longitude_axis = grid_axes
+         manifest['arrays'][name] = { 'shape': list(data.shape), 'dtype': data.dtype.str,
+                                      'latitude_axis': latitude_axis, 'longitude_axis': longitude_axis }
+         output_path.joinpath(name).mkdir(exist_ok=True)
+         for row, lat_start in enumerate(range(0, num_latitudes, tile_size[0])):
+            for column, lon_start in enumerate(range(0, num_longitudes, tile_size[1])):
+               tile_slice = [slice(None)] * data.ndim
+               tile_slice[latitude_axis] = slice(lat_start, lat_start + tile_size[0])
+               tile_slice[longitude_axis] = slice(lon_start, lon_start + tile_size[1])
+               numpy.savez_compressed(output_path.joinpath(name, '{}_{}.npz'.format(row, column)),
+                                      tile=numpy.ascontiguousarray(data[tuple(tile_slice)]))
+      with open(output_path.joinpath(TiledOceanDataset.MANIFEST_NAME), 'w') as manifest_file:
+         json.dump(manifest, manifest_file, indent=2)
+      return output_path
+
+
+class OceanEnvironment(object):
+   """Process-wide cache of loaded environmental datasets shared by all mission stages.
+
+   Datasets may be `.npz` archives, memory-mappable `.npy` directories, or tiled datasets (see
+   `TiledOceanDataset`), and they are keyed by their resolved path and modification time, so
+   that every mission stage and `Designer` in a process reuses the same decompressed arrays and
+   grid indices, while a dataset that changes on disk is transparently reloaded. Whenever the total in-memory size of
+   all cached datasets exceeds `memory_limit_bytes`, the least-recently-used datasets are evicted
+   from the cache. Memory-mapped arrays are backed by their files and do not count toward this
+   limit.
+   """
+
+   memory_limit_bytes: int = 4 * 1024 * 1024 * 1024
+   """Maximum number of bytes of array data to keep cached across all datasets."""
+
+   _cache: OrderedDict = OrderedDict()
+   _lock = threading.RLock()
+
+
+   # Helper methods -------------------------------------------------------------------------------
+
+   @staticmethod
+   def _cache_key(dataset_path: Union[str, Path]) -> Tuple[Path, int]:
+      path = Path(dataset_path).resolve()
+      return path, _modification_time(path)
+
+   @staticmethod
+   def _enforce_memory_limit() -> None:
+      with OceanEnvironment._lock:
+         resident_bytes = sum(dataset.resident_bytes() for dataset in OceanEnvironment._cache.values())
+         while resident_bytes > OceanEnvironment.memory_limit_bytes and len(OceanEnvironment._cache) > 1:
+            _, evicted_dataset = OceanEnvironment._cache.popitem(last=False)
+            resident_bytes -= evicted_dataset.resident_bytes()
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   @staticmethod
+   def load(dataset_path: Union[str, Path]) -> OceanDataset:
+      """Returns the cached `OceanDataset` for the specified path, loading it if necessary."""
+      key = OceanEnvironment._cache_key(dataset_path)
+      with OceanEnvironment._lock:
+         dataset = OceanEnvironment._cache.get(key)
+         if dataset is None:
+            for stale_key in [cached_key for cached_key in OceanEnvironment._cache if cached_key[0] == key[0]]:
+               del OceanEnvironment._cache[stale_key]
+            dataset_type = TiledOceanDataset if TiledOceanDataset.is_tiled_dataset(key[0]) else OceanDataset
+            dataset = dataset_type(key[0], OceanEnvironment._enforce_memory_limit)
+            OceanEnvironment._cache[key] = dataset
+         OceanEnvironment._cache.move_to_end(key)
+         OceanEnvironment._enforce_memory_limit()
+      return dataset
+
+   @staticmethod
+   def preload(dataset_arrays: Dict[str, Optional[List[str]]], max_workers: Optional[int] = None) -> None:
+      """Loads each dataset path in the specified dictionary into the cache and concurrently
+      decompresses the listed arrays (or all arrays, if `None`) across all of those datasets."""
+      members = []
+      for path, names in dataset_arrays.items():
+         dataset = OceanEnvironment.load(path)
+         members += [(dataset, name) for name in dataset._missing_arrays(names)]
+      if members:
+         with ThreadPoolExecutor(max_workers=min(max_workers or os.cpu_count() or 1, len(members))) as executor:
+            arrays = list(executor.map(lambda member: _read_npz_member(member[0].path, member[1]), members))
+         for (dataset, name), array in zip(members, arrays):
+            dataset._store_arrays({ name: array })
+
+   @staticmethod
+   def set_memory_limit(num_bytes: int) -> None:
+      """Sets the maximum number of bytes of array data to keep cached across all datasets."""
+      OceanEnvironment.memory_limit_bytes = num_bytes
+      OceanEnvironment._enforce_memory_limit()
+
+   @staticmethod
+   def clear() -> None:
+      """Removes all datasets from the cache."""
+      with OceanEnvironment._lock:
+         OceanEnvironment._cache.clear()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+from typing import Optional, Tuple
+import bisect, numpy
+
+
+class _SortedAxis(object):
+   """Sorted search index over a single grid axis, padded with its own wrapped end points if the
+   axis is periodic."""
+
+   def __init__(self, axis: numpy.ndarray, period: Optional[float]) -> None:
+      super().__init__()
+      order = numpy.argsort(axis, kind='stable')
+      sorted_axis = axis[order]
+      if period is not None:
+         sorted_axis = numpy.concatenate(([sorted_axis[-1] - period], sorted_axis, [sorted_axis[0] + period]))
+         order = numpy.concatenate(([order[-1]], order, [order[0]]))
+      self.period = period
+      self.lower_bound = float(sorted_axis[1]) if period is not None else None
+      self.sorted_axis, self.order = sorted_axis, order
+      self.sorted_list, self.order_list = sorted_axis.tolist(), order.tolist()
+
+   def _search_scalar(self, value: float) -> int:
+      if self.period is not None and not (self.lower_bound <= value < self.lower_bound + self.period):
+         value = ((value - self.lower_bound) % self.period) + self.lower_bound
+      if len(self.sorted_list) == 1:
+         return 0
+      right = min(max(bisect.bisect_left(self.sorted_list, value), 1), len(self.sorted_list) - 1)
+      left_distance = abs(value - self.sorted_list[right-1])
+      right_distance = abs(self.sorted_list[right] - value)
+      left_index, right_index = self.order_list[right-1], self.order_list[right]
+      if left_distance < right_distance or (left_distance == right_distance and left_index < right_index):
+         return left_index
+      return right_index
+
+   def search(self, values):
+      """Returns the original axis index of the closest axis value to each of the specified
+      values using a binary search over the sorted axis."""
+      if numpy.ndim(values) == 0:
+         return self._search_scalar(float(values))
+      values = numpy.asarray(values, dtype=float)
+      if self.period is not None:
+         values = numpy.where((values >= self.lower_bound) & (values < self.lower_bound + self.period), values,
+                              ((values - self.lower_bound) % self.period) + self.lower_bound)
+      if self.sorted_axis.size == 1:
+         return numpy.zeros(values.shape, dtype=numpy.intp)
+      right = numpy.clip(numpy.searchsorted(self.sorted_axis, values), 1, self.sorted_axis.size - 1)
+      left = right - 1
+      left_distance = numpy.abs(values - self.sorted_axis[left])
+      right_distance = numpy.abs(self.sorted_axis[right] - values)
+      left_index, right_index = self.order[left], self.order[right]
+      use_left = (left_distance < right_distance) | ((left_distance == right_distance) & (left_index < right_index))
+      return numpy.where(use_left, left_index, right_index)
+
+
+class OceanGrid(object):
+   """Nearest-cell index over the latitude, longitude, and (optional) depth axes of a gridded
+   environmental dataset.
+
+   Each axis is sorted once upon construction so that nearest-cell queries require only a
+   binary search, i.e., O(log n) per coordinate. Queries accept either scalars or arrays, and
+   longitudes are treated as periodic so that coordinates near the antimeridian or outside of
+   the range of the underlying axis resolve to the angularly closest grid cell. Apart from
+   wrap-around, results are identical to an `argmin` search over the absolute axis differences,
+   including its preference for the first axis index when two cells are equidistant.
+   """
+
+
+   # Public attributes ----------------------------------------------------------------------------
+
+   latitudes: numpy.ndarray
+   """Latitude axis of the underlying grid (in `deg`)."""
+
+   longitudes: numpy.ndarray
+   """Longitude axis of the underlying grid (in `deg`)."""
+
+   depths: Optional[numpy.ndarray]
+   """Depth axis of the underlying grid (in `m`), or `None` for a 2-D surface grid."""
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self, latitudes: numpy.ndarray,
+                      longitudes: numpy.ndarray,
+                      depths: Optional[numpy.ndarray] = None) -> None:
+      super().__init__()
+      self.latitudes = numpy.asarray(latitudes, dtype=float).reshape(-1)
+      self.longitudes = numpy.asarray(longitudes, dtype=float).reshape(-1)
+      self.depths = None if depths is None else numpy.asarray(depths, dtype=float).reshape(-1)
+      if self.latitudes.size == 0 or self.longitudes.size == 0 or \
+            (self.depths is not None and self.depths.size == 0):
+         raise ValueError('OceanGrid axes must each contain at least one value')
+      self._latitude_axis = _SortedAxis(self.latitudes, None)
+      self._longitude_axis = _SortedAxis(self.longitudes, 360.0)
+      self._depth_axis = None if self.depths is None else _SortedAxis(self.depths, None)
+
+
+   # Built-in method implementations --------------------------------------------------------------
+
+   def __repr__(self) -> str:
+      return 'OceanGrid({} lats x {} lons{})'.format(
+         self.latitudes.size, self.longitudes.size,
+         '' if self.depths is None else ' x {} depths'.format(self.depths.size))
+
+   def __str__(self) -> str:
+      return self.__repr__()
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   @staticmethod
+   def from_dataset(dataset, with_depth: bool = True) -> OceanGrid:
+      """Creates an `OceanGrid` from the 'latIndex', 'lonIndex', and (optionally) 'depthIndex'
+      members of a loaded environmental dataset."""
+      return OceanGrid(dataset['latIndex'], dataset['lonIndex'],
+                       dataset['depthIndex'] if with_depth else None)
+
+   def latitude_index(self, latitude):
+      """Returns the index of the closest grid latitude to each specified latitude."""
+      return self._latitude_axis.search(latitude)
+
+   def longitude_index(self, longitude):
+      """Returns the index of the closest grid longitude to each specified longitude."""
+      return self._longitude_axis.search(longitude)
+
+   def depth_index(self, depth):
+      """Returns the index of the closest grid depth to each specified depth."""
+      if self._depth_axis is None:
+         raise RuntimeError('Unable to look up a depth index in an OceanGrid without a depth axis')
+      return self._depth_axis.search(depth)
+
+   def nearest(self, latitude, longitude, depth=None) -> Tuple:
+      """Returns a tuple containing the (latitude, longitude) or (latitude, longitude, depth)
+      indices of the closest grid cell to each of the specified coordinates."""
+      if depth is None:
+         return self.latitude_index(latitude), self.longitude_index(longitude)
+      return self.latitude_index(latitude), self.longitude_index(longitude), self.depth_index(depth)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def _is_less(first: Any, second: Any) -> bool:
+   """Returns whether `first` is definitely less than `second`, treating values whose order
+   cannot be determined (e.g., symbolic expressions) as not less."""
+   try:
+      return bool(first < second)
+   except TypeError:
+      return False
+
+
+class ConstraintPropagator(object):
+   """Worklist-based constraint propagation engine over the attributes of a set of objects.
+
+   Each quantity is identified by an (owner, attribute_name) pair, and each rule is a function
+   which reads any number of input quantities and updates output quantities using `set()`. The
+   dependency graph from quantities to the rules that read them is built once as rules are added.
+   Calling `propagate()` then evaluates every rule once, after which a rule is only re-evaluated
+   when one of its inputs actually changes, until a fixpoint is reached. Rules must therefore
+   only ever assign a missing value or monotonically tighten an existing one.
+   """
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self) -> None:
+      super().__init__()
+      self._rules: List[Callable[[], None]] = []
+      self._dependents: Dict[Tuple[int, str], List[int]] = {}
+      self._pending: deque = deque()
+      self._is_pending: List[bool] = []
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   @property
+   def num_rules(self) -> int:
+      """Number of rules registered with the propagator."""
+      return len(self._rules)
+
+   def add_rule(self, inputs: Iterable[Tuple[Any, str]], rule: Callable[[], None]) -> None:
+      """Registers a rule which must be re-evaluated whenever any of its (owner, attribute_name)
+      input quantities changes."""
+      rule_index = len(self._rules)
+      self._rules.append(rule)
+      self._is_pending.append(False)
+      dependents = self._dependents
+      for owner, name in inputs:
+         key = (id(owner), name)
+         if key in dependents:
+            dependents[key].append(rule_index)
+         else:
+            dependents[key] = [rule_index]
+
+   def set(self, owner: Any, name: str, value: Any) -> bool:
+      """Assigns a value to the specified quantity, scheduling all dependent rules for
+      re-evaluation if the value changed. Returns whether the value changed."""
+      current_value = getattr(owner, name)
+      if current_value is None:
+         if value is None:
+            return False
+      elif value is not None and (current_value is value or not bool(current_value != value)):
+         return False
+      setattr(owner, name, value)
+      for rule_index in self._dependents.get((id(owner), name), ()):
+         if not self._is_pending[rule_index]:
+            self._is_pending[rule_index] = True
+            self._pending.append(rule_index)
+      return True
+
+   def tighten_lower(self, owner: Any, name: str, value: Any) -> bool:
+      """Raises the specified lower bound to `value` if it is missing or lower, such that the
+      result does not depend on the order in which rules are evaluated. An existing bound is left
+      unchanged if it cannot be compared to `value`, e.g., when either one is symbolic. Returns
+      whether the bound changed."""
+      current_value = getattr(owner, name)
+      return self.set(owner, name, value) if current_value is None or _is_less(current_value, value) else False
+
+   def tighten_upper(self, owner: Any, name: str, value: Any) -> bool:
+      """Lowers the specified upper bound to `value` if it is missing or higher, such that the
+      result does not depend on the order in which rules are evaluated. An existing bound is left
+      unchanged if it cannot be compared to `value`, e.g., when either one is symbolic. Returns
+      whether the bound changed."""
+      current_value = getattr(owner, name)
+      return self.set(owner, name, value) if current_value is None or _is_less(value, current_value) else False
+
+   def propagate(self, max_evaluations: Optional[int] = None) -> int:
+      """Evaluates all rules until no quantity changes, returning the number of rule evaluations.
+      Raises a `RuntimeError` if no fixpoint is reached within `max_evaluations` evaluations
+      (defaulting to 100 evaluations per rule)."""
+      max_evaluations = (100 * len(self._rules)) if max_evaluations is None else max_evaluations
+      for rule_index in range(len(self._rules)):
+         if not self._is_pending[rule_index]:
+            self._is_pending[rule_index] = True
+            self._pending.append(rule_index)
+      num_evaluations = 0
+      while self._pending:
+         if num_evaluations >= max_evaluations:
+            raise RuntimeError('Constraint propagation did not converge within {} rule evaluations'
+                               .format(max_evaluations))
+         rule_index = self._pending.popleft()
+         self._is_pending[rule_index] = False
+         self._rules[rule_index]()
+         num_evaluations += 1
+      return num_evaluations
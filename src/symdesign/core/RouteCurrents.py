@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+from .OceanData import OceanDataset, OceanEnvironment
+from typing import Tuple
+import numpy
+
+
+class RouteCurrentProfile(object):
+   """Ocean currents projected onto the heading of every segment of a route, along with the
+   resulting relation between the speed of a vehicle through the water and its speed over the
+   ground on each segment.
+
+   A vehicle holding a constant speed through the water V while tracking a segment must crab
+   into the cross-track current component c_x, so that its speed over the ground along the
+   segment is c_a + sqrt(V^2 - c_x^2), where c_a is the along-track current component. The
+   segment is untraversable if |c_x| >= V or if the resulting speed over the ground is not
+   positive. All quantities are evaluated as array operations over every segment at once, and
+   every method accepting speeds accepts either a single speed or an array of candidate speeds.
+
+   The current components may also have leading axes in front of the segment axis, such as the
+   realizations of a `CurrentEnsemble`, in which case each method evaluates every one of them at
+   once, with a speed given for each.
+   """
+
+
+   # Public attributes ----------------------------------------------------------------------------
+
+   lengths: numpy.ndarray
+   """Length of each route segment (in `m`)."""
+
+   along_track_currents: numpy.ndarray
+   """Current component along the direction of travel of each segment (in `m/s`, positive when
+   assisting the vehicle)."""
+
+   cross_track_currents: numpy.ndarray
+   """Absolute value of the current component perpendicular to each segment (in `m/s`)."""
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self, lengths: numpy.ndarray,
+                      along_track_currents: numpy.ndarray,
+                      cross_track_currents: numpy.ndarray) -> None:
+      super().__init__()
+      self.lengths = numpy.asarray(lengths, dtype=float)
+      self.along_track_currents = numpy.asarray(along_track_currents, dtype=float)
+      self.cross_track_currents = numpy.abs(numpy.asarray(cross_track_currents, dtype=float))
+
+
+   # Built-in method implementations --------------------------------------------------------------
+
+   def __repr__(self) -> str:
+      return 'RouteCurrentProfile({} segments, {:.3f} km, max opposing current {:.3f} m/s)' \
+             .format(len(self.lengths), 0.001 * self.distance, self.maximum_opposing_current)
+
+   def __str__(self) -> str:
+      return self.__repr__()
+
+
+   # Helper methods -------------------------------------------------------------------------------
+
+   def _transit_durations_and_derivatives(self, speeds: numpy.ndarray,
+                                                squared_cross_track_currents: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+      """Returns the total transit duration (in `s`) at each of the specified speeds through the
+      water (in `m/s`) for a profile without any zero-length segments, as in
+      `transit_durations()`, along with its derivative with respect to the speed (in `s^2/m`),
+      which is infinite wherever the duration is."""
+      speeds = numpy.asarray(speeds, dtype=float)
+      with numpy.errstate(divide='ignore', invalid='ignore'):
+         margins = numpy.square(speeds)[..., numpy.newaxis] - squared_cross_track_currents
+         numpy.sqrt(margins, out=margins)
+         speeds_over_ground = margins + self.along_track_currents
+         is_traversable = (numpy.minimum(margins, speeds_over_ground) > 0.0).all(axis=-1)
+         segment_durations = self.lengths / speeds_over_ground
+         transit_durations = segment_durations.sum(axis=-1)
+         segment_durations /= speeds_over_ground
+         segment_durations /= margins
+         derivatives = -speeds * segment_durations.sum(axis=-1)
+      return numpy.where(is_traversable, transit_durations, numpy.inf), numpy.where(is_traversable, derivatives, -numpy.inf)
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   @staticmethod
+   def from_route(ocean_currents_model: str,
+                  latitudes: numpy.ndarray,
+                  longitudes: numpy.ndarray,
+                  east: numpy.ndarray,
+                  north: numpy.ndarray,
+                  up: numpy.ndarray,
+                  depth: float = 10.0,
+                  sigma: float = 0.0) -> RouteCurrentProfile:
+      """Creates a current profile from the starting latitudes and longitudes (in `degrees`) of
+      each route segment, along with the eastward, northward, and upward components of each
+      segment (in `m`), by sampling the mean ocean currents of a static ocean currents dataset at
+      the specified `depth` (in `m`) and at the start of each segment.
+
+      If `sigma` is greater than 0, the currents on each segment are made adverse by `sigma`
+      standard deviations, such that the along-track component is reduced and the magnitude of
+      the cross-track component is increased by `sigma` times their respective standard
+      deviations, as derived from the per-axis standard deviations of the dataset."""
+      dataset = OceanEnvironment.load(ocean_currents_model)
+      if 'timeIndex' in dataset:
+         raise RuntimeError('Route current profiles require a static ocean currents dataset')
+      _, u_mean, u_std, v_mean, v_std = RouteCurrentProfile.sample_currents(dataset, latitudes, longitudes, depth)
+      profile = RouteCurrentProfile.from_currents(east, north, up, u_mean, v_mean)
+      if sigma > 0.0:
+         east_heading, north_heading = RouteCurrentProfile.segment_headings(east, north)
+         profile.along_track_currents -= sigma * numpy.hypot(u_std * east_heading, v_std * north_heading)
+         profile.cross_track_currents += sigma * numpy.hypot(u_std * north_heading, v_std * east_heading)
+      return profile
+
+   @staticmethod
+   def from_currents(east: numpy.ndarray,
+                     north: numpy.ndarray,
+                     up: numpy.ndarray,
+                     u_currents: numpy.ndarray,
+                     v_currents: numpy.ndarray) -> RouteCurrentProfile:
+      """Creates a current profile from the eastward, northward, and upward components of each
+      route segment (in `m`) and the eastward and northward current components on each segment
+      (in `m/s`), which may have leading axes in front of the segment axis."""
+      east, north, up = (numpy.asarray(component, dtype=float) for component in (east, north, up))
+      east_heading, north_heading = RouteCurrentProfile.segment_headings(east, north)
+      return RouteCurrentProfile(numpy.sqrt((east * east) + (north * north) + (up * up)),
+                                 (u_currents * east_heading) + (v_currents * north_heading),
+                                 (v_currents * east_heading) - (u_currents * north_heading))
+
+   @staticmethod
+   def segment_headings(east: numpy.ndarray, north: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+      """Returns the eastward and northward components of the unit horizontal heading of each
+      route segment from its eastward and northward components (in `m`), both of which are 0 for
+      purely vertical segments."""
+      east, north = numpy.asarray(east, dtype=float), numpy.asarray(north, dtype=float)
+      horizontal_lengths = numpy.hypot(east, north)
+      safe_lengths = numpy.where(horizontal_lengths > 0.0, horizontal_lengths, 1.0)
+      return numpy.where(horizontal_lengths > 0.0, east / safe_lengths, 0.0), \
+             numpy.where(horizontal_lengths > 0.0, north / safe_lengths, 0.0)
+
+   @staticmethod
+   def sample_currents(dataset: OceanDataset,
+                       latitudes: numpy.ndarray,
+                       longitudes: numpy.ndarray,
+                       depth: float) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+      """Returns the (latitude, longitude) indices of the grid cell containing each of the
+      specified locations (in `degrees`) within a static ocean currents dataset, along with the
+      mean and standard deviation of the eastward and northward currents (in `m/s`) in those
+      cells at the specified `depth` (in `m`), treating missing data as 0."""
+      grid = dataset.grid()
+      lat_index, lon_index = grid.nearest(numpy.asarray(latitudes, dtype=float), numpy.asarray(longitudes, dtype=float))
+      cells = numpy.column_stack((lat_index, lon_index)).astype(numpy.intp)
+      depth_index = numpy.full(len(cells), int(grid.depth_index(depth)))
+      return (cells,) + tuple(numpy.nan_to_num(numpy.asarray(dataset[name][depth_index, cells[:, 0], cells[:, 1]], dtype=float))
+                              for name in ('uMeanData', 'uStdData', 'vMeanData', 'vStdData'))
+
+   @property
+   def distance(self) -> float:
+      """Total length of the route (in `m`)."""
+      return float(self.lengths.sum())
+
+   @property
+   def maximum_opposing_current(self) -> float:
+      """Largest current component opposing the direction of travel on any segment (in `m/s`)."""
+      return float(max(-self.along_track_currents.min(), 0.0)) if self.lengths.size else 0.0
+
+   def speeds_over_ground(self, speed_through_water) -> numpy.ndarray:
+      """Returns the speed over the ground (in `m/s`) on each segment when holding the specified
+      speed through the water (in `m/s`), with an extra trailing segment axis for arrays of
+      speeds. Untraversable segments have a speed over the ground of 0."""
+      speeds = numpy.asarray(speed_through_water, dtype=float)[..., numpy.newaxis]
+      squared_margins = (speeds * speeds) - (self.cross_track_currents * self.cross_track_currents)
+      speeds_over_ground = self.along_track_currents + numpy.sqrt(numpy.maximum(squared_margins, 0.0))
+      return numpy.where((squared_margins > 0.0) & (speeds_over_ground > 0.0), speeds_over_ground, 0.0)
+
+   def required_speeds_through_water(self, speed_over_ground) -> numpy.ndarray:
+      """Returns the speed through the water (in `m/s`) required on each segment to hold the
+      specified speed over the ground (in `m/s`), with an extra trailing segment axis for arrays
+      of speeds."""
+      speeds = numpy.asarray(speed_over_ground, dtype=float)[..., numpy.newaxis]
+      return numpy.hypot(speeds - self.along_track_currents, self.cross_track_currents)
+
+   def transit_durations(self, speed_through_water):
+      """Returns the total time (in `s`) required to transit the route while holding the specified
+      speed through the water (in `m/s`), or infinity if any segment is untraversable."""
+      speeds_over_ground = self.speeds_over_ground(speed_through_water)
+      is_traversable = speeds_over_ground > 0.0
+      segment_durations = self.lengths / numpy.where(is_traversable, speeds_over_ground, 1.0)
+      durations = numpy.where(is_traversable, segment_durations, numpy.where(self.lengths > 0.0, numpy.inf, 0.0)).sum(axis=-1)
+      return durations[()]
+
+   def transit_energies(self, speed_through_water,
+                              drag_area: float,
+                              water_density: float = 1025.0,
+                              propulsive_efficiency: float = 1.0,
+                              hotel_power: float = 0.0):
+      """Returns the total energy (in `J`) required to transit the route while holding the
+      specified speed through the water (in `m/s`), with a propulsive power of
+      0.5 * `water_density` * `drag_area` * speed^3 / `propulsive_efficiency` plus a constant
+      `hotel_power` (in `W`). The drag area is the drag coefficient multiplied by the reference
+      area of the vehicle (in `m^2`)."""
+      speeds = numpy.asarray(speed_through_water, dtype=float)
+      power = (0.5 * water_density * drag_area * speeds * speeds * speeds / propulsive_efficiency) + hotel_power
+      return (power * self.transit_durations(speeds))[()]
+
+   def average_speed_over_ground(self, speed_through_water):
+      """Returns the average speed over the ground (in `m/s`) across the entire route while
+      holding the specified speed through the water (in `m/s`)."""
+      return (self.distance / numpy.asarray(self.transit_durations(speed_through_water)))[()]
+
+   def minimum_speed_through_water(self, duration, tolerance: float = 1e-6):
+      """Returns the minimum constant speed through the water (in `m/s`) with which the route can
+      be transited within the specified `duration` (in `s`), to within `tolerance` (in `m/s`).
+      An array of durations or a profile with leading current axes yields an array of speeds,
+      all of which are found by the same bisection."""
+      durations = numpy.asarray(duration, dtype=float)
+      if (durations <= 0.0).any():
+         raise RuntimeError('The transit duration must be greater than 0 s')
+      shape = numpy.broadcast_shapes(durations.shape, self.along_track_currents.shape[:-1])
+      if self.distance == 0.0:
+         return numpy.zeros(shape)[()]
+
+      is_moving = self.lengths > 0.0
+      profile = self if is_moving.all() else \
+                RouteCurrentProfile(self.lengths[is_moving], self.along_track_currents[..., is_moving], self.cross_track_currents[..., is_moving])
+      squared_cross_track_currents = numpy.square(profile.cross_track_currents)
+
+      # Bracket each required speed between 0 and the speed which holds the average speed over the
+      # ground on every segment, then refine it from a linearized estimate by Newton steps
+      # safeguarded by bisection, overshooting each step by half the tolerance so that the
+      # bracket closes around the root
+      average_speeds = profile.distance / durations
+      low = numpy.zeros(shape)
+      high = numpy.broadcast_to(numpy.hypot(numpy.asarray(average_speeds)[..., numpy.newaxis] - profile.along_track_currents,
+                                            profile.cross_track_currents).max(axis=-1), shape)
+      speeds = average_speeds - ((profile.along_track_currents @ profile.lengths) / profile.distance)
+      speeds = numpy.where((speeds > low) & (speeds < high), speeds, 0.5 * high)
+      previous_steps = high - low
+      while (high - low).max() > tolerance:
+         transit_durations, derivatives = profile._transit_durations_and_derivatives(speeds, squared_cross_track_currents)
+         too_slow = transit_durations > durations
+         low, high = numpy.where(too_slow, speeds, low), numpy.where(too_slow, high, speeds)
+         with numpy.errstate(divide='ignore', invalid='ignore'):
+            newton_speeds = speeds - ((transit_durations - durations) / derivatives)
+         newton_speeds += numpy.where(too_slow, 0.5 * tolerance, -0.5 * tolerance)
+         steps = numpy.abs(newton_speeds - speeds)
+         use_newton = (newton_speeds > low) & (newton_speeds < high) & (steps <= (0.5 * previous_steps))
+         next_speeds = numpy.where(use_newton, newton_speeds, 0.5 * (low + high))
+         previous_steps, speeds = numpy.abs(next_speeds - speeds), next_speeds
+      return high[()]
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+from .GlobalCoordinate import GlobalCoordinateArray
+import math, numpy
+
+# Heading changes (in `degrees`) within this tolerance of 180 degrees are treated as reversals
+_REVERSAL_TOLERANCE = 1e-6
+
+
+class RouteTurnProfile(object):
+   """Change in heading at every interior waypoint of a route, along with the radius of the
+   tightest turn and the yaw rate required to follow the route.
+
+   The heading change at a waypoint is the difference between the initial bearing of the
+   departing leg and the bearing of travel at the end of the arriving leg. A vehicle rounding the
+   waypoint on a circular arc tangent to both legs, beginning and ending no more than halfway
+   along the shorter leg, turns with a radius of at most `0.5 * min(L1, L2) / tan(|delta| / 2)`,
+   where `delta` is the heading change and `L1` and `L2` are the lengths of the two legs, and
+   must therefore yaw at a rate of at least `V / radius` when travelling at a speed of `V`.
+   Zero-length legs are skipped, and all quantities are evaluated as array operations over
+   every waypoint at once. A waypoint at which the route doubles back on itself admits no such
+   arc, so its turn radius is exactly zero and it is counted in `num_reversals`.
+   """
+
+
+   # Public attributes ----------------------------------------------------------------------------
+
+   heading_changes: numpy.ndarray
+   """Signed change in heading at each interior waypoint (in `degrees`, positive when turning
+   clockwise), within [-180, 180]."""
+
+   turn_radii: numpy.ndarray
+   """Radius of the turn at each interior waypoint (in `m`), which is infinite for waypoints at
+   which the heading does not change and zero for waypoints at which the route reverses."""
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self, heading_changes: numpy.ndarray, turn_radii: numpy.ndarray) -> None:
+      super().__init__()
+      self.heading_changes = numpy.asarray(heading_changes, dtype=float)
+      self.turn_radii = numpy.asarray(turn_radii, dtype=float)
+
+
+   # Built-in method implementations --------------------------------------------------------------
+
+   def __repr__(self) -> str:
+      return 'RouteTurnProfile({} turns, max heading change {:.3f} deg, min turn radius {:.3f} m)' \
+             .format(len(self.heading_changes), self.maximum_heading_change, self.minimum_turn_radius)
+
+   def __str__(self) -> str:
+      return self.__repr__()
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   @staticmethod
+   def from_route(latitudes: numpy.ndarray, longitudes: numpy.ndarray, heights: numpy.ndarray) -> RouteTurnProfile:
+      """Creates a turn profile from the latitudes and longitudes (in `degrees`) and heights (in
+      `m`) of every waypoint along a route."""
+      points = GlobalCoordinateArray.from_llh(latitudes, longitudes, heights)
+      lengths = points.compute_segment_distances()
+      departures, arrivals = points.compute_segment_bearings()
+      if not lengths.all():
+         legs = lengths > 0.0
+         lengths, departures, arrivals = lengths[legs], departures[legs], arrivals[legs]
+      heading_changes = numpy.remainder(departures[1:] - arrivals[:-1] + 180.0, 360.0) - 180.0
+      half_angles = numpy.radians(numpy.abs(heading_changes)) * 0.5
+      with numpy.errstate(divide='ignore'):
+         turn_radii = (0.5 * numpy.minimum(lengths[:-1], lengths[1:])) / numpy.tan(half_angles)
+      turn_radii[numpy.abs(heading_changes) >= 180.0 - _REVERSAL_TOLERANCE] = 0.0
+      return RouteTurnProfile(heading_changes, turn_radii)
+
+   @property
+   def maximum_heading_change(self) -> float:
+      """Largest absolute change in heading at any waypoint (in `degrees`)."""
+      return float(numpy.abs(self.heading_changes).max()) if self.heading_changes.size else 0.0
+
+   @property
+   def num_reversals(self) -> int:
+      """Number of waypoints at which the route reverses direction."""
+      return int(numpy.count_nonzero(self.turn_radii == 0.0))
+
+   @property
+   def minimum_turn_radius(self) -> float:
+      """Smallest turn radius at any waypoint (in `m`)."""
+      return float(self.turn_radii.min()) if self.turn_radii.size else math.inf
+
+   def heading_change(self, percentile: float) -> float:
+      """Returns the absolute change in heading (in `degrees`) which is not exceeded at the
+      specified percentile (in `%`) of all waypoints."""
+      return float(numpy.percentile(numpy.abs(self.heading_changes), percentile)) if self.heading_changes.size else 0.0
+
+   def turn_radius(self, percentile: float) -> float:
+      """Returns the turn radius (in `m`) at the specified percentile (in `%`) of all waypoints,
+      such that low percentiles describe the tightest turns."""
+      return float(numpy.percentile(self.turn_radii, percentile)) if self.turn_radii.size else math.inf
+
+   def yaw_rates(self, speed: float) -> numpy.ndarray:
+      """Returns the yaw rate (in `degrees/s`) required at each waypoint when travelling at the
+      specified speed (in `m/s`)."""
+      with numpy.errstate(divide='ignore'):
+         return numpy.degrees(speed / self.turn_radii)
+
+   def maximum_yaw_rate(self, speed: float) -> float:
+      """Returns the largest yaw rate (in `degrees/s`) required at any waypoint when travelling at
+      the specified speed (in `m/s`)."""
+      minimum_turn_radius = self.minimum_turn_radius
+      return math.degrees(speed / minimum_turn_radius) if minimum_turn_radius > 0.0 else math.inf
+
+   def yaw_rate(self, speed: float, percentile: float) -> float:
+      """Returns the yaw rate (in `degrees/s`) which suffices for the specified percentile (in `%`)
+      of all waypoints when travelling at the specified speed (in `m/s`)."""
+      return float(numpy.percentile(self.yaw_rates(speed), percentile)) if self.turn_radii.size else 0.0
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+from .GlobalCoordinate import GlobalCoordinateArray
+from typing import Iterable, List, Tuple
+import numpy
+
+
+class SpatialIndex(object):
+   """KD-tree over a set of global coordinates in ECEF space, answering batched k-nearest
+   neighbor and fixed-radius queries.
+
+   The tree is balanced by construction: node `j` at depth `d` of a tree over `N` points always
+   holds points `floor(j * N / 2^d)` through `floor((j + 1) * N / 2^d) - 1` of the reordered
+   point array, with the points of each node split about the median of its widest axis, and only
+   the bounding box of each node is stored. Every node of a level is partitioned at once, so the
+   tree is built in O(N log N) array operations.
+
+   Queries descend the tree for an entire batch of query points at once, expanding each
+   (query, node) pair into only those children whose bounding boxes lie within the search
+   distance of that query, such that a batch of M queries requires O(M log N) work for
+   well-distributed data. Distances are straight-line ECEF distances (in `m`), which match
+   `GlobalCoordinate.compute_distance`.
+   """
+
+   leaf_size: int = 16
+   """Maximum number of points stored in each leaf of the tree."""
+
+   batch_size: int = 4096
+   """Maximum number of query points to process at once."""
+
+
+   # Public attributes ----------------------------------------------------------------------------
+
+   points: numpy.ndarray
+   """(N x 3) array of the ECEF coordinates of all indexed points (in `m`), in their original
+   order."""
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self, points: numpy.ndarray) -> None:
+      super().__init__()
+      self.points = numpy.ascontiguousarray(points, dtype=float).reshape(-1, 3)
+      num_points = len(self.points)
+      if num_points == 0:
+         raise RuntimeError('A SpatialIndex must contain at least 1 point')
+      self._depth = 0
+      while (num_points >> self._depth) > SpatialIndex.leaf_size:
+         self._depth += 1
+      self._order = numpy.arange(num_points)
+
+      # Partition the points of every node about the median of its widest axis, level by level
+      for depth in range(self._depth):
+         starts, sizes, rows, valid = self._node_rows(depth)
+         node_points = self.points[self._order]
+         axes = (numpy.maximum.reduceat(node_points, starts) - numpy.minimum.reduceat(node_points, starts)).argmax(axis=1)
+         values = numpy.where(valid, node_points[rows, axes[:, numpy.newaxis]], numpy.inf)
+         middles = ((((2 * numpy.arange(len(starts))) + 1) * num_points) >> (depth + 1)) - starts
+         partition = numpy.argpartition(values, numpy.unique([middles.min(), middles.max(), values.shape[1] - 1]), axis=1)
+         self._order[rows[valid]] = self._order[numpy.take_along_axis(rows, partition, axis=1)][valid]
+
+      # Compute the bounding box of every leaf and merge them upward into their parents
+      self._sorted_points = self.points[self._order]
+      self._node_row_cache = {self._depth: self._node_rows(self._depth)}
+      leaf_starts = self._node_row_cache[self._depth][0]
+      lows = numpy.minimum.reduceat(self._sorted_points, leaf_starts)
+      highs = numpy.maximum.reduceat(self._sorted_points, leaf_starts)
+      self._lows, self._highs = [lows], [highs]
+      for _ in range(self._depth):
+         lows, highs = numpy.minimum(lows[0::2], lows[1::2]), numpy.maximum(highs[0::2], highs[1::2])
+         self._lows.insert(0, lows)
+         self._highs.insert(0, highs)
+
+
+   # Built-in method implementations --------------------------------------------------------------
+
+   def __repr__(self) -> str:
+      return 'SpatialIndex({} points, {} leaves)'.format(len(self.points), 1 << self._depth)
+
+   def __str__(self) -> str:
+      return self.__repr__()
+
+   def __len__(self) -> int:
+      return len(self.points)
+
+
+   # Helper methods -------------------------------------------------------------------------------
+
+   def _node_rows(self, depth: int) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+      """Returns the first reordered point index and number of points of every node at the
+      specified depth, along with a padded (nodes x capacity) array of the reordered point indices
+      of each node and a mask of which of those indices are valid."""
+      bounds = (numpy.arange((1 << depth) + 1, dtype=numpy.int64) * len(self.points)) >> depth
+      starts, sizes = bounds[:-1], numpy.diff(bounds)
+      offsets = numpy.arange(int(sizes.max()))
+      valid = offsets < sizes[:, numpy.newaxis]
+      return starts, sizes, numpy.minimum(starts[:, numpy.newaxis] + offsets, len(self.points) - 1), valid
+
+   def _box_distances_squared(self, points: numpy.ndarray, depth: int, nodes: numpy.ndarray) -> numpy.ndarray:
+      """Returns the squared distance from each point to the bounding box of the corresponding
+      node at the specified depth."""
+      gaps = numpy.maximum(numpy.maximum(self._lows[depth][nodes] - points, points - self._highs[depth][nodes]), 0.0)
+      return numpy.einsum('ij,ij->i', gaps, gaps)
+
+   def _point_distances(self, points: numpy.ndarray, depth: int, nodes: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+      """Returns a padded array of the distances from each point to every indexed point within the
+      corresponding node at the specified depth, with infinite distances for padding, along with
+      the reordered indices of those indexed points."""
+      if depth not in self._node_row_cache:
+         self._node_row_cache[depth] = self._node_rows(depth)
+      rows, valid = self._node_row_cache[depth][2][nodes], self._node_row_cache[depth][3][nodes]
+      offsets = self._sorted_points[rows] - points[:, numpy.newaxis]
+      return numpy.where(valid, numpy.sqrt(numpy.einsum('ijk,ijk->ij', offsets, offsets)), numpy.inf), rows
+
+   def _candidates(self, points: numpy.ndarray, bounds: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+      """Returns the (query, leaf) pairs for which the leaf bounding box lies within the
+      corresponding search distance bound of each query point."""
+      queries, nodes = numpy.arange(len(points)), numpy.zeros(len(points), dtype=numpy.int64)
+      bounds_squared = bounds * bounds
+      for depth in range(1, self._depth + 1):
+         queries, nodes = numpy.repeat(queries, 2), numpy.stack((2 * nodes, (2 * nodes) + 1), axis=1).ravel()
+         is_candidate = self._box_distances_squared(points[queries], depth, nodes) <= bounds_squared[queries]
+         queries, nodes = queries[is_candidate], nodes[is_candidate]
+      return queries, nodes
+
+   def _query_batch(self, points: numpy.ndarray, k: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+      """Returns the distances to and indices of the `k` nearest indexed points to each point."""
+
+      # Bound the search distance of each query by its k-th nearest point within the node
+      # containing at least k points that it would descend into
+      home_depth = 0
+      while home_depth < self._depth and (len(self.points) >> (home_depth + 1)) >= k:
+         home_depth += 1
+      nodes = numpy.zeros(len(points), dtype=numpy.int64)
+      for depth in range(1, home_depth + 1):
+         left_distances = self._box_distances_squared(points, depth, 2 * nodes)
+         right_distances = self._box_distances_squared(points, depth, (2 * nodes) + 1)
+         nodes = (2 * nodes) + (right_distances < left_distances)
+      home_distances = self._point_distances(points, home_depth, nodes)[0]
+      bounds = numpy.partition(home_distances, k - 1, axis=1)[:, k - 1]
+
+      # Gather all points within the bound of each query, which are grouped by query, and keep the
+      # k nearest by sorting on the query index plus the fraction of the bound at each distance
+      queries, leaves = self._candidates(points, bounds)
+      distances, rows = self._point_distances(points[queries], self._depth, leaves)
+      is_within = distances <= bounds[queries][:, numpy.newaxis]
+      queries = numpy.broadcast_to(queries[:, numpy.newaxis], distances.shape)[is_within]
+      distances, rows = distances[is_within], rows[is_within]
+      keys = queries + (0.5 * distances / numpy.where(bounds > 0.0, bounds, 1.0)[queries])
+      ordering = numpy.argsort(keys)
+      first = numpy.searchsorted(queries, numpy.arange(len(points)))
+      selected = ordering[first[:, numpy.newaxis] + numpy.arange(k)]
+      return distances[selected], self._order[rows[selected]]
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   @staticmethod
+   def from_llh(latitude_deg: numpy.ndarray, longitude_deg: numpy.ndarray, height_m: numpy.ndarray = 0.0) -> SpatialIndex:
+      """Creates a spatial index over points specified by latitude and longitude (in `degrees`)
+      and height (in `m`)."""
+      return SpatialIndex(GlobalCoordinateArray.from_llh(latitude_deg, longitude_deg, height_m).get_ecef())
+
+   @staticmethod
+   def from_waypoints(waypoints: Iterable[numpy.ndarray]) -> SpatialIndex:
+      """Creates a spatial index from an (N x 3) array of [latitude, longitude, height] waypoints
+      or from an iterable of such arrays, such as a `WaypointReader`."""
+      if not isinstance(waypoints, numpy.ndarray):
+         chunks = [numpy.asarray(chunk, dtype=float).reshape(-1, 3) for chunk in waypoints]
+         waypoints = numpy.concatenate(chunks) if chunks else numpy.empty((0, 3))
+      return SpatialIndex.from_llh(waypoints[:, 0], waypoints[:, 1], waypoints[:, 2])
+
+   def query_ecef(self, points: numpy.ndarray, k: int = 1) -> Tuple[numpy.ndarray, numpy.ndarray]:
+      """Returns (M x k) arrays of the distances (in `m`) to and indices of the `k` nearest indexed
+      points to each of M ECEF query points, ordered from nearest to farthest."""
+      if k < 1 or k > len(self.points):
+         raise RuntimeError('The number of nearest neighbors must be between 1 and {}'.format(len(self.points)))
+      points = numpy.asarray(points, dtype=float).reshape(-1, 3)
+      distances, indices = numpy.empty((len(points), k)), numpy.empty((len(points), k), dtype=numpy.int64)
+      for start in range(0, len(points), SpatialIndex.batch_size):
+         end = min(start + SpatialIndex.batch_size, len(points))
+         distances[start:end], indices[start:end] = self._query_batch(points[start:end], k)
+      return distances, indices
+
+   def query(self, latitude_deg, longitude_deg, height_m=0.0, k: int = 1) -> Tuple[numpy.ndarray, numpy.ndarray]:
+      """Returns (M x k) arrays of the distances (in `m`) to and indices of the `k` nearest indexed
+      points to each of M query points specified by latitude and longitude (in `degrees`) and
+      height (in `m`), ordered from nearest to farthest."""
+      return self.query_ecef(GlobalCoordinateArray.from_llh(latitude_deg, longitude_deg, height_m).get_ecef(), k)
+
+   def query_radius_ecef(self, points: numpy.ndarray, radius) -> List[numpy.ndarray]:
+      """Returns a sorted array of the indices of all indexed points lying within the specified
+      radius (in `m`) of each of M ECEF query points. The radius may be specified either once or
+      separately for each query point."""
+      points = numpy.asarray(points, dtype=float).reshape(-1, 3)
+      radii = numpy.broadcast_to(numpy.asarray(radius, dtype=float), (len(points),))
+      results = []
+      for start in range(0, len(points), SpatialIndex.batch_size):
+         end = min(start + SpatialIndex.batch_size, len(points))
+         queries, leaves = self._candidates(points[start:end], radii[start:end])
+         distances, rows = self._point_distances(points[start:end][queries], self._depth, leaves)
+         is_within = distances <= radii[start:end][queries][:, numpy.newaxis]
+         queries = numpy.broadcast_to(queries[:, numpy.newaxis], distances.shape)[is_within]
+         indices = self._order[rows[is_within]]
+         ordering = numpy.lexsort((indices, queries))
+         results.extend(numpy.split(indices[ordering], numpy.searchsorted(queries[ordering], numpy.arange(1, end - start))))
+      return results
+
+   def query_radius(self, latitude_deg, longitude_deg, radius, height_m=0.0) -> List[numpy.ndarray]:
+      """Returns a sorted array of the indices of all indexed points lying within the specified
+      radius (in `m`) of each of M query points specified by latitude and longitude (in `degrees`)
+      and height (in `m`)."""
+      return self.query_radius_ecef(GlobalCoordinateArray.from_llh(latitude_deg, longitude_deg, height_m).get_ecef(), radius)
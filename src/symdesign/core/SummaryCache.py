@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+from .Waypoints import WaypointReader
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+import hashlib, json, os, threading, types
+
+
+def cache_token(token: str) -> Callable[[Callable], Callable]:
+   """Marks an environmental model callable as cacheable under the specified token.
+
+   Only plain functions which depend on nothing but their arguments can be fingerprinted
+   automatically. Any other callable (e.g., a bound method, a callable object, or a function which
+   reads a module-level global) is only cached if it carries an explicit token, which the caller
+   must change whenever the behavior of the model changes. The model itself is returned
+   unchanged, so this function may be used as a decorator:
+
+   @cache_token('linear-density-v1')
+   def water_density_model(latitude_deg, longitude_deg, depth_m):
+      return 1030.0 + (20.0 * (depth_m / 4000.0))
+   """
+   def mark(model: Callable) -> Callable:
+      model.cache_token = token
+      return model
+   return mark
+
+
+class StageSummaryCache(object):
+   """On-disk cache of the environmental summaries computed while loading mission stage waypoints.
+
+   Each summary is stored as a small JSON file named by a SHA-256 key which is derived from the
+   contents of the waypoint file, the contents of every file-based environmental model, the
+   bytecode of every callable model, and all loader parameters. File content hashes are
+   themselves remembered by file path, size, and modification time, so that a warm cache never
+   needs to re-read large model files. Waypoints read from in-memory iterables and callables
+   which may depend on external state (closures, bound methods, callable objects, and functions
+   which read globals) cannot be fingerprinted, so they are never cached unless they carry an
+   explicit token (see `cache_token()`).
+   """
+
+
+   # Public attributes ----------------------------------------------------------------------------
+
+   directory: Path
+   """Directory in which all cached summaries are stored."""
+
+   _FILE_HASHES_NAME = 'file_hashes.json'
+   _file_hashes: Dict[str, str] = {}
+   _lock = threading.Lock()
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self, cache_directory: Union[str, Path]) -> None:
+      super().__init__()
+      self.directory = Path(cache_directory)
+      self.directory.mkdir(parents=True, exist_ok=True)
+      self._file_hashes_path = self.directory.joinpath(StageSummaryCache._FILE_HASHES_NAME)
+      self._file_hashes_modified = False
+      if self._file_hashes_path.exists():
+         try:
+            with open(self._file_hashes_path, 'r') as hashes_file:
+               with StageSummaryCache._lock:
+                  StageSummaryCache._file_hashes.update(json.load(hashes_file))
+         except (OSError, ValueError):
+            pass
+
+
+   # Helper methods -------------------------------------------------------------------------------
+
+   @staticmethod
+   def _write_atomically(path: Path, contents: Any) -> None:
+      temporary_path = path.with_name('{}.{}.{}.tmp'.format(path.name, os.getpid(), threading.get_ident()))
+      with open(temporary_path, 'w') as output_file:
+         json.dump(contents, output_file)
+      os.replace(temporary_path, path)
+
+   def _file_hash(self, path: Path) -> str:
+      """Returns the SHA-256 hash of the contents of a file, reusing any previously computed hash
+      for the same file path, size, and modification time."""
+      status = path.stat()
+      identifier = '{}|{}|{}'.format(path.resolve(), status.st_size, status.st_mtime_ns)
+      with StageSummaryCache._lock:
+         file_hash = StageSummaryCache._file_hashes.get(identifier)
+      if file_hash is None:
+         hasher = hashlib.sha256()
+         with open(path, 'rb') as input_file:
+            for block in iter(lambda: input_file.read(1 << 20), b''):
+               hasher.update(block)
+         file_hash = hasher.hexdigest()
+         with StageSummaryCache._lock:
+            StageSummaryCache._file_hashes[identifier] = file_hash
+         self._file_hashes_modified = True
+      return file_hash
+
+   def _fingerprint(self, component: Any) -> Optional[str]:
+      """Returns a string uniquely identifying the specified cache key component, or `None` if the
+      component cannot be reliably identified."""
+      if component is None or isinstance(component, (bool, int, float)):
+         return repr(component)
+      elif isinstance(component, (tuple, list)):
+         fingerprints = [self._fingerprint(item) for item in component]
+         return None if any(fingerprint is None for fingerprint in fingerprints) else '({})'.format(','.join(fingerprints))
+      elif isinstance(component, WaypointReader):
+         if component.waypoint_format is None:
+            return None
+         fingerprint = '{}:{}'.format(component.waypoint_format, self._fingerprint(str(component.source)))
+         if component.simplification_tolerance is not None:
+            fingerprint += ':simplified={!r}:{}'.format(component.simplification_tolerance, component.geodesic_mode.name)
+         return fingerprint
+      elif isinstance(component, (str, Path)):
+         path = Path(component)
+         if path.is_file():
+            return 'file:' + self._file_hash(path)
+         elif path.is_dir():
+            return 'dir:' + ','.join('{}={}'.format(member.relative_to(path).as_posix(), self._file_hash(member))
+                                     for member in sorted(path.rglob('*')) if member.is_file())
+         return 'str:' + str(component)
+      elif callable(component):
+         qualified_name = getattr(component, '__qualname__', type(component).__qualname__)
+         token = getattr(component, 'cache_token', None)
+         if token is not None:
+            return 'token:{}:{!r}'.format(qualified_name, token)
+         if not isinstance(component, types.FunctionType) or component.__closure__ or \
+               StageSummaryCache._references_globals(component.__code__, component.__globals__):
+            return None
+         code = component.__code__
+         return 'callable:{}:{}'.format(qualified_name, hashlib.sha256(code.co_code + repr((code.co_consts, code.co_names,
+                                           component.__defaults__, component.__kwdefaults__)).encode('utf-8')).hexdigest())
+      return None
+
+   @staticmethod
+   def _references_globals(code: types.CodeType, global_names: Dict[str, Any]) -> bool:
+      """Returns whether the specified code object, or any code nested within it, refers to a
+      name defined in the specified global namespace."""
+      return any(name in global_names for name in code.co_names) or \
+             any(StageSummaryCache._references_globals(constant, global_names)
+                 for constant in code.co_consts if isinstance(constant, types.CodeType))
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   def key(self, *components: Any) -> Optional[str]:
+      """Returns the cache key for the specified set of components, or `None` if any component
+      cannot be reliably identified."""
+      fingerprints = [self._fingerprint(component) for component in components]
+      if self._file_hashes_modified:
+         with StageSummaryCache._lock:
+            file_hashes = dict(StageSummaryCache._file_hashes)
+         try:
+            StageSummaryCache._write_atomically(self._file_hashes_path, file_hashes)
+         except OSError:
+            pass
+         self._file_hashes_modified = False
+      if any(fingerprint is None for fingerprint in fingerprints):
+         return None
+      return hashlib.sha256('\n'.join(fingerprints).encode('utf-8')).hexdigest()
+
+   def load(self, key: str) -> Tuple[bool, Any]:
+      """Returns a tuple indicating whether a summary exists for the specified key, along with
+      the cached summary itself."""
+      try:
+         with open(self.directory.joinpath(key + '.json'), 'r') as summary_file:
+            return True, json.load(summary_file)
+      except (OSError, ValueError):
+         return False, None
+
+   def store(self, key: str, summary: Any) -> None:
+      """Stores a JSON-serializable summary under the specified key."""
+      try:
+         StageSummaryCache._write_atomically(self.directory.joinpath(key + '.json'), summary)
+      except OSError:
+         pass
+
+   @staticmethod
+   def load_or_compute(cache_directory: Union[str, Path, None], key_components: Tuple, compute: Callable[[], Any]) -> Any:
+      """Returns the cached summary for the specified key components if one exists in the cache
+      directory; otherwise, computes the summary and stores it in the cache. If no cache directory
+      is specified, the summary is always computed."""
+      if cache_directory is None:
+         return compute()
+      cache = StageSummaryCache(cache_directory)
+      key = cache.key(*key_components)
+      if key is not None:
+         found, summary = cache.load(key)
+         if found:
+            return summary
+      summary = compute()
+      if key is not None:
+         cache.store(key, summary)
+      return summary
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+from .GlobalCoordinate import GlobalCoordinateArray
+from typing import Iterable, List, Tuple
+import heapq, math, numpy
+
+
+class Track(object):
+   """Polyline path through a sequence of global coordinates, with all whole-path quantities
+   precomputed once as arrays.
+
+   Each leg of the track is the straight ECEF segment between two consecutive coordinates, such
+   that leg lengths match `GlobalCoordinate.compute_distance`. Along-track positions are located
+   by binary search over the cumulative leg distances, and the nearest leg to an arbitrary point
+   is found by a best-first search through a hierarchy of bounding volumes enclosing contiguous
+   runs of legs, so that both kinds of query require O(log n) work for a track of n legs.
+   """
+
+   leaf_size: int = 8
+   """Number of consecutive legs enclosed by each leaf of the bounding volume hierarchy."""
+
+
+   # Public attributes ----------------------------------------------------------------------------
+
+   points: GlobalCoordinateArray
+   """Coordinates of all points along the track."""
+
+   leg_lengths: numpy.ndarray
+   """Length of each leg between consecutive points (in `m`)."""
+
+   cumulative_distances: numpy.ndarray
+   """Along-track distance from the start of the track to each point (in `m`)."""
+
+   initial_bearings: numpy.ndarray
+   """Initial bearing of each leg (in `deg`)."""
+
+   final_bearings: numpy.ndarray
+   """Bearing of travel at the end of each leg (in `deg`), as computed by
+   `GlobalCoordinateArray.compute_segment_bearings`."""
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self, points: GlobalCoordinateArray) -> None:
+      super().__init__()
+      if len(points) == 0:
+         raise RuntimeError('A Track must contain at least 1 point')
+      self.points = points
+      self._ecef = points.get_ecef()
+      self._leg_vectors = self._ecef[1:] - self._ecef[:-1]
+      self.leg_lengths = numpy.sqrt(numpy.einsum('ij,ij->i', self._leg_vectors, self._leg_vectors))
+      self.cumulative_distances = numpy.concatenate(([0.0], numpy.cumsum(self.leg_lengths)))
+      self.initial_bearings, self.final_bearings = points.compute_segment_bearings()
+      self._hierarchy = self._build_hierarchy()
+
+
+   # Built-in method implementations --------------------------------------------------------------
+
+   def __repr__(self) -> str:
+      return 'Track({} points, {:.3f} km)'.format(len(self.points), 0.001 * self.distance)
+
+   def __str__(self) -> str:
+      return self.__repr__()
+
+   def __len__(self) -> int:
+      return len(self.leg_lengths)
+
+
+   # Helper methods -------------------------------------------------------------------------------
+
+   @staticmethod
+   def _segment_distances(points: numpy.ndarray, starts: numpy.ndarray, ends: numpy.ndarray) -> numpy.ndarray:
+      """Returns the distance (in `m`) from each ECEF point to the corresponding ECEF segment, with
+      coordinates along the trailing axis of all arrays."""
+      vectors, offsets = ends - starts, points - starts
+      lengths_squared = numpy.einsum('...j,...j->...', vectors, vectors)
+      fractions = numpy.clip(numpy.einsum('...j,...j->...', offsets, vectors) / numpy.where(lengths_squared > 0.0, lengths_squared, 1.0), 0.0, 1.0)
+      residuals = offsets - (fractions[..., numpy.newaxis] * vectors)
+      return numpy.sqrt(numpy.einsum('...j,...j->...', residuals, residuals))
+
+   @staticmethod
+   def _bounds(starts: numpy.ndarray, ends: numpy.ndarray, radii: numpy.ndarray,
+               centers: numpy.ndarray, sphere_radii: numpy.ndarray) -> numpy.ndarray:
+      """Returns the capsules about the specified chords together with the specified spheres as
+      rows of (start_x, start_y, start_z, vector_x, vector_y, vector_z, inverse_length_squared,
+      radius, center_x, center_y, center_z, sphere_radius)."""
+      vectors = ends - starts
+      lengths_squared = numpy.einsum('ij,ij->i', vectors, vectors)
+      inverse_lengths_squared = numpy.where(lengths_squared > 0.0, 1.0 / numpy.where(lengths_squared > 0.0, lengths_squared, 1.0), 0.0)
+      return numpy.column_stack((starts, vectors, inverse_lengths_squared, radii, centers, sphere_radii))
+
+   def _build_hierarchy(self) -> List[numpy.ndarray]:
+      """Returns the bounds of each level of the hierarchy, from the leaves up to the single root,
+      where node `i` of each level encloses nodes `2i` and `2i + 1` of the level below it and leaf
+      `i` encloses legs `i * leaf_size` through `(i + 1) * leaf_size - 1`.
+
+      Each node is bounded by both a capsule and a sphere. The capsule is the set of points within
+      a radius of the chord joining the first and last points of its run of legs, which stays
+      tight along nearly straight tracks. Since the distance from a segment to another segment is
+      greatest at one of its end points, a parent capsule encloses its children if its radius
+      covers each child chord end point plus the radius of that child. The sphere stays tight
+      where a track loops back on itself and its chord no longer follows the legs."""
+      if len(self.leg_lengths) == 0:
+         return []
+
+      # Bound each leaf using a strided view of its points, padding the final leaf with copies of
+      # the last point of the track
+      num_legs = len(self.leg_lengths)
+      starts = numpy.arange(0, num_legs, Track.leaf_size)
+      ends = numpy.minimum(starts + Track.leaf_size, num_legs)
+      padded_points = self._ecef[numpy.minimum(numpy.arange((len(starts) * Track.leaf_size) + 1), num_legs)]
+      leaf_points = numpy.lib.stride_tricks.sliding_window_view(padded_points, Track.leaf_size + 1, axis=0)[::Track.leaf_size]
+      leaf_points = leaf_points.transpose(0, 2, 1)
+      radii = self._segment_distances(leaf_points, self._ecef[starts][:, numpy.newaxis], self._ecef[ends][:, numpy.newaxis]).max(axis=1)
+      centers = 0.5 * (leaf_points.min(axis=1) + leaf_points.max(axis=1))
+      sphere_radii = numpy.sqrt(((leaf_points - centers[:, numpy.newaxis]) ** 2).sum(axis=2).max(axis=1))
+      levels = [self._bounds(self._ecef[starts], self._ecef[ends], radii, centers, sphere_radii)]
+
+      # Merge pairs of child bounds into enclosing parent bounds until a single root remains
+      while len(starts) > 1:
+         if len(starts) % 2:
+            starts, ends, radii, centers, sphere_radii = (numpy.concatenate((values, values[-1:]))
+                                                          for values in (starts, ends, radii, centers, sphere_radii))
+         left_starts, left_ends, right_starts, right_ends = starts[0::2], ends[0::2], starts[1::2], ends[1::2]
+         parent_starts, parent_ends = self._ecef[left_starts], self._ecef[right_ends]
+         radii = numpy.maximum(radii[0::2] + numpy.maximum(self._segment_distances(self._ecef[left_starts], parent_starts, parent_ends),
+                                                           self._segment_distances(self._ecef[left_ends], parent_starts, parent_ends)),
+                               radii[1::2] + numpy.maximum(self._segment_distances(self._ecef[right_starts], parent_starts, parent_ends),
+                                                           self._segment_distances(self._ecef[right_ends], parent_starts, parent_ends)))
+         left_centers, right_centers = centers[0::2], centers[1::2]
+         left_radii, right_radii = sphere_radii[0::2], sphere_radii[1::2]
+         separations = numpy.linalg.norm(right_centers - left_centers, axis=1)
+         left_encloses = (separations + right_radii) <= left_radii
+         right_encloses = ~left_encloses & ((separations + left_radii) <= right_radii)
+         sphere_radii = numpy.where(left_encloses, left_radii,
+                                    numpy.where(right_encloses, right_radii, 0.5 * (separations + left_radii + right_radii)))
+         weights = numpy.where(left_encloses | right_encloses, right_encloses.astype(float),
+                               (sphere_radii - left_radii) / numpy.where(separations > 0.0, separations, 1.0))
+         centers = left_centers + (weights[:, numpy.newaxis] * (right_centers - left_centers))
+         starts, ends = left_starts, right_ends
+         levels.append(self._bounds(parent_starts, parent_ends, radii, centers, sphere_radii))
+      return levels
+
+   def _nearest_leg(self, point: numpy.ndarray) -> Tuple[float, int, float]:
+      """Returns the distance (in `m`) from an ECEF point to the nearest leg, along with the index
+      of that leg and the fraction of the leg length at which its closest point lies."""
+      x, y, z = point.tolist()
+      def lower_bound(bounds: numpy.ndarray) -> float:
+         start_x, start_y, start_z, vector_x, vector_y, vector_z, inverse_length_squared, radius, \
+            center_x, center_y, center_z, sphere_radius = bounds.tolist()
+         offset_x, offset_y, offset_z = x - start_x, y - start_y, z - start_z
+         fraction = min(max(((offset_x * vector_x) + (offset_y * vector_y) + (offset_z * vector_z)) * inverse_length_squared, 0.0), 1.0)
+         offset_x, offset_y, offset_z = offset_x - (fraction * vector_x), offset_y - (fraction * vector_y), offset_z - (fraction * vector_z)
+         return max(math.sqrt((offset_x * offset_x) + (offset_y * offset_y) + (offset_z * offset_z)) - radius,
+                    math.sqrt(((x - center_x) ** 2) + ((y - center_y) ** 2) + ((z - center_z) ** 2)) - sphere_radius, 0.0)
+      best_distance, best_leg, best_fraction = math.inf, 0, 0.0
+      top_level = len(self._hierarchy) - 1
+      queue = [(lower_bound(self._hierarchy[top_level][0]), top_level, 0)]
+      while queue:
+         bound, level, node = heapq.heappop(queue)
+         if bound >= best_distance:
+            break
+         if level == 0:
+            first_leg = node * Track.leaf_size
+            last_leg = min(first_leg + Track.leaf_size, len(self.leg_lengths))
+            distances, fractions = self._leg_distances(point, first_leg, last_leg)
+            index = int(distances.argmin())
+            if distances[index] < best_distance:
+               best_distance, best_leg, best_fraction = float(distances[index]), first_leg + index, float(fractions[index])
+            continue
+         children = self._hierarchy[level - 1]
+         for child in (2 * node, 2 * node + 1):
+            if child < len(children):
+               bound = lower_bound(children[child])
+               if bound < best_distance:
+                  heapq.heappush(queue, (bound, level - 1, child))
+      return best_distance, best_leg, best_fraction
+
+   def _leg_distances(self, point: numpy.ndarray, first_leg: int, last_leg: int) -> Tuple[numpy.ndarray, numpy.ndarray]:
+      """Returns the distances (in `m`) from an ECEF point to each leg in the specified range, along
+      with the fraction of each leg length at which its closest point lies."""
+      starts = self._ecef[first_leg:last_leg]
+      vectors = self._leg_vectors[first_leg:last_leg]
+      lengths_squared = self.leg_lengths[first_leg:last_leg] ** 2
+      offsets = point - starts
+      fractions = numpy.clip(numpy.einsum('ij,ij->i', offsets, vectors) / numpy.where(lengths_squared > 0.0, lengths_squared, 1.0), 0.0, 1.0)
+      residuals = offsets - (fractions[:, numpy.newaxis] * vectors)
+      return numpy.sqrt(numpy.einsum('ij,ij->i', residuals, residuals)), fractions
+
+
+   # Public methods -------------------------------------------------------------------------------
+
+   @staticmethod
+   def from_llh(latitude_deg: numpy.ndarray, longitude_deg: numpy.ndarray, height_m: numpy.ndarray = 0.0) -> Track:
+      """Creates a track through points specified by latitude and longitude (in `degrees`) and
+      height (in `m`)."""
+      return Track(GlobalCoordinateArray.from_llh(latitude_deg, longitude_deg, height_m))
+
+   @staticmethod
+   def from_waypoints(waypoints: Iterable[numpy.ndarray]) -> Track:
+      """Creates a track from an (N x 3) array of [latitude, longitude, height] waypoints or from
+      an iterable of such arrays, such as a `WaypointReader`."""
+      if not isinstance(waypoints, numpy.ndarray):
+         chunks = [numpy.asarray(chunk, dtype=float).reshape(-1, 3) for chunk in waypoints]
+         waypoints = numpy.concatenate(chunks) if chunks else numpy.empty((0, 3))
+      return Track.from_llh(waypoints[:, 0], waypoints[:, 1], waypoints[:, 2])
+
+   @property
+   def distance(self) -> float:
+      """Total along-track length of the track (in `m`)."""
+      return float(self.cumulative_distances[-1])
+
+   def leg_at(self, along_track_distance) -> numpy.ndarray:
+      """Returns the index of the leg containing each specified along-track distance (in `m`),
+      clamped to the first and last legs of the track."""
+      legs = numpy.searchsorted(self.cumulative_distances, along_track_distance, side='right') - 1
+      return numpy.clip(legs, 0, max(len(self.leg_lengths) - 1, 0))[()]
+
+   def position_at(self, along_track_distance) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+      """Returns the latitude and longitude (in `degrees`) and height (in `m`) of the point at each
+      specified along-track distance (in `m`), interpolated linearly in ECEF coordinates along its
+      leg and clamped to the ends of the track."""
+      distances = numpy.clip(numpy.asarray(along_track_distance, dtype=float), 0.0, self.distance)
+      if len(self.leg_lengths) == 0:
+         ecef = numpy.broadcast_to(self._ecef[0], distances.shape + (3,))
+      else:
+         legs = numpy.asarray(self.leg_at(distances))
+         lengths = self.leg_lengths[legs]
+         fractions = (distances - self.cumulative_distances[legs]) / numpy.where(lengths > 0.0, lengths, 1.0)
+         ecef = self._ecef[legs] + (fractions[..., numpy.newaxis] * self._leg_vectors[legs])
+      positions = GlobalCoordinateArray.from_xyz(ecef[..., 0].ravel(), ecef[..., 1].ravel(), ecef[..., 2].ravel())
+      return tuple(values.reshape(distances.shape)[()] for values in positions.get_llh())
+
+   def locate(self, latitude_deg, longitude_deg, height_m=0.0) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+      """Projects each specified point onto the nearest leg of the track, returning the
+      cross-track distance from the point to that leg (in `m`), the along-track distance from the
+      start of the track to the projected point (in `m`), and the index of the leg."""
+      points = GlobalCoordinateArray.from_llh(latitude_deg, longitude_deg, height_m).get_ecef()
+      cross_track = numpy.empty(len(points))
+      along_track = numpy.empty(len(points))
+      legs = numpy.zeros(len(points), dtype=int)
+      for i, point in enumerate(points):
+         if len(self.leg_lengths) == 0:
+            cross_track[i], along_track[i] = numpy.linalg.norm(point - self._ecef[0]), 0.0
+         else:
+            cross_track[i], legs[i], fraction = self._nearest_leg(point)
+            along_track[i] = self.cumulative_distances[legs[i]] + (fraction * self.leg_lengths[legs[i]])
+      shape = numpy.broadcast(numpy.asarray(latitude_deg), numpy.asarray(longitude_deg), numpy.asarray(height_m)).shape
+      return cross_track.reshape(shape)[()], along_track.reshape(shape)[()], legs.reshape(shape)[()]
+
+   def cross_track_distance(self, latitude_deg, longitude_deg, height_m=0.0):
+      """Returns the distance (in `m`) from each specified point to the nearest leg of the track."""
+      return self.locate(latitude_deg, longitude_deg, height_m)[0]
+
+   def along_track_distance(self, latitude_deg, longitude_deg, height_m=0.0):
+      """Returns the along-track distance (in `m`) from the start of the track to the projection of
+      each specified point onto the nearest leg of the track."""
+      return self.locate(latitude_deg, longitude_deg, height_m)[1]
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+from .GlobalCoordinate import GeodesicMode, GlobalCoordinateArray
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+import csv, numpy, pickle
+
+
+def _simplify_waypoints(coordinates: GlobalCoordinateArray, allowed_error_per_meter: float,
+                        geodesic_mode: GeodesicMode = GeodesicMode.CHORD,
+                        segment_lengths: Optional[numpy.ndarray] = None) -> numpy.ndarray:
+   """Returns a mask of the coordinates to keep when simplifying a polyline such that replacing
+   any run of removed coordinates by a single leg between its two kept end points shortens the
+   path by no more than `allowed_error_per_meter` times the original length of that run, with all
+   lengths measured using `geodesic_mode`. The original length of each segment may be specified
+   explicitly in `segment_lengths` (in `m`), e.g. for a segment which already replaces a run of
+   removed coordinates.
+
+   This is a Douglas-Peucker simplification in which all spans at the same recursion depth are
+   evaluated at once, splitting each span which exceeds its length error budget at the interior
+   point farthest from its ECEF chord."""
+   keep = numpy.zeros(len(coordinates), dtype=bool)
+   if len(coordinates) == 0:
+      return keep
+   keep[0] = keep[-1] = True
+   points = coordinates.get_ecef()
+   segment_lengths = coordinates.compute_segment_distances(geodesic_mode) if segment_lengths is None else segment_lengths
+   cumulative_lengths = numpy.concatenate(([0.0], numpy.cumsum(segment_lengths)))
+   starts, ends = numpy.array([0]), numpy.array([len(points) - 1])
+   while starts.size:
+
+      # Determine which spans shorten the path by more than their allowed error
+      chords = points[ends] - points[starts]
+      path_lengths = cumulative_lengths[ends] - cumulative_lengths[starts]
+      leg_lengths = numpy.linalg.norm(chords, axis=1) if geodesic_mode == GeodesicMode.CHORD else \
+                    coordinates[starts].compute_distance(coordinates[ends], geodesic_mode)
+      length_errors = path_lengths - leg_lengths
+      must_split = ((ends - starts) > 1) & (length_errors > allowed_error_per_meter * path_lengths)
+      starts, ends, chords = starts[must_split], ends[must_split], chords[must_split]
+      if not starts.size:
+         break
+
+      # Find the interior point of each span which lies farthest from its chord
+      num_interior = ends - starts - 1
+      span_offsets = numpy.concatenate(([0], numpy.cumsum(num_interior)[:-1]))
+      spans = numpy.repeat(numpy.arange(len(starts)), num_interior)
+      interior = numpy.arange(len(spans)) - span_offsets[spans] + starts[spans] + 1
+      offsets = points[interior] - points[starts[spans]]
+      chord_lengths_2 = numpy.einsum('ij,ij->i', chords, chords)
+      projections = numpy.einsum('ij,ij->i', offsets, chords[spans]) / numpy.where(chord_lengths_2 > 0.0, chord_lengths_2, 1.0)[spans]
+      deviations = numpy.linalg.norm(offsets - (projections[:, numpy.newaxis] * chords[spans]), axis=1)
+      is_farthest = deviations == numpy.maximum.reduceat(deviations, span_offsets)[spans]
+      farthest_spans, first_farthest = numpy.unique(spans[is_farthest], return_index=True)
+      split_points = interior[numpy.flatnonzero(is_farthest)[first_farthest]]
+      keep[split_points] = True
+      starts, ends = numpy.concatenate((starts, split_points)), numpy.concatenate((split_points, ends))
+   return keep
+
+
+class WaypointReader(object):
+   """Iterable reader which yields the [latitude, longitude, height] waypoints of a mission stage
+   as a sequence of fixed-size (N x 3) `numpy` arrays.
+
+   Waypoints may be read from any of the following sources:
+
+   - Binary files (`.bin`, `.f64`, `.dat`) of consecutive little-endian float64
+     (latitude, longitude, height) records
+   - `.npy` files containing an (N x 3) array, which are memory-mapped
+   - `.csv` files containing one waypoint per row (leading non-numeric header rows are skipped)
+   - `.pkl` files containing one or more consecutively pickled lists of waypoints
+   - Any iterable of waypoints or of array-like waypoint chunks
+
+   All file-based sources except pickle files are read incrementally, so memory usage remains
+   constant regardless of the length of a route. A pickle file containing only a single list of
+   waypoints must necessarily be unpickled in its entirety, although it is still processed in
+   chunks; pickling a long route as a series of smaller lists avoids this.
+
+   If a `simplification_tolerance` (in `m`) is specified, nearly collinear waypoints are removed
+   from the route as it is read, such that the length of the simplified route is guaranteed to be
+   less than `simplification_tolerance` shorter than that of the original route, with all lengths
+   measured using `geodesic_mode`. The actual difference in length is stored in
+   `simplification_error` after each complete pass over the waypoints. Simplification requires two passes over the source in order to measure the total
+   route length, so waypoints from a one-shot iterable source are buffered in memory.
+   """
+
+
+   # Public attributes ----------------------------------------------------------------------------
+
+   source: Union[Path, Iterable]
+   """Waypoint file path or iterable waypoint source."""
+
+   chunk_size: int
+   """Maximum number of waypoints contained in each yielded chunk."""
+
+   waypoint_format: Optional[str]
+   """Format of the waypoint file ('binary', 'npy', 'csv', or 'pickle'), or `None` for iterables."""
+
+   simplification_tolerance: Optional[float]
+   """Maximum allowable reduction in total route length due to route simplification (in `m`), or
+   `None` to read all waypoints unchanged."""
+
+   simplification_error: Optional[float]
+   """Reduction in total route length due to route simplification during the most recent complete
+   pass over the waypoints (in `m`), or `None` if the route has not been simplified."""
+
+   geodesic_mode: GeodesicMode
+   """Method used to measure route lengths during route simplification."""
+
+
+   # Constructor ----------------------------------------------------------------------------------
+
+   def __init__(self, source: Union[str, Path, Iterable],
+                      chunk_size: int = 65536,
+                      waypoint_format: Optional[str] = None,
+                      simplification_tolerance: Optional[float] = None,
+                      geodesic_mode: GeodesicMode = GeodesicMode.CHORD) -> None:
+      super().__init__()
+      if chunk_size < 1:
+         raise RuntimeError('WaypointReader chunk size must be at least 1')
+      if simplification_tolerance is not None and simplification_tolerance <= 0.0:
+         raise RuntimeError('Route simplification tolerance must be greater than 0 m')
+      self.chunk_size = chunk_size
+      self.simplification_tolerance = simplification_tolerance
+      self.simplification_error = None
+      self.geodesic_mode = GeodesicMode(geodesic_mode)
+      if isinstance(source, (str, Path)):
+         self.source = Path(source)
+         extension = self.source.suffix.lower()
+         self.waypoint_format = waypoint_format if waypoint_format is not None else \
+                                'csv' if extension == '.csv' else \
+                                'npy' if extension == '.npy' else \
+                                'binary' if extension in ('.bin', '.f64', '.dat') else 'pickle'
+         if self.waypoint_format not in ('binary', 'npy', 'csv', 'pickle'):
+            raise RuntimeError('Unknown waypoint file format "{}"'.format(self.waypoint_format))
+      else:
+         self.source = source
+         self.waypoint_format = None
+
+
+   # Built-in method implementations --------------------------------------------------------------
+
+   def __iter__(self) -> Iterator[numpy.ndarray]:
+      if self.simplification_tolerance is not None:
+         return self._simplify()
+      return self._read()
+
+
+   # Helper methods -------------------------------------------------------------------------------
+
+   def _read(self) -> Iterator[numpy.ndarray]:
+      if self.waypoint_format == 'binary':
+         return self._read_binary()
+      elif self.waypoint_format == 'npy':
+         return self._read_npy()
+      elif self.waypoint_format == 'csv':
+         return self._read_csv()
+      elif self.waypoint_format == 'pickle':
+         return self._rechunk(self._read_pickle())
+      return self._rechunk(iter(self.source))
+
+   def _simplify(self) -> Iterator[numpy.ndarray]:
+      """Yields the simplified waypoints of the route, allotting each chunk a share of the total
+      length error budget proportional to its share of the total route length.
+
+      The run of waypoints following the last kept interior waypoint of each chunk is not yet
+      final, so it is carried into the next chunk as a single segment between its end points
+      with the original length of the run, such that a straight route collapses to its two end
+      points regardless of how many chunks it spans."""
+
+      # Measure the total length of the original route
+      chunks = self._read() if self.waypoint_format is not None else list(self._read())
+      total_length, previous_waypoint = 0.0, None
+      for chunk in chunks:
+         if len(chunk) == 0:
+            continue
+         waypoints = chunk if previous_waypoint is None else numpy.concatenate((previous_waypoint, chunk))
+         total_length += float(GlobalCoordinateArray.from_llh(waypoints[:, 0], waypoints[:, 1], waypoints[:, 2])
+                               .compute_segment_distances(self.geodesic_mode).sum())
+         previous_waypoint = chunk[-1:]
+
+      # Simplify each chunk, preceded by the unfinished run carried over from the previous chunk,
+      # carrying any unused length error budget forward to the remaining chunks
+      remaining_length, remaining_error = total_length, 0.999 * self.simplification_tolerance
+      simplified_length, carried_waypoints, carried_length = 0.0, None, 0.0
+      chunks = self._read() if self.waypoint_format is not None else chunks
+      for chunk in chunks:
+         if len(chunk) == 0:
+            continue
+         waypoints = chunk if carried_waypoints is None else numpy.concatenate((carried_waypoints, chunk))
+         coordinates = GlobalCoordinateArray.from_llh(waypoints[:, 0], waypoints[:, 1], waypoints[:, 2])
+         segment_lengths = coordinates.compute_segment_distances(self.geodesic_mode)
+         if carried_waypoints is not None and len(carried_waypoints) == 2:
+            segment_lengths[0] = carried_length
+         kept_indices = numpy.flatnonzero(_simplify_waypoints(coordinates, (remaining_error / remaining_length) if remaining_length > 0.0 else 0.0,
+                                                              self.geodesic_mode, segment_lengths))
+
+         # Commit every kept waypoint up to the last kept interior waypoint
+         last_committed = kept_indices[-2] if len(kept_indices) > 1 else kept_indices[-1]
+         committed_indices = kept_indices[:-1] if len(kept_indices) > 1 else kept_indices
+         committed_length = float(segment_lengths[:last_committed].sum())
+         committed_simplified_length = float(coordinates[committed_indices].compute_segment_distances(self.geodesic_mode).sum())
+         remaining_length -= committed_length
+         remaining_error -= committed_length - committed_simplified_length
+         simplified_length += committed_simplified_length
+         simplified_waypoints = waypoints[committed_indices] if carried_waypoints is None else waypoints[committed_indices[1:]]
+         carried_waypoints = waypoints[[last_committed, len(waypoints) - 1]] if last_committed < len(waypoints) - 1 else waypoints[-1:]
+         carried_length = float(segment_lengths[last_committed:].sum())
+         if len(simplified_waypoints):
+            yield simplified_waypoints
+
+      # Finish the route with the end point of the final unfinished run
+      if carried_waypoints is not None and len(carried_waypoints) == 2:
+         simplified_length += float(GlobalCoordinateArray.from_llh(carried_waypoints[:, 0], carried_waypoints[:, 1], carried_waypoints[:, 2])
+                                    .compute_segment_distances(self.geodesic_mode).sum())
+         yield carried_waypoints[1:]
+      self.simplification_error = total_length - simplified_length
+
+
+   @staticmethod
+   def _as_waypoint_array(waypoints) -> numpy.ndarray:
+      waypoints = numpy.array(waypoints, dtype=float, ndmin=2)
+      if waypoints.size == 0:
+         return numpy.empty((0, 3))
+      if waypoints.shape[1] < 3:
+         raise RuntimeError('Each waypoint must contain a latitude, longitude, and height')
+      return waypoints[:, :3]
+
+   def _rechunk(self, sources: Iterator) -> Iterator[numpy.ndarray]:
+      """Coalesces arbitrarily sized waypoint arrays into chunks of exactly `chunk_size` rows."""
+      buffered_chunks, num_buffered = [], 0
+      for source in sources:
+         waypoints = WaypointReader._as_waypoint_array(source)
+         buffered_chunks.append(waypoints)
+         num_buffered += len(waypoints)
+         if num_buffered >= self.chunk_size:
+            waypoints = numpy.concatenate(buffered_chunks)
+            num_full_chunks = len(waypoints) // self.chunk_size
+            for i in range(num_full_chunks):
+               yield waypoints[i*self.chunk_size:(i+1)*self.chunk_size]
+            buffered_chunks = [waypoints[num_full_chunks*self.chunk_size:]]
+            num_buffered = len(buffered_chunks[0])
+      if num_buffered > 0:
+         yield numpy.concatenate(buffered_chunks)
+
+   def _read_binary(self) -> Iterator[numpy.ndarray]:
+      with open(self.source, 'rb') as waypoint_file:
+         while True:
+            waypoints = numpy.fromfile(waypoint_file, dtype='<f8', count=3*self.chunk_size)
+            if waypoints.size == 0:
+               break
+            if waypoints.size % 3 != 0:
+               raise RuntimeError('Binary waypoint file {} contains a truncated record'.format(self.source))
+            yield waypoints.reshape(-1, 3)
+
+   def _read_npy(self) -> Iterator[numpy.ndarray]:
+      waypoints = numpy.load(self.source, mmap_mode='r')
+      for start in range(0, len(waypoints), self.chunk_size):
+         yield WaypointReader._as_waypoint_array(waypoints[start:start+self.chunk_size])
+
+   def _read_csv(self) -> Iterator[numpy.ndarray]:
+      """Yields the waypoints of a `.csv` file, skipping any blank or non-numeric header rows
+      before the first waypoint and raising a `RuntimeError` for any malformed row after it."""
+      with open(self.source, 'r', newline='') as waypoint_file:
+         waypoints, in_header = [], True
+         reader = csv.reader(waypoint_file, delimiter=',')
+         for row in reader:
+            if not row:
+               continue
+            try:
+               if len(row) < 3:
+                  raise ValueError
+               waypoints.append([float(value) for value in row[:3]])
+               in_header = False
+            except ValueError:
+               if in_header:
+                  continue
+               raise RuntimeError('Malformed waypoint on line {} of {}: {}'.format(reader.line_num, self.source, ','.join(row)))
+            if len(waypoints) == self.chunk_size:
+               yield WaypointReader._as_waypoint_array(waypoints)
+               waypoints = []
+         if waypoints:
+            yield WaypointReader._as_waypoint_array(waypoints)
+
+   def _read_pickle(self) -> Iterator:
+      with open(self.source, 'rb') as waypoint_file:
+         while True:
+            try:
+               yield pickle.load(waypoint_file)
+            except EOFError:
+               break
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from symdesign.core.CurrentEnsemble import CurrentEnsemble
+from symdesign.core.GlobalCoordinate import GlobalCoordinateArray
+from symdesign.core.RouteCurrents import RouteCurrentProfile
+from pathlib import Path
+import numpy, tempfile
+
+def create_currents_dataset(path, std_scale):
+   latitudes, longitudes, depths = numpy.linspace(-10.0, 10.0, 21), numpy.linspace(-10.0, 10.0, 21), numpy.array([0.0, 10.0, 100.0])
+   shape = (len(depths), len(latitudes), len(longitudes))
+   generator = numpy.random.default_rng(0)
+   numpy.savez_compressed(path, latIndex=latitudes, lonIndex=longitudes, depthIndex=depths,
+                          uMeanData=generator.normal(0.0, 0.4, shape), uStdData=std_scale * generator.uniform(0.0, 0.2, shape),
+                          vMeanData=generator.normal(0.0, 0.4, shape), vStdData=std_scale * generator.uniform(0.0, 0.2, shape))
+   return str(path)
+
+def create_route(num_waypoints):
+   latitudes = numpy.linspace(-5.0, 5.0, num_waypoints)
+   longitudes = 3.0 * numpy.sin(numpy.linspace(0.0, 6.0, num_waypoints))
+   heights = numpy.zeros(num_waypoints)
+   return (latitudes[:-1], longitudes[:-1]) + GlobalCoordinateArray.from_llh(latitudes, longitudes, heights).compute_segment_enu()
+
+if __name__ == '__main__':
+
+   with tempfile.TemporaryDirectory() as data_directory:
+
+      # Ensure that an ensemble without any current variability matches the route current profile
+      print('\nSimulating an ensemble of constant currents...')
+      currents_path = create_currents_dataset(Path(data_directory).joinpath('constant.npz'), 0.0)
+      route = create_route(200)
+      statistics = CurrentEnsemble(currents_path).simulate({'route': route}, {'route': 1.5}, {'route': 1025.0}, 5, 0.1,
+                                                           propulsive_efficiency=0.8, hotel_power=20.0, seed=1)['route']
+      profile = RouteCurrentProfile.from_route(currents_path, *route)
+      speed = profile.minimum_speed_through_water(profile.distance / 1.5)
+      print('Transit duration matches: {}'.format(numpy.isclose(statistics.transit_duration, profile.distance / 1.5)))
+      print('Required speeds match the profile: {}'.format(numpy.allclose(statistics.required_speeds, speed, rtol=0.0, atol=1e-6)))
+      print('Energies match the profile: {}'.format(numpy.allclose(statistics.energies, profile.transit_energies(speed, 0.1, 1025.0, 0.8, 20.0), rtol=1e-6)))
+
+      # Ensure that variable currents yield reproducible distributions around the mean currents
+      print('\nSimulating an ensemble of variable currents...')
+      currents_path = create_currents_dataset(Path(data_directory).joinpath('variable.npz'), 1.0)
+      routes = {'first': create_route(200), 'second': create_route(50)}
+      ensemble = CurrentEnsemble(currents_path)
+      statistics = ensemble.simulate(routes, {'first': 1.5, 'second': 1.0}, {'first': 1025.0, 'second': 1025.0}, 200, 0.1, seed=7)
+      repeated = ensemble.simulate(routes, {'first': 1.5, 'second': 1.0}, {'first': 1025.0, 'second': 1025.0}, 200, 0.1, seed=7)
+      print('Seeded ensembles are reproducible: {}'.format(all(numpy.array_equal(statistics[name].energies, repeated[name].energies) for name in routes)))
+      print('Required speeds vary by realization: {}'.format(statistics['first'].required_speeds.std() > 0.0))
+      print('Percentiles are ordered: {}'.format(statistics['first'].required_speed(5.0) <= statistics['first'].required_speed(50.0) <= statistics['first'].required_speed(95.0)))
+      profile = RouteCurrentProfile.from_route(currents_path, *routes['first'])
+      print('Mean current profile is within the ensemble: {}'.format(
+         statistics['first'].required_speeds.min() <= profile.minimum_speed_through_water(statistics['first'].transit_duration) <= statistics['first'].required_speeds.max()))
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from symdesign.core.EnvironmentSampler import EnvironmentSampler
+from symdesign.core.OceanData import OceanEnvironment
+from pathlib import Path
+import numpy, tempfile
+
+def create_field_dataset(path, latitudes, longitudes, depths, low, high):
+   numpy.savez_compressed(path, latIndex=latitudes, lonIndex=longitudes, depthIndex=depths,
+                          data=numpy.random.uniform(low, high, (len(latitudes), len(longitudes), len(depths))))
+   return str(path)
+
+def create_currents_dataset(path, latitudes, longitudes, depths):
+   shape = (len(depths), len(latitudes), len(longitudes))
+   numpy.savez_compressed(path, latIndex=latitudes, lonIndex=longitudes, depthIndex=depths,
+                          uMeanData=numpy.random.normal(0.0, 0.2, shape), uStdData=numpy.random.uniform(0.0, 0.1, shape),
+                          vMeanData=numpy.random.normal(0.0, 0.2, shape), vStdData=numpy.random.uniform(0.0, 0.1, shape))
+   return str(path)
+
+def nearest_indices(axis, values):
+   return numpy.abs(numpy.asarray(values)[..., numpy.newaxis] - axis).argmin(axis=-1)
+
+def density_model(_latitude_deg, _longitude_deg, depth_m):
+   return 1030.0 + (20.0 * (depth_m / 4000.0))
+
+if __name__ == '__main__':
+
+   with tempfile.TemporaryDirectory() as data_directory:
+
+      # Ensure that all fields are sampled from the closest grid cells using shared grids
+      print('\nSampling multiple environmental fields in a single pass...')
+      latitudes, longitudes, depths = numpy.linspace(-30.0, 30.0, 61), numpy.linspace(100.0, 160.0, 121), numpy.array([0.0, 10.0, 100.0, 1000.0, 5000.0])
+      current_latitudes, current_longitudes = numpy.linspace(-30.0, 30.0, 31), numpy.linspace(100.0, 160.0, 31)
+      salinity_path = create_field_dataset(Path(data_directory).joinpath('salinity.npz'), latitudes, longitudes, depths, 30.0, 36.0)
+      temperature_path = create_field_dataset(Path(data_directory).joinpath('temperature.npz'), latitudes, longitudes, depths, -2.0, 25.0)
+      currents_path = create_currents_dataset(Path(data_directory).joinpath('currents.npz'), current_latitudes, current_longitudes, depths)
+      sampler = EnvironmentSampler()
+      sampler.add_field('salinity', salinity_path, 35.0)
+      sampler.add_field('temperature', temperature_path, 10.0)
+      sampler.add_current_field('current', currents_path, 2.0, depth=10.0)
+      sampler.add_field('density', density_model, 1025.0)
+      sampler.add_field('missing', None, 42.0)
+      print('Fields with identical axes share a grid: {}'.format(repr(sampler) == 'EnvironmentSampler(5 fields on 2 grids)'))
+      sample_latitudes, sample_longitudes = numpy.random.uniform(-29.0, 29.0, 1000), numpy.random.uniform(101.0, 159.0, 1000)
+      sample_depths = numpy.random.uniform(0.0, 4000.0, 1000)
+      samples = sampler.sample(sample_latitudes, sample_longitudes, sample_depths)
+      lat_index, lon_index, depth_index = nearest_indices(latitudes, sample_latitudes), nearest_indices(longitudes, sample_longitudes), nearest_indices(depths, sample_depths)
+      print('Gridded samples match: {}'.format(
+         numpy.array_equal(samples['salinity'], OceanEnvironment.load(salinity_path)['data'][lat_index, lon_index, depth_index]) and
+         numpy.array_equal(samples['temperature'], OceanEnvironment.load(temperature_path)['data'][lat_index, lon_index, depth_index])))
+      current_speeds = OceanEnvironment.load(currents_path).worst_case_current_speeds(2.0)
+      print('Fixed-depth samples match: {}'.format(numpy.array_equal(samples['current'], current_speeds[
+         nearest_indices(depths, 10.0), nearest_indices(current_latitudes, sample_latitudes), nearest_indices(current_longitudes, sample_longitudes)])))
+      print('Callable samples match: {}'.format(numpy.allclose(samples['density'], density_model(sample_latitudes, sample_longitudes, sample_depths))))
+      print('Default samples match: {}'.format(numpy.array_equal(samples['missing'], numpy.full(1000, 42.0))))
+      scalar_samples = sampler.sample(sample_latitudes[0], sample_longitudes[0], sample_depths[0])
+      print('Scalar samples match: {}'.format(all(numpy.isclose(scalar_samples[name], samples[name][0]) for name in sampler.field_names)))
+      try:
+         sampler.add_field('salinity', salinity_path, 35.0)
+         print('Duplicate field rejected: False')
+      except RuntimeError:
+         print('Duplicate field rejected: True')
+
+      # Ensure that water-column profiles hold every grid level down to the local seafloor
+      print('\nSampling water-column profiles...')
+      seafloor_depths = numpy.random.uniform(0.0, 6000.0, 1000)
+      profiles = sampler.sample_profiles(sample_latitudes, sample_longitudes, seafloor_depths)
+      salinity_data = OceanEnvironment.load(salinity_path)['data']
+      seafloor_levels = depths[nearest_indices(depths, seafloor_depths)]
+      expected_profiles = numpy.array([[salinity_data[lat_index[i], lon_index[i], level] if depths[level] <= seafloor_levels[i] else numpy.nan
+                                        for level in range(len(depths))] for i in range(len(sample_latitudes))])
+      print('Gridded profiles match: {}'.format(numpy.array_equal(profiles['salinity'], expected_profiles, equal_nan=True)))
+      print('Profile extremes match: {}'.format(
+         numpy.array_equal(numpy.fmax.reduce(profiles['salinity'], axis=1), numpy.nanmax(expected_profiles, axis=1)) and
+         numpy.array_equal(numpy.fmin.reduce(profiles['salinity'], axis=1), numpy.nanmin(expected_profiles, axis=1))))
+      print('Fixed-depth profiles match: {}'.format(numpy.array_equal(profiles['current'][:, 0], samples['current'])))
+      callable_depths = seafloor_depths[:, numpy.newaxis] * numpy.linspace(0.0, 1.0, EnvironmentSampler.callable_profile_levels)[numpy.newaxis, :]
+      print('Callable profiles match: {}'.format(numpy.allclose(profiles['density'], density_model(None, None, callable_depths))))
+      print('Default profiles match: {}'.format(numpy.array_equal(profiles['missing'], numpy.full((1000, 1), 42.0))))
+      OceanEnvironment.clear()
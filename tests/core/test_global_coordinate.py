@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from symdesign.core.GlobalCoordinate import GeodesicMode, GlobalCoordinate, GlobalCoordinateArray
+from symdesign.core.RouteTurns import RouteTurnProfile
+from symdesign.core.SpatialIndex import SpatialIndex
+from symdesign.core.Track import Track
+import math, numpy, time
+
+if __name__ == '__main__':
+
+   # Create a set of random coordinates, including both poles and the equator
+   print('\nCreating random global coordinates...')
+   latitudes = numpy.concatenate(([90.0, -90.0, 0.0], numpy.random.uniform(-90.0, 90.0, 10000)))
+   longitudes = numpy.random.uniform(-180.0, 180.0, len(latitudes))
+   heights = numpy.random.uniform(-6000.0, 9000.0, len(latitudes))
+   coordinates = GlobalCoordinateArray.from_llh(latitudes, longitudes, heights)
+   scalars = [GlobalCoordinate().set_llh(lat, lon, height) for lat, lon, height in zip(latitudes, longitudes, heights)]
+   relative_error = lambda array, values: numpy.max(numpy.abs(array - values)) / numpy.max(numpy.abs(values))
+   angular_error = lambda array, values, period: numpy.max(period / 2.0 - numpy.abs(period / 2.0 - numpy.mod(array - values, period)))
+
+   # Ensure that all vectorized conversions and measurements match the scalar implementation
+   print('Comparing vectorized results against scalar GlobalCoordinate results...')
+   print('LLH-to-XYZ matches: {}'.format(max(relative_error(getattr(coordinates, name), [getattr(scalar, name) for scalar in scalars])
+                                             for name in ('x', 'y', 'z', 'earth_rad')) < 1e-9))
+   converted = GlobalCoordinateArray.from_xyz(coordinates.x, coordinates.y, coordinates.z)
+   converted_scalars = [GlobalCoordinate().set_xyz(x, y, z) for x, y, z in zip(coordinates.x, coordinates.y, coordinates.z)]
+   print('XYZ-to-LLH matches: {}'.format(max(relative_error(getattr(converted, name), [getattr(scalar, name) for scalar in converted_scalars])
+                                             for name in ('latitude', 'longitude', 'height', 'earth_rad')) < 1e-9))
+   print('Distances match: {}'.format(relative_error(coordinates[1:].compute_distance(coordinates[:-1]),
+      [scalars[i + 1].compute_distance(scalars[i]) for i in range(len(scalars) - 1)]) < 1e-9))
+   print('Initial bearings match: {}'.format(angular_error(coordinates[:-1].compute_initial_bearing(coordinates[1:]),
+      [scalars[i].compute_initial_bearing(scalars[i + 1]) for i in range(len(scalars) - 1)], 360.0) < 1e-9))
+   print('Final bearings match: {}'.format(angular_error(coordinates.compute_final_bearing(scalars[3]),
+      [scalar.compute_final_bearing(scalars[3]) for scalar in scalars], 180.0) < 1e-9))
+   print('Indexed coordinate matches: {}'.format(coordinates[3] == scalars[3]))
+
+   # Time the conversion and measurement of a dense track
+   print('\nConverting and measuring a 1,000,000-point track...')
+   track_latitudes = 30.0 + numpy.cumsum(numpy.random.normal(0.0, 1e-4, 1000000))
+   track_longitudes = -60.0 + numpy.cumsum(numpy.random.normal(0.0, 1e-4, 1000000))
+   start_time = time.perf_counter()
+   track = GlobalCoordinateArray.from_llh(track_latitudes, track_longitudes, 0.0)
+   distance = track.compute_segment_distances().sum()
+   print('Track length: {:.3f} km in {:.1f} ms'.format(0.001 * distance, 1000.0 * (time.perf_counter() - start_time)))
+
+   # Ensure that track queries match brute-force searches over all legs
+   print('\nBuilding a track and comparing point-to-track queries against brute-force searches...')
+   track = Track(track)
+   query_indices = numpy.random.randint(0, len(track_latitudes), 200)
+   query_latitudes = track_latitudes[query_indices] + numpy.random.normal(0.0, 0.01, 200)
+   query_longitudes = track_longitudes[query_indices] + numpy.random.normal(0.0, 0.01, 200)
+   start_time = time.perf_counter()
+   cross_track, along_track, legs = track.locate(query_latitudes, query_longitudes)
+   print('Average query time: {:.1f} us'.format(1000000.0 * (time.perf_counter() - start_time) / 200))
+   query_points = GlobalCoordinateArray.from_llh(query_latitudes[:10], query_longitudes[:10], 0.0)
+   print('Cross-track distances match: {}'.format(all(abs(track._leg_distances(point, 0, len(track))[0].min() - distance) < 1e-6
+                                                     for point, distance in zip(query_points.get_ecef(), cross_track))))
+   print('Track length matches cumulative distance: {}'.format(abs(track.distance - distance) < 1e-6))
+   latitude, longitude, height = track.position_at(along_track[0])
+   print('Projected point lies on the track: {}'.format(track.cross_track_distance(latitude, longitude, height) < 1e-6))
+   northbound = Track(GlobalCoordinateArray.from_llh([10.0, 11.0], [20.0, 20.0], 0.0))
+   southbound = Track(GlobalCoordinateArray.from_llh([11.0, 10.0], [20.0, 20.0], 0.0))
+   print('Northbound leg bearings are 0 degrees: {}'.format(
+      numpy.allclose(northbound.initial_bearings, 0.0) and numpy.allclose(northbound.final_bearings, 0.0)))
+   print('Southbound leg bearings are 180 degrees: {}'.format(
+      numpy.allclose(southbound.initial_bearings, 180.0) and numpy.allclose(southbound.final_bearings, 180.0)))
+
+   # Ensure that spatial index queries match brute-force searches over all points
+   print('\nBuilding a spatial index and comparing nearest-neighbor queries against brute-force searches...')
+   index = SpatialIndex(track.points.get_ecef())
+   start_time = time.perf_counter()
+   distances, indices = index.query(query_latitudes, query_longitudes, k=4)
+   print('Average query time: {:.1f} us'.format(1000000.0 * (time.perf_counter() - start_time) / 200))
+   brute_force = [numpy.linalg.norm(index.points - point, axis=1) for point in query_points.get_ecef()]
+   print('Nearest neighbors match: {}'.format(all(numpy.allclose(numpy.sort(all_distances)[:4], distances[i])
+                                                  for i, all_distances in enumerate(brute_force))))
+   neighbors = index.query_radius_ecef(query_points.get_ecef(), 500.0)
+   print('Radius neighbors match: {}'.format(all(numpy.array_equal(numpy.flatnonzero(all_distances <= 500.0), neighbors[i])
+                                                 for i, all_distances in enumerate(brute_force))))
+
+   # Ensure that geodesic distances match published reference values
+   print('\nComparing geodesic distances against reference values...')
+   flinders_peak = GlobalCoordinate().set_llh(-(37.0 + (57.0 / 60.0) + (3.7203 / 3600.0)), 144.0 + (25.0 / 60.0) + (29.5244 / 3600.0), 0.0)
+   buninyong = GlobalCoordinate().set_llh(-(37.0 + (39.0 / 60.0) + (10.1561 / 3600.0)), 143.0 + (55.0 / 60.0) + (35.3839 / 3600.0), 0.0)
+   print('Vincenty reference distance matches: {}'.format(abs(flinders_peak.compute_distance(buninyong, GeodesicMode.VINCENTY) - 54972.271) < 1e-3))
+   equator = GlobalCoordinateArray.from_llh([0.0, 0.0], [0.0, 1.0], 0.0)
+   print('Equatorial degree matches: {}'.format(abs(equator.compute_segment_distances(GeodesicMode.VINCENTY)[0] - (math.pi * 6378137.0 / 180.0)) < 1e-6))
+
+   # Benchmark the throughput and error of each geodesic mode over legs of increasing length
+   print('\nBenchmarking geodesic modes over 1,000,000 legs of each length...')
+   for leg_length in (1000.0, 10000.0, 100000.0, 500000.0):
+      starts = GlobalCoordinateArray.from_llh(numpy.random.uniform(-80.0, 80.0, 1000000), numpy.random.uniform(-180.0, 180.0, 1000000), 0.0)
+      bearings = numpy.random.uniform(0.0, 2.0 * math.pi, 1000000)
+      angles = leg_length / 6371000.0
+      end_latitudes = numpy.arcsin((numpy.sin(starts.latitude) * math.cos(angles)) + (numpy.cos(starts.latitude) * math.sin(angles) * numpy.cos(bearings)))
+      end_longitudes = starts.longitude + numpy.arctan2(numpy.sin(bearings) * math.sin(angles) * numpy.cos(starts.latitude),
+                                                        math.cos(angles) - (numpy.sin(starts.latitude) * numpy.sin(end_latitudes)))
+      ends = GlobalCoordinateArray.from_llh(numpy.degrees(end_latitudes), numpy.degrees(end_longitudes), 0.0)
+      results, durations = {}, {}
+      for mode in GeodesicMode:
+         start_time = time.perf_counter()
+         results[mode] = starts.compute_distance(ends, mode)
+         durations[mode] = time.perf_counter() - start_time
+      for mode in GeodesicMode:
+         print('  {:>4.0f} km legs, {:<8s}: {:5.1f} M legs/s, max error {:.6f} m'.format(
+            0.001 * leg_length, mode.name, 1e-6 * len(bearings) / durations[mode],
+            numpy.max(numpy.abs(results[mode] - results[GeodesicMode.VINCENTY]))))
+
+   # Ensure that segment bearings and route turns match the pairwise bearing calculations
+   print('\nComparing segment bearings and route turns against pairwise bearings...')
+   initial_bearings, final_bearings = coordinates.compute_segment_bearings()
+   print('Segment initial bearings match: {}'.format(angular_error(initial_bearings, coordinates[:-1].compute_initial_bearing(coordinates[1:]), 360.0) < 1e-9))
+   print('Segment final bearings match: {}'.format(angular_error(final_bearings, coordinates[1:].compute_initial_bearing(coordinates[:-1]) + 180.0, 360.0) < 1e-9))
+   square_side = 1000.0 / 111320.0
+   turns = RouteTurnProfile.from_route(numpy.array([0.0, square_side, square_side, 0.0]), numpy.array([0.0, 0.0, square_side, square_side]), numpy.zeros(4))
+   print('Square route turns clockwise by 90 degrees: {}'.format(numpy.allclose(turns.heading_changes, 90.0, atol=1e-5)))
+   reversal_turns = RouteTurnProfile.from_route(numpy.array([0.0, square_side, square_side, 0.0]), numpy.array([0.0, 0.0, 0.0, 0.0]), numpy.zeros(4))
+   print('Route reversal has a zero turn radius: {}'.format(reversal_turns.num_reversals == 1 and reversal_turns.minimum_turn_radius == 0.0 and
+                                                            reversal_turns.maximum_yaw_rate(1.5) == math.inf))
+   near_reversal_turns = RouteTurnProfile.from_route(numpy.array([0.0, square_side, 0.0]), numpy.array([0.0, 0.0, 0.01 * square_side]), numpy.zeros(3))
+   print('Sharp turn is not a reversal: {}'.format(near_reversal_turns.num_reversals == 0 and near_reversal_turns.minimum_turn_radius > 0.0))
+   start_time = time.perf_counter()
+   turns = RouteTurnProfile.from_route(track_latitudes, track_longitudes, numpy.zeros(len(track_latitudes)))
+   print('Turn profile of a 1,000,000-point track in {:.1f} ms: {}, 95th percentile yaw rate at 1.5 m/s {:.3f} deg/s'.format(
+      1000.0 * (time.perf_counter() - start_time), turns, turns.yaw_rate(1.5, 95.0)))
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from symdesign.core.Mission import Mission, MissionStage, MissionTarget
+from symdesign.core.OceanData import OceanDataset, OceanEnvironment
+from symdesign.core.Waypoints import WaypointReader
+from pathlib import Path
+import numpy, tempfile
+
+def create_datasets(directory):
+   generator = numpy.random.default_rng(0)
+   latitudes, longitudes, depths = numpy.linspace(-20.0, 20.0, 81), numpy.linspace(-60.0, -20.0, 81), numpy.array([0.0, 10.0, 50.0, 200.0, 1000.0, 4000.0])
+   paths = { name: str(Path(directory).joinpath(name + '.npz')) for name in ('bathymetry', 'currents', 'salinity', 'temperature', 'density') }
+   numpy.savez_compressed(paths['bathymetry'], latIndex=latitudes, lonIndex=longitudes,
+                          zMat=-generator.uniform(10.0, 4000.0, (len(latitudes), len(longitudes))))
+   current_shape = (len(depths), len(latitudes), len(longitudes))
+   numpy.savez_compressed(paths['currents'], latIndex=latitudes, lonIndex=longitudes, depthIndex=depths,
+                          uMeanData=generator.normal(0.0, 0.2, current_shape), uStdData=generator.uniform(0.0, 0.1, current_shape),
+                          vMeanData=generator.normal(0.0, 0.2, current_shape), vStdData=generator.uniform(0.0, 0.1, current_shape))
+   for name, low, high in (('salinity', 30.0, 36.0), ('temperature', -2.0, 25.0), ('density', 1020.0, 1050.0)):
+      numpy.savez_compressed(paths[name], latIndex=latitudes, lonIndex=longitudes, depthIndex=depths,
+                             data=generator.uniform(low, high, (len(latitudes), len(longitudes), len(depths))))
+   return paths
+
+def create_waypoints(num_waypoints):
+   latitudes = numpy.linspace(-15.0, 15.0, num_waypoints)
+   longitudes = -40.0 + (10.0 * numpy.sin(numpy.linspace(0.0, 4.0, num_waypoints)))
+   return numpy.column_stack((latitudes, longitudes, numpy.zeros(num_waypoints))).tolist()
+
+def stage_summary(stage):
+   return { name: value for name, value in vars(stage).items() if not name.startswith('_') and isinstance(value, (int, float)) }
+
+def summaries_match(first, second):
+   first, second = stage_summary(first), stage_summary(second)
+   return first.keys() == second.keys() and all(numpy.isclose(first[name], second[name], rtol=1e-12) for name in first)
+
+def load_ocean_data_stage(paths, waypoints, **kwargs):
+   stage = MissionStage('transit', [MissionTarget.EXACT_DISTANCE])
+   stage.load_waypoints_and_ocean_data(waypoints, paths['bathymetry'], paths['currents'], paths['salinity'], paths['temperature'], **kwargs)
+   return stage
+
+def load_mission_stage(paths, waypoints):
+   stage = load_ocean_data_stage(paths, waypoints)
+   stage.maximum_pitch_angle = stage.maximum_roll_angle = 0.0
+   stage.target_average_horizontal_speed = 1.5
+   return stage
+
+def load_custom_density_stage(paths, waypoints, **kwargs):
+   stage = MissionStage('transit', [MissionTarget.EXACT_DISTANCE])
+   stage.load_waypoints_and_custom_density(waypoints, paths['bathymetry'], paths['currents'], paths['density'], **kwargs)
+   return stage
+
+if __name__ == '__main__':
+
+   with tempfile.TemporaryDirectory() as data_directory:
+
+      # Ensure that batched and unbatched waypoint ingestion produce the same stage
+      print('\nLoading Mission Stages with batched and unbatched waypoint ingestion...')
+      paths, waypoints = create_datasets(data_directory), create_waypoints(5000)
+      print('Ocean data loaders match: {}'.format(summaries_match(load_ocean_data_stage(paths, waypoints),
+                                                                  load_ocean_data_stage(paths, waypoints, batched=False))))
+      print('Custom density loaders match: {}'.format(summaries_match(load_custom_density_stage(paths, waypoints),
+                                                                      load_custom_density_stage(paths, waypoints, batched=False))))
+      print('Chunked loaders match: {}'.format(summaries_match(load_ocean_data_stage(paths, WaypointReader(waypoints, chunk_size=777)),
+                                                              load_ocean_data_stage(paths, waypoints, batched=False))))
+      print('Single-waypoint loaders match: {}'.format(summaries_match(load_ocean_data_stage(paths, waypoints[:1]),
+                                                                       load_ocean_data_stage(paths, waypoints[:1], batched=False))))
+      # Ensure that memory-mapped models produce the same stage as compressed archives
+      print('\nLoading a Mission Stage from memory-mapped models...')
+      mmap_paths = { name: str(OceanDataset.convert_to_memory_mappable(path, Path(data_directory).joinpath(name))) for name, path in paths.items() }
+      print('Memory-mapped models are used: {}'.format(all(OceanEnvironment.load(path).memory_mapped for path in mmap_paths.values())))
+      print('Memory-mapped loaders match: {}'.format(summaries_match(load_ocean_data_stage(mmap_paths, waypoints),
+                                                                     load_ocean_data_stage(paths, waypoints))))
+      OceanEnvironment.clear()
+
+      # Ensure that densified sampling visits every grid cell crossed between waypoints
+      print('\nLoading Mission Stages with densified along-track sampling...')
+      equator_waypoints = [[0.0, -55.0, 0.0], [0.0, -40.0, 0.0], [0.0, -25.0, 0.0]]
+      dense_waypoints = [[0.0, longitude, 0.0] for longitude in numpy.linspace(-55.0, -25.0, 3001)]
+      sparse_stage = load_ocean_data_stage(paths, equator_waypoints)
+      densified_stage = load_ocean_data_stage(paths, equator_waypoints, sample_spacing=5000.0)
+      dense_stage = load_ocean_data_stage(paths, dense_waypoints)
+      extremes = ('maximum_depth', 'minimum_salinity', 'maximum_salinity', 'minimum_temperature', 'maximum_temperature', 'maximum_ocean_current_speed')
+      print('Densified extremes match dense waypoints: {}'.format(all(getattr(densified_stage, name) == getattr(dense_stage, name) for name in extremes)))
+      print('Densified extremes widen sparse extremes: {}'.format(densified_stage.maximum_depth > sparse_stage.maximum_depth and
+                                                                  densified_stage.maximum_salinity > sparse_stage.maximum_salinity))
+      print('Densified distance is unchanged: {}'.format(densified_stage.target_distance == sparse_stage.target_distance))
+      try:
+         load_ocean_data_stage(paths, equator_waypoints, batched=False, sample_spacing=5000.0)
+         print('Unbatched densified sampling rejected: False')
+      except RuntimeError:
+         print('Unbatched densified sampling rejected: True')
+      OceanEnvironment.clear()
+
+      # Ensure that concurrently loaded stages match sequentially loaded ones, in order
+      print('\nLoading Mission Stages concurrently...')
+      routes = [create_waypoints(num_waypoints) for num_waypoints in (3000, 20, 800, 1)]
+      sequential_mission, concurrent_mission = Mission(), Mission()
+      for route in routes:
+         sequential_mission.add_stage(load_mission_stage(paths, route))
+      concurrent_mission.add_stages([lambda route=route: load_mission_stage(paths, route) for route in routes], max_workers=4)
+      print('Concurrent stages match: {}'.format(len(concurrent_mission.stages) == len(routes) and
+                                                 all(summaries_match(sequential, concurrent) for sequential, concurrent
+                                                     in zip(sequential_mission.stages, concurrent_mission.stages))))
+      failing_mission = Mission()
+      try:
+         failing_mission.add_stages([lambda: load_mission_stage(paths, routes[0]),
+                                     lambda: load_mission_stage(dict(paths, salinity=str(Path(data_directory).joinpath('missing.npz'))), routes[1])])
+         print('Failed stage raises: False')
+      except FileNotFoundError:
+         print('Failed stage raises: True')
+      print('Failed stages are not added: {}'.format(len(failing_mission.stages) == 0))
+      OceanEnvironment.clear()
+
+      # Ensure that water-column profiles yield the extremes over each water column above the seafloor
+      print('\nLoading Mission Stages with water-column profiles...')
+      profile_waypoints, shallow_paths = create_waypoints(30), dict(paths, bathymetry=lambda _latitude_deg, _longitude_deg: -20.0)
+      surface_stage = load_ocean_data_stage(shallow_paths, profile_waypoints)
+      profile_stage = load_ocean_data_stage(shallow_paths, profile_waypoints, water_column_profiles=True)
+      salinity, route = OceanEnvironment.load(paths['salinity']), numpy.array(profile_waypoints)
+      lat_index = numpy.abs(route[:, :1] - salinity['latIndex']).argmin(axis=1)
+      lon_index = numpy.abs(route[:, 1:2] - salinity['lonIndex']).argmin(axis=1)
+      columns = salinity['data'][lat_index, lon_index, :]
+      shallow_columns = columns[:, salinity['depthIndex'] <= 10.0]
+      print('Profile salinity extremes match: {}'.format(profile_stage.minimum_salinity == shallow_columns.min() and
+                                                         profile_stage.maximum_salinity == shallow_columns.max()))
+      print('Levels below the seafloor are excluded: {}'.format(profile_stage.minimum_salinity > columns.min() or
+                                                                profile_stage.maximum_salinity < columns.max()))
+      print('Profile extremes widen surface and seafloor extremes: {}'.format(
+         profile_stage.minimum_salinity <= surface_stage.minimum_salinity and profile_stage.maximum_salinity >= surface_stage.maximum_salinity and
+         profile_stage.minimum_temperature <= surface_stage.minimum_temperature and profile_stage.maximum_temperature >= surface_stage.maximum_temperature))
+      OceanEnvironment.clear()
+
+      # Ensure that a route which doubles back on itself is rejected rather than given an infinite yaw rate
+      print('\nComputing the turn profile of a Mission Stage whose route reverses...')
+      reversal_stage = MissionStage('reversal', [MissionTarget.EXACT_DISTANCE])
+      reversal_stage.waypoints = WaypointReader([[10.0, -40.0, 0.0], [10.1, -40.0, 0.0], [10.1, -40.0, 0.0], [10.0, -40.0, 0.0]])
+      try:
+         reversal_stage.compute_turn_profile(1.5)
+         print('Route reversal rejected: False')
+      except RuntimeError:
+         print('Route reversal rejected: True')
+      print('Rejected turn profile leaves the stage unchanged: {}'.format(reversal_stage.turn_profile is None and reversal_stage.maximum_yaw_rate is None))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from symdesign.core.Mission import Mission, MissionStage, MissionTarget
+from symdesign.core.Propagation import ConstraintPropagator
+from sympy import Symbol
+import itertools, math
+
+BOUNDS = ['minimum_distance', 'maximum_distance', 'minimum_duration', 'maximum_duration',
+          'minimum_average_horizontal_speed', 'maximum_average_horizontal_speed']
+
+def create_stage(name, targets, **values):
+   stage = MissionStage(name, targets)
+   stage.minimum_density, stage.maximum_density, stage.maximum_depth = 1025.0, 1040.0, 100.0
+   stage.maximum_pitch_angle, stage.maximum_roll_angle = 30.0, 0.0
+   for attribute, value in values.items():
+      setattr(stage, attribute, value)
+   return stage
+
+def create_stages():
+   return [create_stage('s0', [MissionTarget.EXACT_DURATION], target_duration=48.0, maximum_distance=29.0),
+           create_stage('s1', [MissionTarget.EXACT_DISTANCE, MissionTarget.MAXIMUM_DURATION],
+                        target_distance=52.0, target_average_horizontal_speed=87.0),
+           create_stage('s2', [MissionTarget.EXACT_DISTANCE, MissionTarget.MAXIMUM_DISTANCE, MissionTarget.EXACT_DURATION],
+                        target_duration=82.0, target_distance=97.0)]
+
+def finalize_mission(stages):
+   mission = Mission()
+   for stage in stages:
+      mission.add_stage(stage)
+   mission.minimum_distance = 341.0
+   mission.finalize()
+   return {stage.name: [getattr(stage, name) for name in BOUNDS] for stage in mission.stages}
+
+def bounds_match(first, second):
+   return all((a is None and b is None) or (a is not None and b is not None and math.isclose(a, b, rel_tol=1e-12))
+              for name in first for a, b in zip(first[name], second[name]))
+
+class Bounds(object):
+   def __init__(self):
+      self.lower, self.upper = None, None
+
+if __name__ == '__main__':
+
+   # Ensure that bounds are only ever tightened by the constraint propagator
+   print('\nTightening bounds in a constraint propagator...')
+   bounds, propagator = Bounds(), ConstraintPropagator()
+   print('Missing lower bound assigned: {}'.format(propagator.tighten_lower(bounds, 'lower', 2.0) and bounds.lower == 2.0))
+   print('Looser lower bound ignored: {}'.format(not propagator.tighten_lower(bounds, 'lower', 1.0) and bounds.lower == 2.0))
+   print('Tighter lower bound assigned: {}'.format(propagator.tighten_lower(bounds, 'lower', 3.0) and bounds.lower == 3.0))
+   print('Missing upper bound assigned: {}'.format(propagator.tighten_upper(bounds, 'upper', 5.0) and bounds.upper == 5.0))
+   print('Looser upper bound ignored: {}'.format(not propagator.tighten_upper(bounds, 'upper', 6.0) and bounds.upper == 5.0))
+   print('Tighter upper bound assigned: {}'.format(propagator.tighten_upper(bounds, 'upper', 4.0) and bounds.upper == 4.0))
+
+   # Ensure that a stage keeps its own speed bound when a looser mission-level bound is derived first
+   print('\nFinalizing a mission with stage-level and mission-level minimum speeds...')
+   results = finalize_mission(create_stages())
+   print('Stage s0 minimum average speed: {} m/s (expected 4000.0 m/s)'.format(results['s0'][4]))
+   print('Stage s0 keeps its own tighter bound: {}'.format(math.isclose(results['s0'][4], 4000.0)))
+
+   # Ensure that the finalized bounds do not depend on the order in which stages were added
+   print('Finalizing the same mission with every ordering of its stages...')
+   print('Bounds independent of stage order: {}'.format(
+      all(bounds_match(results, finalize_mission([create_stages()[index] for index in order]))
+          for order in itertools.permutations(range(3)))))
+
+   # Ensure that symbolic bounds are left alone rather than compared numerically
+   print('\nTightening symbolic bounds...')
+   bounds.lower, bounds.upper = Symbol('lower'), Symbol('upper')
+   print('Incomparable lower bound kept: {}'.format(not propagator.tighten_lower(bounds, 'lower', 1.0) and bounds.lower == Symbol('lower')))
+   print('Incomparable upper bound kept: {}'.format(not propagator.tighten_upper(bounds, 'upper', 1.0) and bounds.upper == Symbol('upper')))
+   mission = Mission()
+   for stage in create_stages():
+      mission.add_stage(stage)
+   mission.minimum_distance = 341.0
+   mission.finalize()
+   try:
+      mission.finalize()
+      print('Mission with symbolized targets finalizes again: True')
+   except TypeError:
+      print('Mission with symbolized targets finalizes again: False')
+
+   # Ensure that a minimum duration target takes precedence over deriving a maximum duration
+   print('\nFinalizing a stage with both minimum and maximum duration targets...')
+   mission = Mission()
+   mission.add_stage(create_stage('s0', [MissionTarget.EXACT_DISTANCE, MissionTarget.MINIMUM_DURATION, MissionTarget.MAXIMUM_DURATION],
+                                  target_distance=10.0, minimum_average_horizontal_speed=1.0, maximum_average_horizontal_speed=2.0))
+   mission.finalize()
+   print('Minimum duration derived: {}'.format(math.isclose(mission.stages[0].minimum_duration, 5000.0)))
+   print('Maximum duration not derived: {}'.format(mission.stages[0].maximum_duration is None))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from symdesign.core.GlobalCoordinate import GeodesicMode
+from symdesign.core.Mission import Mission, MissionStage, MissionTarget
+from symdesign.core.RouteCurrents import RouteCurrentProfile
+from symdesign.core.RouteTurns import RouteTurnProfile
+from symdesign.core.Waypoints import WaypointReader
+from pathlib import Path
+from sympy import Symbol
+import numpy, struct, tempfile
+
+def stage_state(stage):
+   state = { name: value for name, value in stage.__dict__.items()
+             if name not in ('waypoints', 'current_profile', 'turn_profile') }
+   if stage.waypoints is not None:
+      state['waypoints'] = (str(stage.waypoints.source), stage.waypoints.waypoint_format,
+                            stage.waypoints.chunk_size, stage.waypoints.simplification_tolerance, stage.waypoints.geodesic_mode)
+   if stage.current_profile is not None:
+      state['current_profile'] = [array.tolist() for array in (stage.current_profile.lengths,
+         stage.current_profile.along_track_currents, stage.current_profile.cross_track_currents)]
+   if stage.turn_profile is not None:
+      state['turn_profile'] = [array.tolist() for array in (stage.turn_profile.heading_changes, stage.turn_profile.turn_radii)]
+   return state
+
+if __name__ == '__main__':
+
+   with tempfile.TemporaryDirectory() as data_directory:
+
+      # Create a mission whose stages hold numeric, missing, and symbolic values along with waypoints and profiles
+      print('\nCreating a mission with numeric, symbolic, and profiled stages...')
+      waypoints_path = Path(data_directory).joinpath('waypoints.csv')
+      waypoints_path.write_text('latitude,longitude,height\n70.0,-150.0,0.0\n70.5,-149.0,0.0\n71.0,-148.0,0.0\n')
+      mission = Mission()
+      mission.minimum_duration, mission.maximum_average_horizontal_speed = 3600.0, 1.5
+      for index in range(3):
+         stage = MissionStage('stage{}'.format(index), [MissionTarget.EXACT_DISTANCE, MissionTarget.MAXIMUM_DURATION])
+         stage.maximum_pitch_angle, stage.maximum_roll_angle, stage.maximum_depth = 30.0, 0.0, 100.0 * (index + 1)
+         stage.target_distance, stage.maximum_duration = 10.0 * (index + 1), 86400.0
+         stage.target_duration = Symbol(stage.name + '_duration')
+         mission.stages.append(stage)
+      mission.stages[0].target_average_horizontal_speed = 2 * Symbol('speed') + 1
+      mission.stages[1].waypoints = WaypointReader(str(waypoints_path), simplification_tolerance=25.0,
+                                                   geodesic_mode=GeodesicMode.VINCENTY)
+      mission.stages[1].current_profile = RouteCurrentProfile(numpy.arange(4.0), numpy.ones(4), -numpy.ones(4))
+      mission.stages[2].turn_profile = RouteTurnProfile(numpy.array([10.0, -20.0]), numpy.array([500.0, numpy.inf]))
+
+      # Ensure that missions and individual stages survive a serialization round trip
+      print('Serializing and deserializing the mission...')
+      data = mission.serialize()
+      restored = Mission.deserialize(data)
+      print('Mission values match: {}'.format(all(getattr(restored, name) == getattr(mission, name)
+         for name in ('minimum_duration', 'maximum_duration', 'minimum_distance', 'maximum_average_horizontal_speed'))))
+      print('Stage states match: {}'.format(len(restored.stages) == len(mission.stages) and
+         all(stage_state(original) == stage_state(copy) for original, copy in zip(mission.stages, restored.stages))))
+      print('Symbolic values restored: {}'.format(restored.stages[0].target_duration == Symbol('stage0_duration') and
+                                                  restored.stages[0].target_average_horizontal_speed == 2 * Symbol('speed') + 1))
+      print('Restored waypoints readable: {}'.format(restored.stages[1].waypoints.waypoint_format is not None and
+                                                     sum(len(chunk) for chunk in restored.stages[1].waypoints) >= 2))
+      stage = MissionStage.deserialize(mission.stages[1].serialize())
+      print('Single stage round trip matches: {}'.format(stage_state(stage) == stage_state(mission.stages[1])))
+
+      # Ensure that data of the wrong kind or layout version is rejected
+      print('\nDeserializing invalid data...')
+      for description, invalid_data, deserialize in (('Mission as a stage', data, MissionStage.deserialize),
+                                                     ('Unknown layout version', data[:4] + struct.pack('<H', 2) + data[6:], Mission.deserialize),
+                                                     ('Truncated header', data[:3], Mission.deserialize)):
+         try:
+            deserialize(invalid_data)
+            print('{} rejected: False'.format(description))
+         except RuntimeError as error:
+            print('{} rejected: True ({})'.format(description, error))
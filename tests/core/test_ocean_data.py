@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from symdesign.core.OceanData import OceanDataset, OceanEnvironment, TiledOceanDataset, read_npz_arrays
+from pathlib import Path
+import numpy, os, tempfile
+
+def create_currents_dataset(path):
+   latitudes, longitudes, depths = numpy.linspace(-80.0, 80.0, 33), numpy.linspace(-180.0, 175.0, 72), numpy.array([0.0, 10.0, 100.0])
+   shape = (len(depths), len(latitudes), len(longitudes))
+   numpy.savez_compressed(path, latIndex=latitudes, lonIndex=longitudes, depthIndex=depths,
+                          uMeanData=numpy.random.normal(0.0, 0.5, shape), uStdData=numpy.random.uniform(0.0, 0.2, shape),
+                          vMeanData=numpy.random.normal(0.0, 0.5, shape), vStdData=numpy.random.uniform(0.0, 0.2, shape))
+   return path
+
+def create_time_varying_currents_dataset(path):
+   times, latitudes, longitudes, depths = numpy.arange(5) * 3600.0, numpy.linspace(-20.0, 20.0, 9), numpy.linspace(0.0, 55.0, 12), numpy.array([0.0, 10.0, 100.0])
+   shape = (len(times), len(depths), len(latitudes), len(longitudes))
+   numpy.savez_compressed(path, timeIndex=times, latIndex=latitudes, lonIndex=longitudes, depthIndex=depths,
+                          uMeanData=numpy.random.normal(0.0, 0.5, shape), uStdData=numpy.random.uniform(0.0, 0.2, shape),
+                          vMeanData=numpy.random.normal(0.0, 0.5, shape), vStdData=numpy.random.uniform(0.0, 0.2, shape))
+   return path
+
+def brute_force_windowed_current_speeds(dataset, sigma, start_time, end_time):
+   times = numpy.asarray(dataset['timeIndex'])
+   speeds = None
+   for time in numpy.union1d(numpy.linspace(start_time, end_time, 101), times[(times > start_time) & (times < end_time)]):
+      index = min(max(int(numpy.searchsorted(times, time, side='right')) - 1, 0), len(times) - 1)
+      fraction = 0.0 if index == len(times) - 1 else min(max((time - times[index]) / (times[index + 1] - times[index]), 0.0), 1.0)
+      next_index = min(index + 1, len(times) - 1)
+      u_mean, u_std, v_mean, v_std = (((1.0 - fraction) * dataset[name][index]) + (fraction * dataset[name][next_index])
+                                      for name in ('uMeanData', 'uStdData', 'vMeanData', 'vStdData'))
+      time_speeds = numpy.sqrt((numpy.abs(u_mean) + sigma * u_std)**2 + (numpy.abs(v_mean) + sigma * v_std)**2)
+      speeds = time_speeds if speeds is None else numpy.maximum(speeds, time_speeds)
+   return speeds
+
+def brute_force_current_speeds(dataset, sigma):
+   return numpy.sqrt((numpy.abs(dataset['uMeanData']) + sigma * dataset['uStdData'])**2 +
+                     (numpy.abs(dataset['vMeanData']) + sigma * dataset['vStdData'])**2)
+
+if __name__ == '__main__':
+
+   with tempfile.TemporaryDirectory() as data_directory, tempfile.TemporaryDirectory() as cache_directory:
+
+      # Ensure that the worst-case current field matches a brute-force calculation
+      print('\nComputing worst-case ocean current speeds...')
+      currents_path = create_currents_dataset(Path(data_directory).joinpath('currents.npz'))
+      dataset = OceanDataset(currents_path)
+      speeds = dataset.worst_case_current_speeds(2.0)
+      print('Worst-case speeds match: {}'.format(numpy.allclose(speeds, brute_force_current_speeds(dataset, 2.0))))
+      print('Nothing written to the data directory: {}'.format(
+         sorted(path.name for path in Path(data_directory).iterdir()) == ['currents.npz']))
+
+      # Ensure that the field is only persisted when a cache directory is specified
+      print('Persisting worst-case ocean current speeds to a cache directory...')
+      cached_speeds = OceanDataset(currents_path).worst_case_current_speeds(2.0, cache_directory=cache_directory)
+      print('Cached speeds match: {}'.format(numpy.array_equal(cached_speeds, speeds)))
+      print('Cache file written: {}'.format(len(list(Path(cache_directory).glob('*.npy'))) == 1))
+      reloaded_speeds = OceanDataset(currents_path).worst_case_current_speeds(2.0, cache_directory=cache_directory)
+      print('Cache file reused: {}'.format(isinstance(reloaded_speeds, numpy.memmap) and numpy.array_equal(reloaded_speeds, speeds)))
+      print('Nothing written to the data directory: {}'.format(
+         sorted(path.name for path in Path(data_directory).iterdir()) == ['currents.npz']))
+
+      # Ensure that a memory-mapped copy of the dataset matches the original archive
+      print('Converting the dataset into a memory-mapped format...')
+      mmap_path = OceanDataset.convert_to_memory_mappable(currents_path, Path(cache_directory).joinpath('currents'))
+      mmap_dataset = OceanDataset(mmap_path)
+      print('Memory-mapped dataset has the same arrays: {}'.format(sorted(mmap_dataset.keys()) == sorted(dataset.keys())))
+      print('Memory-mapped arrays match: {}'.format(all(numpy.array_equal(mmap_dataset[name], dataset[name]) for name in dataset.keys())))
+      print('Memory-mapped arrays are file-backed: {}'.format(mmap_dataset.memory_mapped and isinstance(mmap_dataset['uMeanData'], numpy.memmap)))
+      print('Memory-mapped worst-case speeds match: {}'.format(numpy.allclose(mmap_dataset.worst_case_current_speeds(2.0), speeds)))
+      close_sigma_speeds = OceanDataset(currents_path).worst_case_current_speeds(2.0000001, cache_directory=cache_directory)
+      print('Close sigmas are cached separately: {}'.format(numpy.allclose(close_sigma_speeds, brute_force_current_speeds(dataset, 2.0000001), rtol=0.0, atol=1e-12) and
+                                                            len(list(Path(cache_directory).glob('*.npy'))) == 2))
+      mmap_speeds = OceanDataset(mmap_path).worst_case_current_speeds(2.0, cache_directory=cache_directory)
+      directory_times = (os.stat(mmap_path).st_atime_ns, os.stat(mmap_path).st_mtime_ns)
+      member_path = Path(mmap_path).joinpath('uMeanData.npy')
+      numpy.save(member_path, numpy.asarray(mmap_dataset['uMeanData']) + 1.0)
+      os.utime(member_path, ns=(os.stat(member_path).st_atime_ns, os.stat(member_path).st_mtime_ns + 1000000000))
+      os.utime(mmap_path, ns=directory_times)
+      rewritten_dataset = OceanDataset(mmap_path)
+      print('Rewritten members invalidate the cache: {}'.format(numpy.allclose(rewritten_dataset.worst_case_current_speeds(2.0, cache_directory=cache_directory),
+                                                                               brute_force_current_speeds(rewritten_dataset, 2.0))))
+
+      # Ensure that a tiled copy of the dataset matches the original archive
+      print('Converting the dataset into a tiled format...')
+      tiled_path = TiledOceanDataset.convert_to_tiles(currents_path, Path(cache_directory).joinpath('currents.tiles'), (10, 16))
+      tiled_dataset = TiledOceanDataset(tiled_path)
+      print('Tiled dataset has the same arrays: {}'.format(sorted(tiled_dataset.keys()) == sorted(dataset.keys())))
+      depths, rows, columns = numpy.indices(dataset['uMeanData'].shape)
+      print('Tiled arrays match: {}'.format(all(numpy.array_equal(tiled_dataset[name][depths, rows, columns], dataset[name])
+                                                for name in ('uMeanData', 'uStdData', 'vMeanData', 'vStdData'))))
+      print('Tiled negative indices match: {}'.format(tiled_dataset['uMeanData'][-1, -1, -1] == dataset['uMeanData'][-1, -1, -1]))
+      tiled_speeds = tiled_dataset.worst_case_current_speeds(2.0)
+      print('Tiled worst-case speeds match: {}'.format(numpy.allclose(tiled_speeds[depths, rows, columns], speeds)))
+      try:
+         tiled_dataset['uMeanData'][0, :, 3]
+         print('Tiled slice rejected: False')
+      except TypeError:
+         print('Tiled slice rejected: True')
+      square_path = Path(data_directory).joinpath('square_currents.npz')
+      square_shape = (4, 4, 6)
+      numpy.savez_compressed(square_path, latIndex=numpy.linspace(-10.0, 10.0, 4), lonIndex=numpy.linspace(0.0, 50.0, 6),
+                             depthIndex=numpy.array([0.0, 10.0, 50.0, 100.0]), zMat=numpy.random.uniform(0.0, 100.0, (4, 6)),
+                             uMeanData=numpy.random.normal(0.0, 0.5, square_shape), uStdData=numpy.random.uniform(0.0, 0.2, square_shape),
+                             vMeanData=numpy.random.normal(0.0, 0.5, square_shape), vStdData=numpy.random.uniform(0.0, 0.2, square_shape))
+      square_dataset = OceanDataset(square_path)
+      tiled_square_dataset = TiledOceanDataset(TiledOceanDataset.convert_to_tiles(square_path, Path(cache_directory).joinpath('square.tiles'), (3, 4)))
+      print('Tiled arrays match with equal depth and latitude counts: {}'.format(
+         all(numpy.array_equal(tiled_square_dataset[name][tuple(numpy.indices(square_dataset[name].shape))], square_dataset[name])
+             for name in ('zMat', 'uMeanData', 'uStdData', 'vMeanData', 'vStdData'))))
+      print('Current arrays tiled along latitude and longitude: {}'.format(
+         all((tiled_square_dataset[name].latitude_axis, tiled_square_dataset[name].longitude_axis) == (1, 2)
+             for name in ('uMeanData', 'uStdData', 'vMeanData', 'vStdData'))))
+      ambiguous_path = Path(data_directory).joinpath('ambiguous.npz')
+      numpy.savez_compressed(ambiguous_path, latIndex=numpy.arange(4.0), lonIndex=numpy.arange(4.0), other=numpy.zeros((4, 4, 4)))
+      try:
+         TiledOceanDataset.convert_to_tiles(ambiguous_path, Path(cache_directory).joinpath('ambiguous.tiles'), (2, 2))
+         print('Ambiguous grid axes rejected: False')
+      except RuntimeError:
+         print('Ambiguous grid axes rejected: True')
+
+      # Ensure that the environment cache shares datasets until they change or are evicted
+      print('\nSharing datasets through the environment cache...')
+      OceanEnvironment.clear()
+      cached_dataset = OceanEnvironment.load(currents_path)
+      print('Repeated loads share a dataset: {}'.format(OceanEnvironment.load(str(currents_path)) is cached_dataset))
+      OceanEnvironment.preload({ str(currents_path): ['uMeanData'] })
+      print('Preloaded arrays are resident: {}'.format(cached_dataset.resident_bytes() == cached_dataset['uMeanData'].nbytes))
+      os.utime(currents_path, ns=(os.stat(currents_path).st_atime_ns, os.stat(currents_path).st_mtime_ns + 1000000000))
+      reloaded_dataset = OceanEnvironment.load(currents_path)
+      print('Modified datasets are reloaded: {}'.format(reloaded_dataset is not cached_dataset))
+      memory_limit = OceanEnvironment.memory_limit_bytes
+      OceanEnvironment.set_memory_limit(1)
+      reloaded_dataset['uMeanData']
+      OceanEnvironment.load(mmap_path)['uMeanData']
+      print('Least-recently-used datasets are evicted: {}'.format(OceanEnvironment.load(currents_path) is not reloaded_dataset))
+      OceanEnvironment.set_memory_limit(memory_limit)
+      OceanEnvironment.clear()
+
+      # Ensure that worst-case speeds over a time window match a densely sampled calculation
+      print('\nComputing worst-case speeds over time windows...')
+      time_varying_path = create_time_varying_currents_dataset(Path(data_directory).joinpath('time_varying.npz'))
+      time_varying_dataset = OceanDataset(time_varying_path)
+      for start_time, end_time in ((1800.0, 9000.0), (3600.0, 7200.0), (-5000.0, 100.0), (20000.0, 30000.0), (0.0, 14400.0)):
+         print('Window [{}, {}] matches: {}'.format(start_time, end_time, numpy.allclose(
+            time_varying_dataset.worst_case_current_speeds(2.0, (start_time, end_time)),
+            brute_force_windowed_current_speeds(time_varying_dataset, 2.0, start_time, end_time))))
+      print('Full time range is the default window: {}'.format(numpy.array_equal(time_varying_dataset.worst_case_current_speeds(2.0),
+                                                                                 time_varying_dataset.worst_case_current_speeds(2.0, (0.0, 14400.0)))))
+      tiled_time_varying_dataset = TiledOceanDataset(TiledOceanDataset.convert_to_tiles(time_varying_path, Path(cache_directory).joinpath('time_varying.tiles'), (4, 5)))
+      tiled_speeds = tiled_time_varying_dataset.worst_case_current_speeds(2.0, (1800.0, 9000.0))
+      print('Tiled window matches: {}'.format(numpy.allclose(tiled_speeds[tuple(numpy.indices(tiled_speeds.shape))],
+                                                             time_varying_dataset.worst_case_current_speeds(2.0, (1800.0, 9000.0)))))
+      try:
+         time_varying_dataset.worst_case_current_speeds(2.0, (9000.0, 1800.0))
+         print('Reversed window rejected: False')
+      except RuntimeError:
+         print('Reversed window rejected: True')
+
+      # Ensure that concurrently decompressed archive members match those read by numpy
+      print('\nDecompressing archive members concurrently...')
+      arrays = { 'large': numpy.arange(3000000, dtype=float).reshape(1000, 3000), 'fortran': numpy.asfortranarray(numpy.random.normal(size=(70, 30))),
+                 'integers': numpy.arange(-50, 50, dtype=numpy.int16), 'scalar': numpy.array(3.5), 'empty': numpy.empty((0, 4)) }
+      for archive_name, save in (('compressed.npz', numpy.savez_compressed), ('uncompressed.npz', numpy.savez)):
+         archive_path = Path(data_directory).joinpath(archive_name)
+         save(archive_path, **arrays)
+         with numpy.load(archive_path) as reference:
+            expected = { name: reference[name] for name in reference.files }
+         concurrent, sequential = read_npz_arrays(archive_path), read_npz_arrays(archive_path, ['fortran', 'scalar'], max_workers=1)
+         print('{} members match: {}'.format(archive_name, concurrent.keys() == expected.keys() and all(
+            numpy.array_equal(concurrent[name], expected[name]) and concurrent[name].dtype == expected[name].dtype and
+            concurrent[name].flags.f_contiguous == expected[name].flags.f_contiguous for name in expected)))
+         print('{} subsets match: {}'.format(archive_name, sorted(sequential) == ['fortran', 'scalar'] and
+                                             all(numpy.array_equal(sequential[name], expected[name]) for name in sequential)))
+         preloaded_dataset = OceanDataset(archive_path)
+         preloaded_dataset.preload()
+         print('{} preloaded members match: {}'.format(archive_name, all(numpy.array_equal(preloaded_dataset[name], expected[name]) for name in expected)))
+      object_path = Path(data_directory).joinpath('objects.npz')
+      numpy.savez(object_path, objects=numpy.array([{}, None], dtype=object))
+      try:
+         read_npz_arrays(object_path)
+         print('Object arrays rejected: False')
+      except RuntimeError:
+         print('Object arrays rejected: True')
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from symdesign.core.OceanGrid import OceanGrid
+import numpy
+
+if __name__ == '__main__':
+
+   # Create a global 1/12 degree grid and a set of random query coordinates
+   print('\nCreating a global 1/12 degree ocean grid...')
+   latitudes = numpy.linspace(-90.0, 90.0, 2161)
+   longitudes = numpy.arange(-180.0, 180.0, 1.0 / 12.0)
+   depths = numpy.array([0.0, 10.0, 50.0, 100.0, 500.0, 1000.0, 4000.0])
+   grid = OceanGrid(latitudes, longitudes, depths)
+   query_latitudes = numpy.random.uniform(-90.0, 90.0, 10000)
+   query_longitudes = numpy.random.uniform(-179.9, 179.9, 10000)
+   query_depths = numpy.random.uniform(0.0, 5000.0, 10000)
+
+   # Ensure that indexed lookups match brute-force searches
+   print('Comparing indexed lookups against brute-force searches...')
+   lat_indices, lon_indices, depth_indices = grid.nearest(query_latitudes, query_longitudes, query_depths)
+   print('Latitude indices match: {}'.format(
+      (lat_indices == numpy.abs(latitudes[None, :] - query_latitudes[:, None]).argmin(axis=1)).all()))
+   print('Longitude indices match: {}'.format(
+      (lon_indices == numpy.abs(longitudes[None, :] - query_longitudes[:, None]).argmin(axis=1)).all()))
+   print('Depth indices match: {}'.format(
+      (depth_indices == numpy.abs(depths[None, :] - query_depths[:, None]).argmin(axis=1)).all()))
+   print('Scalar lookups match: {}'.format(
+      all(grid.nearest(lat, lon, depth) == (lat_idx, lon_idx, depth_idx) for lat, lon, depth, lat_idx, lon_idx, depth_idx in
+          zip(query_latitudes[:100], query_longitudes[:100], query_depths[:100], lat_indices, lon_indices, depth_indices))))
+
+   # Ensure that longitudes wrap around the antimeridian
+   print('Longitude 179.99 wraps to index {} ({} deg)'.format(grid.longitude_index(179.99),
+                                                               longitudes[grid.longitude_index(179.99)]))
+   print('Longitude 359.0 wraps to index {} ({} deg)'.format(grid.longitude_index(359.0),
+                                                              longitudes[grid.longitude_index(359.0)]))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from symdesign.core.GlobalCoordinate import GlobalCoordinateArray
+from symdesign.core.Mission import MissionStage, MissionTarget
+from symdesign.core.RouteCurrents import RouteCurrentProfile
+from pathlib import Path
+import math, numpy, tempfile
+
+def create_currents_dataset(path):
+   latitudes, longitudes, depths = numpy.linspace(-10.0, 10.0, 21), numpy.linspace(-10.0, 10.0, 21), numpy.array([0.0, 10.0, 100.0])
+   shape = (len(depths), len(latitudes), len(longitudes))
+   generator = numpy.random.default_rng(0)
+   numpy.savez_compressed(path, latIndex=latitudes, lonIndex=longitudes, depthIndex=depths,
+                          uMeanData=generator.normal(0.0, 0.4, shape), uStdData=generator.uniform(0.0, 0.2, shape),
+                          vMeanData=generator.normal(0.0, 0.4, shape), vStdData=generator.uniform(0.0, 0.2, shape))
+   return str(path)
+
+def brute_force_transit_duration(lengths, along_track_currents, cross_track_currents, speed):
+   duration = 0.0
+   for length, along_track, cross_track in zip(lengths, along_track_currents, cross_track_currents):
+      speed_over_ground = along_track + math.sqrt(max((speed * speed) - (cross_track * cross_track), 0.0))
+      if length > 0.0 and (abs(cross_track) >= speed or speed_over_ground <= 0.0):
+         return math.inf
+      duration += (length / speed_over_ground) if length > 0.0 else 0.0
+   return duration
+
+if __name__ == '__main__':
+
+   with tempfile.TemporaryDirectory() as data_directory:
+
+      # Ensure that transit durations match a segment-by-segment calculation
+      print('\nComputing a route current profile...')
+      currents_path = create_currents_dataset(Path(data_directory).joinpath('currents.npz'))
+      latitudes, longitudes = numpy.linspace(-5.0, 5.0, 100), 3.0 * numpy.sin(numpy.linspace(0.0, 6.0, 100))
+      waypoints = numpy.column_stack((latitudes, longitudes, numpy.zeros(len(latitudes))))
+      segments = GlobalCoordinateArray.from_llh(latitudes, longitudes, numpy.zeros(len(latitudes))).compute_segment_enu()
+      profile = RouteCurrentProfile.from_route(currents_path, latitudes[:-1], longitudes[:-1], *segments)
+      speeds = numpy.array([1.5, 2.0, 3.0])
+      brute_force = [brute_force_transit_duration(profile.lengths, profile.along_track_currents, profile.cross_track_currents, speed) for speed in speeds]
+      print('Transit durations match: {}'.format(numpy.allclose(profile.transit_durations(speeds), brute_force)))
+      print('Untraversable route has infinite duration: {}'.format(math.isinf(profile.transit_durations(0.01))))
+      speeds_over_ground = profile.speeds_over_ground(2.0)
+      print('Required speeds invert speeds over ground: {}'.format(
+         numpy.allclose(numpy.hypot(speeds_over_ground - profile.along_track_currents, profile.cross_track_currents), 2.0)))
+      adverse_profile = RouteCurrentProfile.from_route(currents_path, latitudes[:-1], longitudes[:-1], *segments, sigma=2.0)
+      print('Adverse currents slow the transit: {}'.format(adverse_profile.transit_durations(2.0) > profile.transit_durations(2.0)))
+
+      # Ensure that the minimum speed through the water transits the route within the duration
+      print('\nFinding minimum speeds through the water...')
+      duration = 1.2 * profile.distance / 1.5
+      minimum_speed = profile.minimum_speed_through_water(duration)
+      print('Minimum speed is sufficient: {}'.format(profile.transit_durations(minimum_speed) <= duration))
+      print('Minimum speed is tight: {}'.format(profile.transit_durations(minimum_speed - 2e-6) > duration))
+      minimum_speeds = profile.minimum_speed_through_water(numpy.array([0.5, 1.0, 2.0]) * duration)
+      print('Minimum speeds for many durations match: {}'.format(
+         numpy.allclose(minimum_speeds, [profile.minimum_speed_through_water(scale * duration) for scale in (0.5, 1.0, 2.0)], rtol=0.0, atol=2e-6)))
+
+      # Ensure that the profile only constrains a stage given a maximum speed through the water
+      print('\nAttaching route current profiles to a Mission Stage...')
+      stage = MissionStage('transit', [MissionTarget.EXACT_DISTANCE])
+      stage.load_waypoints_and_custom_density(waypoints.tolist(), lambda latitude, longitude: -1000.0, currents_path,
+                                              lambda latitude, longitude, depth: 1025.0)
+      stage.compute_current_profile(currents_path)
+      print('Profile alone leaves the minimum duration unchanged: {}'.format(stage.minimum_duration is None))
+      stage.compute_current_profile(currents_path, maximum_speed_through_water=2.0)
+      print('Maximum speed raises the minimum duration: {}'.format(math.isclose(stage.minimum_duration, profile.transit_durations(2.0))))
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from symdesign.core.SummaryCache import StageSummaryCache, cache_token
+from pathlib import Path
+import tempfile
+
+DENSITY_OFFSET = 1030.0
+
+def pure_density_model(_latitude_deg, _longitude_deg, depth_m):
+   return 1030.0 + (20.0 * (depth_m / 4000.0))
+
+def global_density_model(_latitude_deg, _longitude_deg, depth_m):
+   return DENSITY_OFFSET + (20.0 * (depth_m / 4000.0))
+
+class DensityModel(object):
+   def __init__(self, scale):
+      self.scale = scale
+   def __call__(self, _latitude_deg, _longitude_deg, depth_m):
+      return 1030.0 + (self.scale * (depth_m / 4000.0))
+   def evaluate(self, _latitude_deg, _longitude_deg, depth_m):
+      return 1030.0 + (self.scale * (depth_m / 4000.0))
+
+if __name__ == '__main__':
+
+   with tempfile.TemporaryDirectory() as cache_directory:
+
+      # Ensure that unchanged components reuse a summary and that changed files invalidate it
+      print('\nComputing and reusing cached summaries...')
+      model_path = Path(cache_directory).joinpath('model.txt')
+      model_path.write_text('first')
+      computations = []
+      compute = lambda: computations.append(len(computations)) or len(computations)
+      first = StageSummaryCache.load_or_compute(cache_directory, ('test', str(model_path), 1.5), compute)
+      second = StageSummaryCache.load_or_compute(cache_directory, ('test', str(model_path), 1.5), compute)
+      print('Unchanged components hit the cache: {}'.format(first == second == 1 and len(computations) == 1))
+      model_path.write_text('second, longer')
+      third = StageSummaryCache.load_or_compute(cache_directory, ('test', str(model_path), 1.5), compute)
+      print('Changed file invalidates the cache: {}'.format(third == 2))
+      fourth = StageSummaryCache.load_or_compute(cache_directory, ('test', str(model_path), 2.5), compute)
+      print('Changed parameter invalidates the cache: {}'.format(fourth == 3))
+
+      # Ensure that only callables which depend solely on their arguments are fingerprinted
+      print('\nFingerprinting callable models...')
+      cache = StageSummaryCache(cache_directory)
+      print('Pure function is cacheable: {}'.format(cache.key(pure_density_model) is not None))
+      print('Pure function key is stable: {}'.format(cache.key(pure_density_model) == cache.key(pure_density_model)))
+      print('Function reading a global is not cacheable: {}'.format(cache.key(global_density_model) is None))
+      print('Callable objects are not cacheable: {}'.format(
+         cache.key(DensityModel(1.0)) is None and cache.key(DensityModel(2.0)) is None))
+      print('Bound methods are not cacheable: {}'.format(cache.key(DensityModel(1.0).evaluate) is None))
+      scale = 20.0
+      print('Closures are not cacheable: {}'.format(cache.key(lambda _lat, _lon, depth: 1030.0 + scale * depth) is None))
+
+      # Ensure that explicit tokens make any callable cacheable and distinguish its configurations
+      print('\nFingerprinting callable models with explicit tokens...')
+      first_model, second_model = cache_token('scale=1')(DensityModel(1.0)), cache_token('scale=2')(DensityModel(2.0))
+      print('Tokenized callable objects are cacheable: {}'.format(
+         cache.key(first_model) is not None and cache.key(second_model) is not None))
+      print('Different tokens give different keys: {}'.format(cache.key(first_model) != cache.key(second_model)))
+      print('Tokenized global function is cacheable: {}'.format(
+         cache.key(cache_token('offset=1030')(global_density_model)) is not None))
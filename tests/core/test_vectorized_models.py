@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from symdesign.core.EnvironmentSampler import vectorized_model
+from symdesign.core.Mission import MissionStage, MissionTarget
+import numpy
+
+WAYPOINTS = numpy.column_stack((numpy.linspace(10.0, 12.0, 200), numpy.linspace(-40.0, -38.0, 200), numpy.zeros(200))).tolist()
+SUMMARY_ATTRIBUTES = ('maximum_depth', 'minimum_density', 'maximum_density', 'average_latitude', 'target_distance')
+
+def load_stage(bathymetry_model, density_model):
+   stage = MissionStage('transit', [MissionTarget.EXACT_DISTANCE])
+   stage.load_waypoints_and_custom_density(WAYPOINTS, bathymetry_model, None, density_model)
+   return stage
+
+if __name__ == '__main__':
+
+   # Ensure that vectorized models yield the same stage as equivalent scalar models
+   print('\nLoading a Mission Stage with scalar and vectorized models...')
+   calls = { 'scalar': 0, 'vectorized': 0 }
+   def scalar_bathymetry(latitude_deg, longitude_deg):
+      calls['scalar'] += 1
+      return -1000.0 - (10.0 * latitude_deg) - longitude_deg
+   def scalar_density(_latitude_deg, _longitude_deg, depth_m):
+      return 1030.0 + (20.0 * (depth_m / 4000.0))
+   @vectorized_model
+   def vectorized_bathymetry(latitude_deg, longitude_deg):
+      calls['vectorized'] += 1
+      return -1000.0 - (10.0 * numpy.asarray(latitude_deg)) - numpy.asarray(longitude_deg)
+   @vectorized_model
+   def vectorized_density(_latitude_deg, _longitude_deg, depth_m):
+      return 1030.0 + (20.0 * (numpy.asarray(depth_m) / 4000.0))
+   scalar_stage = load_stage(scalar_bathymetry, scalar_density)
+   vectorized_stage = load_stage(vectorized_bathymetry, vectorized_density)
+   print('Scalar model is called per waypoint: {}'.format(calls['scalar'] >= len(WAYPOINTS)))
+   print('Vectorized model is called per batch: {}'.format(0 < calls['vectorized'] < len(WAYPOINTS)))
+   print('Stage summaries match: {}'.format(all(numpy.isclose(getattr(scalar_stage, name), getattr(vectorized_stage, name))
+                                                for name in SUMMARY_ATTRIBUTES)))
+
+   # Ensure that a vectorized model may return a single value for all samples
+   print('\nLoading a Mission Stage with constant vectorized models...')
+   constant_stage = load_stage(vectorized_model(lambda _latitude_deg, _longitude_deg: -500.0),
+                               vectorized_model(lambda _latitude_deg, _longitude_deg, _depth_m: 1027.0))
+   print('Constant depth is broadcast: {}'.format(constant_stage.maximum_depth == 500.0))
+   print('Constant density is broadcast: {}'.format(constant_stage.minimum_density == constant_stage.maximum_density == 1027.0))
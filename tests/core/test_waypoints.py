@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from symdesign.core.GlobalCoordinate import GeodesicMode, GlobalCoordinateArray
+from symdesign.core.Waypoints import WaypointReader
+from pathlib import Path
+import numpy, pickle, tempfile
+
+def route_length(waypoints, geodesic_mode):
+   return float(GlobalCoordinateArray.from_llh(waypoints[:, 0], waypoints[:, 1], waypoints[:, 2])
+                .compute_segment_distances(geodesic_mode).sum())
+
+def read_all(reader):
+   return numpy.concatenate([chunk for chunk in reader])
+
+if __name__ == '__main__':
+
+   # Write the same waypoints in every supported file format
+   print('\nWriting waypoints in every supported format...')
+   waypoints = numpy.column_stack((numpy.random.uniform(-80.0, 80.0, 2500), numpy.random.uniform(-180.0, 180.0, 2500),
+                                   numpy.random.uniform(-10.0, 0.0, 2500)))
+   with tempfile.TemporaryDirectory() as data_directory:
+      paths = { name: Path(data_directory).joinpath('waypoints.' + name) for name in ('bin', 'npy', 'csv', 'pkl') }
+      waypoints.astype('<f8').tofile(paths['bin'])
+      numpy.save(paths['npy'], waypoints)
+      with open(paths['csv'], 'w') as csv_file:
+         csv_file.write('Waypoints\nlatitude,longitude,height\n')
+         csv_file.writelines('{!r},{!r},{!r}\n'.format(*waypoint) for waypoint in waypoints.tolist())
+      with open(paths['pkl'], 'wb') as pickle_file:
+         for start in range(0, len(waypoints), 1000):
+            pickle.dump(waypoints[start:start+1000].tolist(), pickle_file)
+
+      # Ensure that every format and iterable source streams identical waypoints in bounded chunks
+      print('Reading waypoints in chunks of 256...')
+      for name, source in list(paths.items()) + [('iterable', waypoints.tolist())]:
+         chunks = [chunk for chunk in WaypointReader(source, chunk_size=256)]
+         print('  {:>8s}: waypoints match: {}, chunks bounded: {}'.format(name, numpy.array_equal(numpy.concatenate(chunks), waypoints),
+                                                                        all(len(chunk) <= 256 for chunk in chunks)))
+
+      # Ensure that malformed CSV rows after the header are reported rather than skipped
+      print('Reading a CSV file with a malformed waypoint...')
+      lines = paths['csv'].read_text().splitlines()
+      lines[1000] = '12.5,not-a-number,0.0'
+      paths['csv'].write_text('\n'.join(lines) + '\n')
+      try:
+         read_all(WaypointReader(paths['csv']))
+         print('Malformed waypoint rejected: False')
+      except RuntimeError as error:
+         print('Malformed waypoint rejected: {} ({})'.format('line 1001' in str(error), error))
+      lines[1000] = '12.5,-40.0'
+      paths['csv'].write_text('\n'.join(lines) + '\n')
+      try:
+         read_all(WaypointReader(paths['csv']))
+         print('Truncated waypoint rejected: False')
+      except RuntimeError as error:
+         print('Truncated waypoint rejected: {} ({})'.format('line 1001' in str(error), error))
+
+   # Create a dense random-walk route along with routes that are straight in each geodesic mode
+   print('\nCreating dense routes...')
+   num_waypoints = 20000
+   headings = numpy.cumsum(numpy.random.normal(0.0, 0.05, num_waypoints))
+   route = numpy.column_stack((60.0 + numpy.cumsum(1e-4 * numpy.cos(headings)),
+                               -30.0 + numpy.cumsum(2e-4 * numpy.sin(headings)),
+                               numpy.zeros(num_waypoints)))
+   meridian = numpy.column_stack((numpy.linspace(10.0, 40.0, 5000), numpy.full(5000, 20.0), numpy.zeros(5000)))
+   ends = GlobalCoordinateArray.from_llh(numpy.array([10.0, 40.0]), numpy.array([20.0, 30.0]), numpy.zeros(2)).get_ecef()
+   fractions = numpy.linspace(0.0, 1.0, 5000)[:, numpy.newaxis]
+   line = GlobalCoordinateArray.from_xyz(*((1.0 - fractions) * ends[0] + fractions * ends[1]).T)
+   chord = numpy.column_stack((line.get_latitude(), line.get_longitude(), line.height))
+
+   # Ensure that the length reduction stays within the tolerance in every geodesic mode
+   for geodesic_mode in GeodesicMode:
+      print('\nSimplifying routes using {} lengths...'.format(geodesic_mode.name))
+      for tolerance in (1.0, 10.0, 100.0):
+         reader = WaypointReader(route, chunk_size=1000, simplification_tolerance=tolerance, geodesic_mode=geodesic_mode)
+         simplified = read_all(reader)
+         error = route_length(route, geodesic_mode) - route_length(simplified, geodesic_mode)
+         print('  Tolerance {:5.1f} m: {:5d} of {} waypoints kept, length error {:.3f} m, within tolerance: {}, '
+               'matches reported error: {}'.format(tolerance, len(simplified), num_waypoints, error, 0.0 <= error <= tolerance,
+                                                   abs(error - reader.simplification_error) < 1e-6))
+         print('  End points kept: {}'.format(numpy.array_equal(simplified[[0, -1]], route[[0, -1]])))
+
+   # Ensure that routes which are straight in the measured geodesic mode collapse to their end points
+   print('\nSimplifying straight routes...')
+   simplified = read_all(WaypointReader(chord, chunk_size=1000, simplification_tolerance=1.0, geodesic_mode=GeodesicMode.CHORD))
+   print('Straight ECEF route collapses to its end points: {}'.format(len(simplified) == 2 and numpy.allclose(simplified, chord[[0, -1]])))
+   simplified = read_all(WaypointReader(meridian, chunk_size=1000, simplification_tolerance=1.0, geodesic_mode=GeodesicMode.VINCENTY))
+   print('Meridian route collapses to its end points: {}'.format(len(simplified) == 2 and numpy.allclose(simplified, meridian[[0, -1]])))
+   simplified = read_all(WaypointReader(meridian, chunk_size=1000, simplification_tolerance=1.0, geodesic_mode=GeodesicMode.CHORD))
+   print('Meridian route keeps intermediate points when measured by chord length: {}'.format(len(simplified) > 2))
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pathlib import Path
+from symdesign.core.OceanData import OceanDataset
+import os, sys
+
+if __name__ == '__main__':
+
+   # Verify command-line parameters
+   if len(sys.argv) != 2:
+      print('\nUSAGE: ./convert_npz_to_npy.py ENVIRONMENTAL_DATA.npz\n')
+      sys.exit(-1)
+   if not Path(sys.argv[1]).exists():
+      print('\nERROR: The specified file does not exist: {}'.format(sys.argv[1]))
+      sys.exit(-2)
+
+   # Convert the archive into a memory-mappable directory of uncompressed arrays
+   output_path = OceanDataset.convert_to_memory_mappable(sys.argv[1], os.path.splitext(sys.argv[1])[0])
+   print('Memory-mappable dataset written to: {}'.format(output_path))
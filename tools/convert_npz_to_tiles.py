@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# Copyright (C) 2022, Will Hedgecock
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pathlib import Path
+from symdesign.core.OceanData import TiledOceanDataset
+import os, sys
+
+if __name__ == '__main__':
+
+   # Verify command-line parameters
+   if len(sys.argv) not in (2, 4):
+      print('\nUSAGE: ./convert_npz_to_tiles.py ENVIRONMENTAL_DATA.npz [LAT_TILE_SIZE LON_TILE_SIZE]\n')
+      sys.exit(-1)
+   if not Path(sys.argv[1]).exists():
+      print('\nERROR: The specified file does not exist: {}'.format(sys.argv[1]))
+      sys.exit(-2)
+   tile_size = (int(sys.argv[2]), int(sys.argv[3])) if len(sys.argv) == 4 else (256, 256)
+
+   # Split all gridded arrays into fixed-size latitude/longitude tiles
+   output_path = TiledOceanDataset.convert_to_tiles(sys.argv[1], os.path.splitext(sys.argv[1])[0] + '_tiles', tile_size)
+   print('Tiled dataset written to: {}'.format(output_path))
@@ -20,10 +20,12 @@ import numpy, pickle, sys
 if __name__ == '__main__':
 
    # Verify command-line parameters
-   if len(sys.argv) != 8:
-      print('\nUSAGE: ./convert_str_currents.py LAT_GRID.pkl LON_GRID.pkl DEPTH_GRID.pkl U_MEAN.pkl U_STD.pkl V_MEAN.pkl V_STD.pkl\n')
+   if len(sys.argv) != 8 and len(sys.argv) != 9:
+      print('\nUSAGE: ./convert_str_currents.py LAT_GRID.pkl LON_GRID.pkl DEPTH_GRID.pkl U_MEAN.pkl U_STD.pkl V_MEAN.pkl V_STD.pkl [TIME_GRID.pkl]\n')
+      print('       If TIME_GRID.pkl (times in seconds since the Unix epoch) is specified, each mean and')
+      print('       standard deviation file must contain a leading time axis: [time][depth][lat][lon]\n')
       sys.exit(-1)
-   for i in range(1, 8):
+   for i in range(1, len(sys.argv)):
       if not Path(sys.argv[i]).exists:
          print('\nERROR: The specified file does not exist: {}'.format(sys.argv[i]))
          sys.exit(-2)
@@ -37,8 +39,15 @@ if __name__ == '__main__':
    with open(sys.argv[5], 'rb') as file: ustd_data = numpy.array(pickle.load(file)) * 0.01
    with open(sys.argv[6], 'rb') as file: vmean_data = numpy.array(pickle.load(file)) * 0.01
    with open(sys.argv[7], 'rb') as file: vstd_data = numpy.array(pickle.load(file)) * 0.01
+   time_data = {}
+   if len(sys.argv) == 9:
+      with open(sys.argv[8], 'rb') as file: time_data['timeIndex'] = numpy.array(pickle.load(file), dtype=float)
+      if umean_data.ndim != 4 or umean_data.shape[0] != len(time_data['timeIndex']):
+         print('\nERROR: Time-varying current data must be indexed as [time][depth][lat][lon]')
+         sys.exit(-3)
 
    # Create a numpy array structure containing all the data
    with open(output_path, 'wb') as file:
       numpy.savez_compressed(file, latIndex=lat_data, lonIndex=lon_data, depthIndex=depth_data,
-                                   uMeanData=umean_data, uStdData=ustd_data, vMeanData=vmean_data, vStdData=vstd_data)
+                                   uMeanData=umean_data, uStdData=ustd_data, vMeanData=vmean_data, vStdData=vstd_data,
+                                   **time_data)